@@ -0,0 +1,485 @@
+"""
+Компилятор учебного контента.
+
+Проверяет training_data.json по схеме до запуска тренажера и собирает
+готовый артефакт с моделью контента:
+
+- схема: обязательные поля, типы, диапазоны (difficulty, индекс correct);
+- дубликаты через хеш-индексы: тексты заданий (по ним ведется
+  completed_tasks), тексты вопросов внутри уровня, id сценариев;
+- коллизии error_simulation: подсказка, совпадающая с решением (никогда
+  не покажется), повторы внутри задания, ввод не в нормализованном виде.
+
+Модули, тесты и сценарии проверяются независимо, поэтому большие пакеты
+контента проверяются в пуле процессов; глобальные индексы дубликатов
+сливаются в основном процессе.
+
+Артефакт (pickle) хранит модель и sha256 исходного JSON: тренажер
+загружает его, только если хеш совпадает, иначе читает и проверяет JSON.
+
+Запуск:
+    python artix_compiler.py               # проверка и сборка артефакта
+    python artix_compiler.py --check       # только проверка
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import sys
+
+from artix_completion import normalize_command
+from artix_content import ContentValidationError, build_content, content_fingerprint, is_module_entry
+from artix_paths import APP_DIR
+
+# Формат артефакта: меняется при изменении классов модели контента
+ARTIFACT_FORMAT = 2
+
+# С какого числа заданий и вопросов проверка идет в пуле процессов
+PARALLEL_MIN_ITEMS = 5000
+
+DIFFICULTY_RANGE = range(1, 6)
+
+# Пакет с артефактом внутри zipapp (см. build_zipapp.py)
+EMBEDDED_PACKAGE = 'artix_data'
+EMBEDDED_ARTIFACT = 'training_data.compiled'
+
+
+def compiled_path(source_path):
+    """Путь к артефакту рядом с исходным JSON."""
+    return os.path.splitext(source_path)[0] + '.compiled'
+
+
+def source_digest(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+class Issue:
+    """Найденная проблема контента."""
+    __slots__ = ('severity', 'location', 'message')
+
+    ERROR = 'error'
+    WARNING = 'warning'
+
+    def __init__(self, severity, location, message):
+        self.severity = severity
+        self.location = location
+        self.message = message
+
+    def __str__(self):
+        label = 'ОШИБКА' if self.severity == self.ERROR else 'предупреждение'
+        return f"{label}: {self.location}: {self.message}"
+
+
+# --- ПРОВЕРКА ОДНОЙ ЧАСТИ КОНТЕНТА ---
+
+class _UnitChecker:
+    """Проверяет модуль, уровень теста или сценарий.
+
+    Кроме проблем собирает записи для глобальных индексов дубликатов:
+    (индекс, хеш ключа, позиция, место). Позиция - кортеж вроде
+    (модуль, команда, номер задания), однозначно задающий элемент;
+    место - его описание для сообщения.
+    """
+
+    def __init__(self):
+        self.issues = []
+        self.index_entries = []
+
+    def add_index_entry(self, index_name, key, position, location):
+        # Из процессов возвращаются 16-байтовые хеши, а не полные тексты
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        self.index_entries.append((index_name, digest, position, location))
+
+    def error(self, location, message):
+        self.issues.append(Issue(Issue.ERROR, location, message))
+
+    def warning(self, location, message):
+        self.issues.append(Issue(Issue.WARNING, location, message))
+
+    def require_text(self, raw, field, location):
+        """Обязательная непустая строка; возвращает ее или None."""
+        value = self.optional_text(raw, field, location)
+        if value is None:
+            if field not in raw:
+                self.error(location, f"нет поля '{field}'")
+            return None
+        if not value.strip():
+            self.error(location, f"поле '{field}' пустое")
+            return None
+        return value
+
+    def optional_text(self, raw, field, location, warn_missing=False):
+        """Необязательная строка: проверяется только тип."""
+        value = raw.get(field)
+        if value is None:
+            if warn_missing:
+                self.warning(location, f"нет поля '{field}', будет пустым")
+            return None
+        if not isinstance(value, str):
+            self.error(location, f"поле '{field}' должно быть строкой")
+            return None
+        return value
+
+    def check_difficulty(self, raw, location, required=True):
+        if 'difficulty' not in raw:
+            if required:
+                self.warning(location, "нет поля 'difficulty', будет 1")
+            return
+        value = raw['difficulty']
+        if isinstance(value, bool) or not isinstance(value, int) or value not in DIFFICULTY_RANGE:
+            self.error(location, f"difficulty должно быть целым от 1 до 5, а не {value!r}")
+
+    def check_error_simulation(self, raw, solution, location):
+        sims = raw.get('error_simulation')
+        if sims is None:
+            return
+        if not isinstance(sims, list):
+            self.error(location, "error_simulation должно быть списком")
+            return
+        solution_clean = normalize_command(solution) if solution else None
+        seen = {}
+        for n, sim in enumerate(sims, 1):
+            sim_location = f"{location} / ошибка {n}"
+            if not isinstance(sim, dict):
+                self.error(sim_location, "ожидается объект")
+                continue
+            wrong_input = self.require_text(sim, 'wrong_input', sim_location)
+            self.require_text(sim, 'message', sim_location)
+            if wrong_input is None:
+                continue
+            clean = normalize_command(wrong_input)
+            if clean == solution_clean:
+                self.error(sim_location, f"ввод '{wrong_input}' совпадает с решением и никогда не сработает")
+            elif clean in seen:
+                self.error(sim_location, f"ввод '{wrong_input}' повторяет ошибку {seen[clean]}")
+            elif clean != wrong_input.lower():
+                self.warning(sim_location, f"ввод '{wrong_input}' с лишними пробелами не совпадет с ответом")
+            seen.setdefault(clean, n)
+
+    def check_module(self, module_id, raw):
+        location = f"модуль {module_id}"
+        self.require_text(raw, 'name', location)
+        commands = raw.get('commands')
+        if not isinstance(commands, dict) or not commands:
+            self.error(location, "commands должно быть непустым объектом")
+            return
+        for command_id, command in commands.items():
+            command_location = f"{location} / команда {command_id}"
+            if not isinstance(command, dict):
+                self.error(command_location, "ожидается объект")
+                continue
+            self.require_text(command, 'name', command_location)
+            for field in ('theory', 'when_useful', 'params'):
+                self.optional_text(command, field, command_location, warn_missing=True)
+            practice = command.get('practice', [])
+            if not isinstance(practice, list):
+                self.error(command_location, "practice должно быть списком")
+                continue
+            for n, task in enumerate(practice, 1):
+                self.check_task(task, (module_id, command_id, n), f"{command_location} / задание {n}")
+
+    def check_task(self, raw, position, location):
+        if not isinstance(raw, dict):
+            self.error(location, "ожидается объект")
+            return
+        text = self.require_text(raw, 'task', location)
+        solution = self.require_text(raw, 'solution', location)
+        self.optional_text(raw, 'explanation', location)
+        self.check_difficulty(raw, location)
+        self.check_error_simulation(raw, solution, location)
+        if text is not None:
+            # completed_tasks хранит тексты заданий - они должны быть уникальны
+            self.add_index_entry('task', text, position, location)
+
+    def check_test_level(self, level, raw):
+        location = f"тест {level}"
+        if not isinstance(raw, dict):
+            self.error(location, "ожидается объект")
+            return
+        self.require_text(raw, 'name', location)
+        self.check_difficulty(raw, location, required=False)
+        per_attempt = raw.get('questions_per_attempt')
+        if per_attempt is not None and (isinstance(per_attempt, bool) or not isinstance(per_attempt, int) or per_attempt < 1):
+            self.error(location, "questions_per_attempt должно быть положительным целым")
+        questions = raw.get('questions')
+        if not isinstance(questions, list) or not questions:
+            self.error(location, "questions должно быть непустым списком")
+            return
+        for n, question in enumerate(questions, 1):
+            self.check_question(level, question, n, f"{location} / вопрос {n}")
+
+    def check_question(self, level, raw, n, location):
+        if not isinstance(raw, dict):
+            self.error(location, "ожидается объект")
+            return
+        text = self.require_text(raw, 'question', location)
+        self.optional_text(raw, 'explanation', location)
+        options = raw.get('options')
+        if not isinstance(options, list) or len(options) < 2 or not all(isinstance(o, str) for o in options):
+            self.error(location, "options должно быть списком хотя бы из двух строк")
+            return
+        correct = raw.get('correct')
+        if isinstance(correct, bool) or not isinstance(correct, int) or not 0 <= correct < len(options):
+            self.error(location, f"correct должно быть индексом от 0 до {len(options) - 1}, а не {correct!r}")
+        if len(set(options)) != len(options):
+            self.warning(location, "варианты ответа повторяются")
+        if text is not None:
+            # Статистика тестов ведется по тексту вопроса внутри уровня
+            self.add_index_entry('question', f"{level}\0{text}", (level, n), location)
+
+    def check_scenario(self, key, raw):
+        location = f"сценарий {key}"
+        if not isinstance(raw, dict):
+            self.error(location, "ожидается объект")
+            return
+        self.require_text(raw, 'name', location)
+        self.optional_text(raw, 'description', location)
+        self.check_difficulty(raw, location)
+        scenario_id = raw.get('id', key)
+        self.add_index_entry('scenario', str(scenario_id), (key,), location)
+        steps = raw.get('steps')
+        if not isinstance(steps, list) or not steps:
+            self.error(location, "steps должно быть непустым списком")
+            return
+        for n, step in enumerate(steps, 1):
+            step_location = f"{location} / шаг {n}"
+            if not isinstance(step, dict):
+                self.error(step_location, "ожидается объект")
+                continue
+            self.require_text(step, 'task', step_location)
+            solution = self.require_text(step, 'solution', step_location)
+            self.optional_text(step, 'hint', step_location)
+            self.optional_text(step, 'explanation', step_location)
+            self.check_error_simulation(step, solution, step_location)
+
+
+# Части контента для процессов пула: передаются один раз при запуске
+# процесса (при fork - вообще без копирования), а задачи - это номера
+_POOL_UNITS = ()
+
+
+def _init_pool(units):
+    global _POOL_UNITS
+    _POOL_UNITS = units
+
+
+def _check_pool_unit(number):
+    return check_unit(_POOL_UNITS[number])
+
+
+def check_unit(unit):
+    """Проверяет часть контента: unit = (вид, ключ, данные)."""
+    kind, key, raw = unit
+    checker = _UnitChecker()
+    if kind == 'module':
+        checker.check_module(key, raw)
+    elif kind == 'test':
+        checker.check_test_level(key, raw)
+    else:
+        checker.check_scenario(key, raw)
+    return checker.issues, checker.index_entries
+
+
+def _split_units(raw):
+    units = [('module', key, value) for key, value in raw.items() if is_module_entry(value)]
+    units.extend(('test', key, value) for key, value in raw.get('tests', {}).items())
+    units.extend(('scenario', key, value) for key, value in raw.get('scenarios', {}).items())
+    return units
+
+
+def _unit_size(unit):
+    kind, _, raw = unit
+    if kind == 'module' and isinstance(raw['commands'], dict):
+        return sum(len(command.get('practice') or ()) for command in raw['commands'].values()
+                   if isinstance(command, dict))
+    if kind == 'test' and isinstance(raw, dict):
+        return len(raw.get('questions') or ())
+    return 1
+
+
+def validate_content(raw, jobs=None):
+    """Проверяет разобранный training_data.json и возвращает список Issue.
+
+    Args:
+        raw (dict): Результат json.load
+        jobs (int): Число процессов; None - пул только для больших пакетов
+    """
+    issues = []
+    if not isinstance(raw, dict):
+        return [Issue(Issue.ERROR, 'файл', "ожидается объект верхнего уровня")]
+    for section in ('tests', 'scenarios'):
+        if not isinstance(raw.get(section, {}), dict):
+            issues.append(Issue(Issue.ERROR, section, "ожидается объект"))
+            raw = {key: value for key, value in raw.items() if key != section}
+
+    units = _split_units(raw)
+    if not any(kind == 'module' for kind, _, _ in units):
+        issues.append(Issue(Issue.ERROR, 'файл', "нет ни одного учебного модуля"))
+
+    if jobs is None:
+        jobs = available_cpus() if sum(map(_unit_size, units)) >= PARALLEL_MIN_ITEMS else 1
+    if jobs > 1 and len(units) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_pool, initargs=(units,)) as executor:
+            results = list(executor.map(_check_pool_unit, range(len(units)),
+                                        chunksize=max(1, len(units) // (jobs * 4))))
+    else:
+        results = [check_unit(unit) for unit in units]
+
+    # Слияние хеш-индексов: первое вхождение ключа против последующих
+    indexes = {}
+    messages = {
+        'task': "текст задания повторяет {}",
+        'question': "вопрос повторяет {}",
+        'scenario': "id сценария повторяет {}",
+    }
+    for unit_issues, index_entries in results:
+        issues.extend(unit_issues)
+        for index_name, key, position, location in index_entries:
+            first_position, first_location = indexes.setdefault(index_name, {}).setdefault(key, (position, location))
+            if first_position != position:
+                issues.append(Issue(Issue.ERROR, location, messages[index_name].format(first_location)))
+    return issues
+
+
+def available_cpus():
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def has_errors(issues):
+    return any(issue.severity == Issue.ERROR for issue in issues)
+
+
+# --- АРТЕФАКТ ---
+
+def compile_content(data, jobs=None):
+    """Проверяет байты training_data.json и строит модель.
+
+    Returns:
+        tuple: (Content, список Issue)
+
+    Raises:
+        ContentValidationError: если есть ошибки
+    """
+    raw = json.loads(data.decode('utf-8'))
+    issues = validate_content(raw, jobs)
+    if has_errors(issues):
+        raise ContentValidationError(issues)
+    content = build_content(raw)
+    content.version = content_fingerprint(content)
+    return content, issues
+
+
+def write_artifact(content, digest, path):
+    """Атомарно записывает артефакт с моделью и хешем исходника."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(artifact_bytes(content, digest))
+    os.replace(tmp_path, path)
+
+
+def artifact_bytes(content, digest):
+    artifact = {'format': ARTIFACT_FORMAT, 'source_sha256': digest, 'content': content}
+    return pickle.dumps(artifact, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def parse_artifact(data, digest=None):
+    """Возвращает модель из байтов артефакта или None, если формат другой.
+
+    digest - sha256 JSON, из которого должен быть собран артефакт
+    (None - не проверять, как для артефакта внутри zipapp).
+    """
+    try:
+        artifact = pickle.loads(data)
+    except (pickle.UnpicklingError, EOFError, AttributeError, ImportError, ValueError):
+        return None
+    if not isinstance(artifact, dict) or artifact.get('format') != ARTIFACT_FORMAT:
+        return None
+    if digest is not None and artifact.get('source_sha256') != digest:
+        return None
+    return artifact['content']
+
+
+def read_artifact(path, digest):
+    """Возвращает модель из артефакта, если он собран из тех же байтов JSON."""
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+    except OSError:
+        return None
+    return parse_artifact(data, digest)
+
+
+def load_embedded_content():
+    """Модель из пакета artix_data внутри zipapp; None, если его нет.
+
+    Артефакт читается прямо из архива, без распаковки на диск: через
+    get_data() загрузчика пакета (zipimporter), а если его нет - через
+    importlib.resources. Сам importlib.resources тянет pathlib, zipfile и
+    tempfile и заметно удлиняет холодный запуск.
+    """
+    try:
+        import importlib
+        package = importlib.import_module(EMBEDDED_PACKAGE)
+        loader = package.__spec__.loader
+        if hasattr(loader, 'get_data'):
+            data = loader.get_data(os.path.join(os.path.dirname(package.__file__), EMBEDDED_ARTIFACT))
+        else:
+            from importlib import resources
+            data = resources.read_binary(EMBEDDED_PACKAGE, EMBEDDED_ARTIFACT)
+    except (ImportError, OSError):
+        return None
+    return parse_artifact(data)
+
+
+def load_content(path):
+    """Загружает контент: из артефакта, если он актуален, иначе из JSON с проверкой."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    digest = source_digest(data)
+    content = read_artifact(compiled_path(path), digest)
+    if content is not None:
+        return content
+    content, _ = compile_content(data)
+    return content
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Проверка и сборка учебного контента")
+    parser.add_argument("--data", default=os.path.join(APP_DIR, "training_data.json"),
+                        help="путь к training_data.json")
+    parser.add_argument("--output", help="путь к артефакту (по умолчанию рядом с JSON)")
+    parser.add_argument("--jobs", type=int, help="число процессов проверки")
+    parser.add_argument("--check", action="store_true", help="только проверить, без артефакта")
+    args = parser.parse_args()
+
+    with open(args.data, 'rb') as f:
+        data = f.read()
+    try:
+        content, issues = compile_content(data, args.jobs)
+    except ContentValidationError as e:
+        content, issues = None, e.issues
+    except ValueError as e:
+        sys.exit(f"Неверный формат JSON в {args.data}: {e}")
+
+    for issue in issues:
+        print(issue)
+    if content is None:
+        sys.exit(f"❌ Контент не прошел проверку: {len([i for i in issues if i.severity == Issue.ERROR])} ошибок")
+
+    print(f"✅ Контент корректен: {len(content.modules)} модулей, {content.task_count} заданий, "
+          f"{sum(len(t.questions) for t in content.tests)} вопросов, {len(content.scenarios)} сценариев")
+    if not args.check:
+        output = args.output or compiled_path(args.data)
+        write_artifact(content, source_digest(data), output)
+        print(f"Артефакт записан в {output}")
+
+
+if __name__ == "__main__":
+    main()
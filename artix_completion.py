@@ -0,0 +1,273 @@
+"""
+Автодополнение и подсказки для полей ввода команд.
+
+CompletionIndex строится один раз по контенту:
+- префиксные деревья (trie) имен команд и флагов из решений и блоков params
+  для автодополнения по Tab через readline;
+- BK-дерево нормализованных решений для подсказки "возможно, вы имели в
+  виду" по ближайшей известной команде (расстояние Левенштейна).
+"""
+
+import re
+
+# Разделители команд в конвейерах и списках
+_SEGMENT_SPLIT = re.compile(r'\|\||&&|[|;&]')
+_FLAG_PATTERN = re.compile(r'(?<![\w-])(--?[A-Za-z][\w-]*)')
+_COMMAND_NAME_PATTERN = re.compile(r'^[A-Za-z][\w.+-]*$')
+_ANSI_PATTERN = re.compile(r'(\033\[[0-9;]*m)')
+
+# Предел выдачи автодополнения, чтобы Tab по пустой строке не выводил все
+COMPLETION_LIMIT = 50
+
+
+def normalize_command(command):
+    """Нормализация ответа так же, как в check_answer: регистр и пробелы."""
+    return ' '.join(command.lower().split())
+
+
+def levenshtein(a, b):
+    """Расстояние Левенштейна между двумя строками.
+
+    Битово-параллельный алгоритм Майерса (в варианте Хиррё): столбец
+    матрицы расстояний хранится в двух целых числах, поэтому на каждый
+    символ второй строки приходится константное число операций.
+    """
+    if len(a) < len(b):
+        a, b = b, a
+    if not b:
+        return len(a)
+    # Битовые маски позиций символов короткой строки
+    peq = {}
+    for i, char in enumerate(b):
+        peq[char] = peq.get(char, 0) | (1 << i)
+    mask = (1 << len(b)) - 1
+    last = 1 << (len(b) - 1)
+    pv, mv, score = mask, 0, len(b)
+    for char in a:
+        eq = peq.get(char, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | (~(xh | pv) & mask)
+        mh = pv & xh
+        if ph & last:
+            score += 1
+        elif mh & last:
+            score -= 1
+        ph = ((ph << 1) | 1) & mask
+        mh = (mh << 1) & mask
+        pv = mh | (~(xv | ph) & mask)
+        mv = ph & xv
+    return score
+
+
+class _TrieNode:
+    __slots__ = ('children', 'terminal')
+
+    def __init__(self):
+        self.children = {}
+        self.terminal = False
+
+
+class PrefixTrie:
+    """Префиксное дерево слов для автодополнения."""
+
+    def __init__(self, words=()):
+        self.root = _TrieNode()
+        self.size = 0
+        for word in words:
+            self.add(word)
+
+    def add(self, word):
+        node = self.root
+        for char in word:
+            node = node.children.setdefault(char, _TrieNode())
+        if not node.terminal:
+            node.terminal = True
+            self.size += 1
+
+    def complete(self, prefix, limit=COMPLETION_LIMIT):
+        """Возвращает до limit слов с заданным префиксом в алфавитном порядке."""
+        node = self.root
+        for char in prefix:
+            node = node.children.get(char)
+            if node is None:
+                return []
+        result = []
+        stack = [(node, prefix)]
+        while stack and len(result) < limit:
+            node, word = stack.pop()
+            if node.terminal:
+                result.append(word)
+            # В стек в обратном порядке, чтобы снимать в алфавитном
+            for char in sorted(node.children, reverse=True):
+                stack.append((node.children[char], word + char))
+        return result
+
+
+class BKTree:
+    """BK-дерево для поиска ближайшей строки по расстоянию Левенштейна."""
+
+    def __init__(self, words=()):
+        self.root = None
+        for word in words:
+            self.add(word)
+
+    def add(self, word):
+        if self.root is None:
+            self.root = (word, {})
+            return
+        node = self.root
+        while True:
+            distance = levenshtein(word, node[0])
+            if distance == 0:
+                return
+            child = node[1].get(distance)
+            if child is None:
+                node[1][distance] = (word, {})
+                return
+            node = child
+
+    def closest(self, word, max_distance):
+        """Возвращает (расстояние, строка) ближайшего элемента или None."""
+        if self.root is None:
+            return None
+        best = None
+        stack = [self.root]
+        while stack:
+            node_word, children = stack.pop()
+            distance = levenshtein(word, node_word)
+            if distance <= max_distance and (best is None or distance < best[0]):
+                best = (distance, node_word)
+                max_distance = distance
+            for child_distance, child in children.items():
+                if distance - max_distance <= child_distance <= distance + max_distance:
+                    stack.append(child)
+        return best
+
+
+def _solution_tokens(solution):
+    """Имена команд (первое слово сегмента конвейера) и флаги из решения."""
+    commands, flags = set(), set()
+    for segment in _SEGMENT_SPLIT.split(solution):
+        words = segment.split()
+        # Пропускаем присваивания переменных перед командой (USER=... cmd)
+        while words and '=' in words[0] and not words[0].startswith('-'):
+            words.pop(0)
+        if words and _COMMAND_NAME_PATTERN.match(words[0]):
+            commands.add(words[0])
+        flags.update(word for word in words[1:] if _FLAG_PATTERN.fullmatch(word))
+    return commands, flags
+
+
+def suggestion_threshold(answer):
+    """Допустимое число правок для подсказки: около четверти длины ответа."""
+    return min(6, max(1, len(answer) // 4))
+
+
+class CompletionIndex:
+    """Индексы автодополнения и подсказок, построенные по контенту."""
+
+    def __init__(self, content):
+        commands, flags, solutions = set(), set(), set()
+        for module in content.modules:
+            for command in module.commands:
+                flags.update(_FLAG_PATTERN.findall(command.params))
+                for task in command.practice:
+                    solutions.add(task.solution)
+        for scenario in content.scenarios:
+            solutions.update(step.solution for step in scenario.steps)
+        for solution in solutions:
+            solution_commands, solution_flags = _solution_tokens(solution)
+            commands.update(solution_commands)
+            flags.update(solution_flags)
+
+        self.commands = PrefixTrie(sorted(commands))
+        self.flags = PrefixTrie(sorted(flags))
+        self.solutions = BKTree(sorted({normalize_command(s) for s in solutions}))
+
+    def complete(self, text):
+        """Варианты дополнения слова: флаги для '-...', иначе имена команд."""
+        trie = self.flags if text.startswith('-') else self.commands
+        return trie.complete(text)
+
+    def closest(self, answer):
+        """Ближайшее известное решение (нормализованное) или None."""
+        answer = normalize_command(answer)
+        if not answer:
+            return None
+        found = self.solutions.closest(answer, suggestion_threshold(answer))
+        return found[1] if found else None
+
+
+# --- ИНТЕГРАЦИЯ С READLINE ---
+
+try:
+    import readline
+except ImportError:  # Windows без pyreadline
+    readline = None
+
+_SESSION_READY = False
+
+# Сколько последних команд сессии держать в истории
+HISTORY_LIMIT = 200
+
+
+def start_session():
+    """Настраивает readline и очищает общую историю ввода."""
+    global _SESSION_READY
+    if readline is None:
+        return
+    readline.clear_history()
+    # В историю попадают только ответы-команды, а не выбор пунктов меню
+    readline.set_auto_history(False)
+    readline.parse_and_bind('tab: complete')
+    # '-' не разделитель, чтобы дополнять флаги целиком
+    readline.set_completer_delims(' \t\n|;&<>()')
+    _SESSION_READY = True
+
+
+def _readline_prompt(prompt):
+    """Оборачивает ANSI-коды в \\001...\\002, чтобы readline верно считал длину строки."""
+    return _ANSI_PATTERN.sub('\001\\1\002', prompt)
+
+
+def read_command(prompt, index, history=None):
+    """Читает команду с историей сессии и автодополнением по Tab.
+
+    Args:
+        prompt (str): Приглашение (может содержать цветовые коды)
+        index (CompletionIndex): Индекс для автодополнения
+        history (list): История команд сессии (Session.history). История
+            readline общая для процесса, поэтому перед вводом в нее
+            загружается история именно этой сессии; None - общая история.
+    """
+    if readline is None:
+        answer = input(prompt)
+        _remember(history, answer)
+        return answer
+    if not _SESSION_READY:
+        start_session()
+    if history is not None:
+        readline.clear_history()
+        for line in history:
+            readline.add_history(line)
+
+    def completer(text, state):
+        matches = index.complete(text)
+        return matches[state] if state < len(matches) else None
+
+    readline.set_completer(completer)
+    try:
+        answer = input(_readline_prompt(prompt))
+    finally:
+        readline.set_completer(None)
+    if answer.strip():
+        readline.add_history(answer)
+        _remember(history, answer)
+    return answer
+
+
+def _remember(history, answer):
+    if history is not None and answer.strip():
+        history.append(answer)
+        del history[:-HISTORY_LIMIT]
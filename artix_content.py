@@ -0,0 +1,403 @@
+"""
+Модель учебного контента тренажера.
+
+training_data.json один раз при загрузке превращается в дерево компактных
+объектов со __slots__: повторяющиеся строки интернируются, дочерние
+коллекции хранятся в кортежах, а для выбора по номеру строятся индексы.
+
+diff_content() сравнивает две версии контента по стабильным ключам, чтобы
+при горячей перезагрузке сбрасывать только затронутые производные данные.
+content_fingerprint() - хеш модели, версия контента для пакетов обновлений.
+"""
+
+import hashlib
+import json
+import sys
+
+_intern = sys.intern
+
+
+def _intern_opt(value):
+    """Интернирует строку, пропуская None."""
+    return _intern(value) if isinstance(value, str) else value
+
+
+class _Record:
+    """База объектов контента: сравнение по значениям полей.
+
+    В _children перечислены поля с дочерними коллекциями и индексами;
+    own_fields() их не включает, так что изменение задания не считается
+    изменением самой команды.
+    """
+    __slots__ = ()
+    _children = ()
+
+    def own_fields(self):
+        return tuple(getattr(self, name) for name in self.__slots__ if name not in self._children)
+
+    def __eq__(self, other):
+        if type(self) is not type(other):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.own_fields()[0]!r})"
+
+
+class ErrorSimulation(_Record):
+    """Типичная ошибка пользователя и подсказка к ней."""
+    __slots__ = ('wrong_input', 'message')
+
+    def __init__(self, wrong_input, message):
+        self.wrong_input = wrong_input
+        self.message = message
+
+
+class PracticeTask(_Record):
+    """Практическое задание к команде."""
+    __slots__ = ('task', 'solution', 'explanation', 'difficulty', 'error_simulation')
+
+    def __init__(self, task, solution, explanation=None, difficulty=1, error_simulation=()):
+        self.task = task
+        self.solution = solution
+        self.explanation = explanation
+        self.difficulty = difficulty
+        self.error_simulation = error_simulation
+
+
+class Command(_Record):
+    """Команда учебного модуля: теория и практические задания."""
+    __slots__ = ('id', 'name', 'theory', 'when_useful', 'params', 'practice')
+    _children = ('practice',)
+
+    def __init__(self, id, name, theory, when_useful, params, practice):
+        self.id = id
+        self.name = name
+        self.theory = theory
+        self.when_useful = when_useful
+        self.params = params
+        self.practice = practice
+
+
+class Module(_Record):
+    """Учебный модуль с набором команд."""
+    __slots__ = ('id', 'name', 'commands', 'commands_by_id')
+    _children = ('commands', 'commands_by_id')
+
+    def __init__(self, id, name, commands):
+        self.id = id
+        self.name = name
+        self.commands = commands
+        self.commands_by_id = {command.id: command for command in commands}
+
+
+class TestQuestion(_Record):
+    """Вопрос теста с вариантами ответа."""
+    __slots__ = ('question', 'options', 'correct', 'explanation')
+
+    def __init__(self, question, options, correct, explanation):
+        self.question = question
+        self.options = options
+        self.correct = correct
+        self.explanation = explanation
+
+
+class TestLevel(_Record):
+    """Уровень тестирования.
+
+    questions_per_attempt - сколько вопросов банка попадает в одну попытку
+    (None - значение по умолчанию тренажера).
+    """
+    __slots__ = ('level', 'name', 'description', 'difficulty', 'questions_per_attempt', 'questions')
+    _children = ('questions',)
+
+    def __init__(self, level, name, description, difficulty, questions, questions_per_attempt=None):
+        self.level = level
+        self.name = name
+        self.description = description
+        self.difficulty = difficulty
+        self.questions_per_attempt = questions_per_attempt
+        self.questions = questions
+
+
+class ScenarioStep(_Record):
+    """Шаг практического сценария."""
+    __slots__ = ('task', 'solution', 'hint', 'explanation', 'error_simulation')
+
+    def __init__(self, task, solution, hint=None, explanation=None, error_simulation=()):
+        self.task = task
+        self.solution = solution
+        self.hint = hint
+        self.explanation = explanation
+        self.error_simulation = error_simulation
+
+
+class Scenario(_Record):
+    """Многошаговый сценарий.
+
+    key - номер в меню сценариев, id - идентификатор в прогрессе пользователя.
+    """
+    __slots__ = ('key', 'id', 'name', 'description', 'difficulty', 'steps')
+
+    def __init__(self, key, id, name, description, difficulty, steps):
+        self.key = key
+        self.id = id
+        self.name = name
+        self.description = description
+        self.difficulty = difficulty
+        self.steps = steps
+
+
+class Content:
+    """Весь учебный контент с индексами для выбора по номеру.
+
+    version - content_fingerprint() модели (None, если не вычислялся).
+    """
+    __slots__ = ('modules', 'modules_by_id', 'scenarios', 'scenarios_by_key',
+                 'scenarios_by_id', 'tests', 'tests_by_level', 'task_count', 'version')
+
+    def __init__(self, modules, scenarios, tests, version=None):
+        self.modules = modules
+        self.modules_by_id = {module.id: module for module in modules}
+        self.scenarios = scenarios
+        self.scenarios_by_key = {scenario.key: scenario for scenario in scenarios}
+        self.scenarios_by_id = {scenario.id: scenario for scenario in scenarios}
+        self.tests = tests
+        self.tests_by_level = {test.level: test for test in tests}
+        self.task_count = sum(len(command.practice) for module in modules for command in module.commands)
+        self.version = version
+
+
+class ContentValidationError(ValueError):
+    """Контент не прошел проверку artix_compiler; issues - найденные проблемы."""
+
+    def __init__(self, issues):
+        self.issues = issues
+        errors = [issue for issue in issues if issue.severity == 'error']
+        super().__init__(f"{len(errors)} ошибок в контенте, первая: {errors[0]}")
+
+
+# --- ПОСТРОЕНИЕ МОДЕЛИ ИЗ JSON ---
+
+def _build_error_simulation(raw_list):
+    return tuple(
+        ErrorSimulation(_intern(sim['wrong_input']), sim['message'])
+        for sim in raw_list or ()
+    )
+
+
+def build_task(raw):
+    """Строит PracticeTask из словаря training_data.json."""
+    return PracticeTask(
+        raw['task'],
+        _intern(raw['solution']),
+        raw.get('explanation'),
+        raw.get('difficulty', 1),
+        _build_error_simulation(raw.get('error_simulation')),
+    )
+
+
+def build_command(command_id, raw):
+    """Строит Command из словаря training_data.json."""
+    return Command(
+        _intern(command_id),
+        _intern(raw.get('name', f'Команда {command_id}')),
+        raw.get('theory', ''),
+        raw.get('when_useful', ''),
+        raw.get('params', ''),
+        tuple(build_task(task) for task in raw.get('practice', ())),
+    )
+
+
+def build_module(module_id, raw):
+    """Строит Module из словаря training_data.json."""
+    return Module(
+        _intern(module_id),
+        _intern(raw.get('name', f'Модуль {module_id}')),
+        tuple(build_command(cmd_id, cmd) for cmd_id, cmd in raw['commands'].items()),
+    )
+
+
+def build_question(raw):
+    """Строит TestQuestion из словаря training_data.json."""
+    return TestQuestion(
+        raw['question'],
+        tuple(_intern(option) for option in raw['options']),
+        raw['correct'],
+        raw.get('explanation', ''),
+    )
+
+
+def build_test_level(level, raw):
+    """Строит TestLevel из словаря training_data.json."""
+    return TestLevel(
+        _intern(level),
+        _intern_opt(raw.get('name', f'Уровень {level}')),
+        raw.get('description', ''),
+        raw.get('difficulty', 1),
+        tuple(build_question(question) for question in raw.get('questions', ())),
+        raw.get('questions_per_attempt'),
+    )
+
+
+def build_step(raw):
+    """Строит ScenarioStep из словаря training_data.json."""
+    return ScenarioStep(
+        raw['task'],
+        _intern(raw['solution']),
+        raw.get('hint'),
+        raw.get('explanation'),
+        _build_error_simulation(raw.get('error_simulation')),
+    )
+
+
+def build_scenario(key, raw):
+    """Строит Scenario из словаря training_data.json."""
+    return Scenario(
+        _intern(key),
+        _intern(raw.get('id', key)),
+        _intern_opt(raw['name']),
+        raw.get('description', ''),
+        raw.get('difficulty', 1),
+        tuple(build_step(step) for step in raw.get('steps', ())),
+    )
+
+
+def is_module_entry(value):
+    """Отличает учебный модуль от служебных секций (tests, scenarios)."""
+    return isinstance(value, dict) and 'commands' in value
+
+
+def build_content(raw):
+    """Строит Content из разобранного training_data.json."""
+    modules = tuple(
+        build_module(module_id, module)
+        for module_id, module in raw.items()
+        if is_module_entry(module)
+    )
+    scenarios = tuple(
+        build_scenario(key, scenario)
+        for key, scenario in raw.get('scenarios', {}).items()
+    )
+    tests = tuple(
+        build_test_level(level, test)
+        for level, test in raw.get('tests', {}).items()
+    )
+    return Content(modules, scenarios, tests)
+
+
+# --- СРАВНЕНИЕ ВЕРСИЙ КОНТЕНТА ---
+
+class ChangeSet:
+    """Ключи добавленных, удаленных и измененных элементов одного вида."""
+    __slots__ = ('added', 'removed', 'changed')
+
+    def __init__(self, added=(), removed=(), changed=()):
+        self.added = tuple(added)
+        self.removed = tuple(removed)
+        self.changed = tuple(changed)
+
+    def __bool__(self):
+        return bool(self.added or self.removed or self.changed)
+
+    def keys(self):
+        return self.added + self.removed + self.changed
+
+
+def _diff_items(old_items, new_items):
+    """Сравнивает два словаря {ключ: объект} по собственным полям объектов."""
+    added = [key for key in new_items if key not in old_items]
+    removed = [key for key in old_items if key not in new_items]
+    changed = [
+        key for key, item in new_items.items()
+        if key in old_items and old_items[key].own_fields() != item.own_fields()
+    ]
+    return ChangeSet(added, removed, changed)
+
+
+def _content_items(content):
+    """Раскладывает контент на словари {стабильный ключ: объект} по видам."""
+    items = {kind: {} for kind in ContentDiff.KINDS}
+    for module in content.modules:
+        items['modules'][module.id] = module
+        for command in module.commands:
+            items['commands'][(module.id, command.id)] = command
+            for task in command.practice:
+                items['tasks'][(module.id, command.id, task.task)] = task
+    for test in content.tests:
+        items['tests'][test.level] = test
+        for question in test.questions:
+            items['questions'][(test.level, question.question)] = question
+    for scenario in content.scenarios:
+        items['scenarios'][scenario.key] = scenario
+    return items
+
+
+class ContentDiff:
+    """Структурная разница между двумя версиями контента.
+
+    Ключи: модуль - id, команда - (модуль, команда), задание -
+    (модуль, команда, текст задания), тест - уровень, вопрос -
+    (уровень, текст вопроса), сценарий - номер в меню.
+    """
+    KINDS = ('modules', 'commands', 'tasks', 'tests', 'questions', 'scenarios')
+    __slots__ = KINDS
+
+    def __init__(self, **changes):
+        for kind in self.KINDS:
+            setattr(self, kind, changes.get(kind, ChangeSet()))
+
+    def __bool__(self):
+        return any(getattr(self, kind) for kind in self.KINDS)
+
+    def affected_modules(self):
+        """Id модулей, у которых изменилось что-либо, включая команды и задания."""
+        modules = set(self.modules.keys())
+        modules.update(key[0] for key in self.commands.keys())
+        modules.update(key[0] for key in self.tasks.keys())
+        return modules
+
+    def affected_tests(self):
+        """Уровни тестов, у которых изменились описание или вопросы."""
+        levels = set(self.tests.keys())
+        levels.update(key[0] for key in self.questions.keys())
+        return levels
+
+    def summary(self):
+        """Краткое описание изменений для лога."""
+        parts = []
+        for kind in self.KINDS:
+            changes = getattr(self, kind)
+            if changes:
+                parts.append(f"{kind}: +{len(changes.added)} -{len(changes.removed)} ~{len(changes.changed)}")
+        return ', '.join(parts) or 'без изменений'
+
+
+def _canonical(value):
+    if isinstance(value, _Record):
+        # Индексы *_by_id строятся из дочерних кортежей и в версию не входят
+        return [type(value).__name__] + [
+            _canonical(getattr(value, name)) for name in value.__slots__ if not name.endswith('_by_id')
+        ]
+    if isinstance(value, tuple):
+        return [_canonical(item) for item in value]
+    return value
+
+
+def content_fingerprint(content):
+    """sha256 канонического представления модели (порядок элементов учитывается)."""
+    canonical = [_canonical(content.modules), _canonical(content.tests), _canonical(content.scenarios)]
+    data = json.dumps(canonical, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+
+def diff_content(old, new):
+    """Возвращает ContentDiff между двумя версиями контента."""
+    old_items = _content_items(old)
+    new_items = _content_items(new)
+    return ContentDiff(**{
+        kind: _diff_items(old_items[kind], new_items[kind])
+        for kind in ContentDiff.KINDS
+    })
@@ -0,0 +1,411 @@
+"""
+Живая лента событий прогресса для преподавателя.
+
+Тренажеры отправляют компактные JSON-события датаграммами в локальный
+Unix-сокет. Отправка идет из фонового потока через ограниченную очередь:
+если очередь переполнена или брокер не запущен, событие просто
+отбрасывается, и приглашения ввода у обучающихся никогда не ждут сети.
+
+Брокер принимает события и рассылает их подписчикам (панелям
+преподавателя). Панель хранит текущее состояние каждого обучающегося
+в памяти и перерисовывает таблицу.
+
+Сокет лежит в личном каталоге пользователя ($XDG_RUNTIME_DIR или
+artix-<uid> с правами 0700 во временном каталоге) и доступен только ему
+(0600): чужие учетные записи не могут ни подделать события, ни
+подписаться на ленту. Если обучающиеся работают под своими учетными
+записями, всем (и преподавателю) задается общая группа ARTIX_FEED_GROUP:
+тогда сокет лежит в общем каталоге artix-feed-<группа> (02770) и открыт
+группе (0660). Каталог можно задать явно через ARTIX_FEED_DIR.
+
+Запуск:
+    python artix_feed.py broker      # только брокер
+    python artix_feed.py dashboard   # панель (поднимает брокер, если его нет)
+"""
+
+import errno
+import json
+import os
+import queue
+import socket
+import stat
+import sys
+import tempfile
+import threading
+import time
+
+
+
+# Группа Unix преподавателя и обучающихся (имя или gid); без нее лента
+# работает только в пределах одной учетной записи
+FEED_GROUP = os.getenv("ARTIX_FEED_GROUP")
+FEED_DIR = os.getenv("ARTIX_FEED_DIR")
+
+
+def runtime_dir():
+    """Каталог для сокетов.
+
+    ARTIX_FEED_DIR; с группой ленты - общий artix-feed-<группа> во
+    временном каталоге, иначе личный $XDG_RUNTIME_DIR или artix-<uid>.
+    """
+    if FEED_DIR:
+        return FEED_DIR
+    if FEED_GROUP:
+        return os.path.join(tempfile.gettempdir(), f"artix-feed-{FEED_GROUP}")
+    xdg = os.getenv("XDG_RUNTIME_DIR")
+    if xdg and os.path.isdir(xdg):
+        return xdg
+    user = os.getuid() if hasattr(os, 'getuid') else os.getenv("USERNAME", "user")
+    return os.path.join(tempfile.gettempdir(), f"artix-{user}")
+
+
+FEED_SOCKET = os.getenv("ARTIX_FEED_SOCKET") or os.path.join(runtime_dir(), "artix_training_feed.sock")
+FEED_QUEUE_SIZE = 256
+MAX_DATAGRAM = 8192
+
+# Подписчик повторяет подписку, чтобы пережить перезапуск брокера
+RESUBSCRIBE_SECONDS = 5.0
+
+SUBSCRIBE = b"SUB"
+UNSUBSCRIBE = b"UNSUB"
+
+
+def feed_available():
+    """Unix-сокеты есть не везде (например, в старых сборках Windows)."""
+    return hasattr(socket, 'AF_UNIX')
+
+
+def encode_event(event):
+    return json.dumps(event, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+# --- ОТПРАВКА СОБЫТИЙ ---
+
+class EventPublisher:
+    """Неблокирующая отправка событий: очередь с отбрасыванием при переполнении."""
+
+    def __init__(self, path=FEED_SOCKET, maxsize=FEED_QUEUE_SIZE):
+        self.path = path
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize)
+        self._thread = threading.Thread(target=self._run, name="feed-publisher", daemon=True)
+        self._thread.start()
+
+    def publish(self, event):
+        """Ставит событие в очередь; никогда не блокирует вызывающего."""
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self, timeout=0.2):
+        """Дает фоновому потоку дослать очередь перед выходом из программы."""
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def _run(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        sock.setblocking(False)
+        while True:
+            event = self._queue.get()
+            try:
+                sock.sendto(encode_event(event), self.path)
+            except OSError:
+                # Брокер не запущен или его буфер полон - лента не обязательна
+                self.dropped += 1
+            finally:
+                self._queue.task_done()
+
+
+# --- БРОКЕР ---
+
+class FeedBroker:
+    """Принимает события от тренажеров и рассылает их подписчикам."""
+
+    def __init__(self, path=FEED_SOCKET):
+        self.path = path
+        self.subscribers = set()
+        self.sock = _bind_broker_socket(path)
+        # Рассылка - через отдельный неблокирующий сокет: таймаут приема
+        # на self.sock распространяется и на sendto
+        self.send_sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self.send_sock.setblocking(False)
+
+    def serve_forever(self, stop_event=None):
+        self.sock.settimeout(1.0)
+        try:
+            while stop_event is None or not stop_event.is_set():
+                try:
+                    data, address = self.sock.recvfrom(MAX_DATAGRAM)
+                except socket.timeout:
+                    continue
+                if data == SUBSCRIBE and address:
+                    self.subscribers.add(address)
+                elif data == UNSUBSCRIBE:
+                    self.subscribers.discard(address)
+                else:
+                    self._fan_out(data)
+        finally:
+            self.close()
+
+    def _fan_out(self, data):
+        for address in list(self.subscribers):
+            try:
+                self.send_sock.sendto(data, address)
+            except BlockingIOError:
+                # Медленный подписчик теряет событие, но не тормозит остальных
+                pass
+            except OSError:
+                # Подписчик закрыл сокет
+                self.subscribers.discard(address)
+
+    def close(self):
+        self.sock.close()
+        self.send_sock.close()
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def _private_dir(directory):
+    """Создает каталог с правами 0700 и проверяет, что он наш и закрыт для других."""
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    st = os.lstat(directory)
+    if (not stat.S_ISDIR(st.st_mode) or (hasattr(os, 'getuid') and st.st_uid != os.getuid())
+            or stat.S_IMODE(st.st_mode) & 0o077):
+        raise PermissionError(errno.EACCES, "каталог сокета ленты доступен другим пользователям", directory)
+
+
+def feed_gid(group=FEED_GROUP):
+    """gid группы ленты по имени или номеру."""
+    if group.isdigit():
+        return int(group)
+    import grp
+    try:
+        return grp.getgrnam(group).gr_gid
+    except KeyError:
+        raise PermissionError(errno.EINVAL, f"нет группы {group} (ARTIX_FEED_GROUP)") from None
+
+
+def _group_dir(directory, gid):
+    """Создает общий каталог группы (02770) и проверяет, что он закрыт для остальных."""
+    try:
+        os.mkdir(directory, 0o770)
+    except FileExistsError:
+        pass
+    else:
+        os.chown(directory, -1, gid)
+        # setgid: сокет и файлы подписчиков получают группу каталога
+        os.chmod(directory, 0o2770)
+    st = os.lstat(directory)
+    if not stat.S_ISDIR(st.st_mode) or st.st_gid != gid or stat.S_IMODE(st.st_mode) & 0o007:
+        raise PermissionError(errno.EACCES, "каталог сокета ленты не принадлежит группе ленты "
+                              "или доступен остальным", directory)
+
+
+def _bind_broker_socket(path):
+    """Создает сокет брокера, убирая файл сокета от упавшего брокера."""
+    directory = os.path.dirname(os.path.abspath(path))
+    gid = feed_gid() if FEED_GROUP else None
+    if path == FEED_SOCKET and not os.getenv("ARTIX_FEED_SOCKET"):
+        if gid is None:
+            _private_dir(directory)
+        else:
+            _group_dir(directory, gid)
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+    try:
+        sock.bind(path)
+    except OSError as e:
+        if e.errno != errno.EADDRINUSE or broker_running(path):
+            sock.close()
+            raise
+        os.unlink(path)
+        sock.bind(path)
+    sock.setblocking(False)
+    if gid is None:
+        os.chmod(path, 0o600)
+    else:
+        os.chown(path, -1, gid)
+        os.chmod(path, 0o660)
+    return sock
+
+
+def broker_running(path=FEED_SOCKET):
+    """Проверяет, принимает ли кто-то датаграммы на сокете брокера."""
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+    try:
+        probe.connect(path)
+        return True
+    except OSError:
+        return False
+    finally:
+        probe.close()
+
+
+# --- ПАНЕЛЬ ПРЕПОДАВАТЕЛЯ ---
+
+class TraineeStatus:
+    """Текущее состояние одного обучающегося по событиям ленты."""
+    __slots__ = ('user', 'activity', 'tasks_done', 'correct', 'attempts',
+                 'last_test', 'achievements', 'last_seen', 'online')
+
+    def __init__(self, user):
+        self.user = user
+        self.activity = ''
+        self.tasks_done = 0
+        self.correct = 0
+        self.attempts = 0
+        self.last_test = ''
+        self.achievements = 0
+        self.last_seen = 0.0
+        self.online = True
+
+
+class Dashboard:
+    """Собирает состояние обучающихся из потока событий."""
+
+    def __init__(self, path=FEED_SOCKET):
+        self.path = path
+        self.trainees = {}
+
+    def apply(self, event):
+        user = event.get('u') or '?'
+        status = self.trainees.get(user)
+        if status is None:
+            status = self.trainees[user] = TraineeStatus(user)
+        status.last_seen = event.get('t', time.time())
+        status.online = True
+        kind = event.get('e')
+
+        if kind == 'login':
+            status.activity = 'вошел'
+        elif kind == 'logout':
+            status.activity = 'вышел'
+            status.online = False
+        elif kind == 'answer':
+            status.attempts += 1
+            status.correct += bool(event.get('ok'))
+            status.activity = f"практика: {event.get('cmd', '')}"
+            if event.get('ok'):
+                status.tasks_done += 1
+        elif kind == 'test_answer':
+            status.attempts += 1
+            status.correct += bool(event.get('ok'))
+            status.activity = f"тест {event.get('level')}: вопрос {event.get('q')}"
+        elif kind == 'test_done':
+            status.last_test = f"{event.get('level')}: {event.get('score', 0):.0f}%"
+            status.activity = f"завершил тест {event.get('level')}"
+        elif kind == 'step':
+            status.activity = f"сценарий {event.get('scenario')}: шаг {event.get('step')}"
+            if 'ok' in event:
+                status.attempts += 1
+                status.correct += bool(event.get('ok'))
+        elif kind == 'scenario_done':
+            status.activity = f"завершил сценарий {event.get('scenario')}"
+        elif kind == 'achievement':
+            status.achievements += 1
+            status.activity = f"достижение: {event.get('id')}"
+
+    def render(self, now=None):
+        now = now or time.time()
+        lines = [
+            f"Лента тренажера: {len(self.trainees)} обучающихся ({time.strftime('%H:%M:%S')})",
+            "",
+            f"{'Пользователь':<20} {'Задания':>7} {'Верно':>9} {'Тест':>10} {'Дост.':>5}  {'Давно':>6}  Активность",
+            "-" * 90,
+        ]
+        if not self.trainees:
+            # Частая причина: тренажеры под другими учетными записями ищут другой сокет
+            lines += [
+                f"Событий пока нет. Тренажеры должны писать в {self.path}.",
+                "Если обучающиеся работают под своими учетными записями, задайте всем",
+                "одну группу ARTIX_FEED_GROUP (см. TECHNICAL_DOCS.md, раздел 5).",
+            ]
+        for status in sorted(self.trainees.values(), key=lambda s: s.user.lower()):
+            ago = int(now - status.last_seen)
+            marker = '' if status.online else ' (офлайн)'
+            lines.append(
+                f"{status.user[:20]:<20} {status.tasks_done:>7} {status.correct:>4}/{status.attempts:<4} "
+                f"{status.last_test:>10} {status.achievements:>5}  {ago:>5}с  {status.activity}{marker}"
+            )
+        return '\n'.join(lines)
+
+
+def _subscriber_socket(path):
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+    if sys.platform.startswith('linux'):
+        # Абстрактный адрес: не оставляет файлов
+        sock.bind(f"\0artix-dashboard-{os.getpid()}")
+    else:
+        # Рядом с сокетом брокера, в закрытом для других каталоге
+        sock.bind(os.path.join(os.path.dirname(os.path.abspath(path)), f"artix-dashboard-{os.getpid()}.sock"))
+    return sock
+
+
+def run_dashboard(path=FEED_SOCKET, refresh=1.0):
+    """Подписывается на ленту и перерисовывает таблицу обучающихся."""
+    stop = threading.Event()
+    if not broker_running(path):
+        broker = FeedBroker(path)
+        threading.Thread(target=broker.serve_forever, args=(stop,), name="feed-broker", daemon=True).start()
+
+    sock = _subscriber_socket(path)
+    sock.settimeout(refresh)
+    dashboard = Dashboard(path)
+    last_subscribe = 0.0
+    last_render = 0.0
+    try:
+        while True:
+            now = time.time()
+            if now - last_subscribe >= RESUBSCRIBE_SECONDS:
+                try:
+                    sock.sendto(SUBSCRIBE, path)
+                except OSError:
+                    pass
+                last_subscribe = now
+            try:
+                data = sock.recv(MAX_DATAGRAM)
+                dashboard.apply(json.loads(data.decode('utf-8')))
+            except socket.timeout:
+                pass
+            except (ValueError, UnicodeDecodeError):
+                continue
+            if time.time() - last_render >= refresh:
+                print("\033[H\033[2J" + dashboard.render(), flush=True)
+                last_render = time.time()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        try:
+            sock.sendto(UNSUBSCRIBE, path)
+        except OSError:
+            pass
+        sock.close()
+        stop.set()
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Лента событий тренажера для преподавателя")
+    parser.add_argument("mode", choices=["broker", "dashboard"], help="режим работы")
+    parser.add_argument("--socket", default=FEED_SOCKET, help="путь к Unix-сокету ленты")
+    args = parser.parse_args()
+
+    if not feed_available():
+        sys.exit("Unix-сокеты не поддерживаются на этой платформе")
+    if args.mode == "broker":
+        broker = FeedBroker(args.socket)
+        print(f"Брокер ленты слушает {args.socket}")
+        try:
+            broker.serve_forever()
+        except KeyboardInterrupt:
+            pass
+    else:
+        run_dashboard(args.socket)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+"""
+Ввод одним нажатием клавиши для меню и ответов в тестах.
+
+Пункт меню выбирается сразу по нажатию цифры, без Enter: терминал на
+время чтения переводится в режим cbreak (без построчной буферизации и
+эха, Ctrl+C работает как обычно). Стрелки вверх/вниз перебирают пункты,
+Enter подтверждает выбор, Esc выбирает "Назад". Если пункты не
+различаются по первой цифре (например, "1" и "12"), выбор завершается
+Enter или однозначным префиксом.
+
+Если stdin - не терминал (ввод из файла, скрипты, CI) или задано
+ARTIX_SINGLE_KEY=0, используется прежний построчный ввод через input().
+"""
+
+import os
+import sys
+import time
+
+try:
+    import select
+    import termios
+except ImportError:  # Windows
+    termios = None
+
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
+
+# Выбор пунктов меню одной клавишей; ARTIX_SINGLE_KEY=0 - ввод с Enter
+SINGLE_KEY = os.getenv("ARTIX_SINGLE_KEY", "1") != "0"
+
+# Сколько ждать продолжения escape-последовательности после ESC (секунды)
+ESCAPE_TIMEOUT = 0.1
+
+UP, DOWN, LEFT, RIGHT = 'up', 'down', 'left', 'right'
+ENTER, ESCAPE, BACKSPACE = 'enter', 'escape', 'backspace'
+PAGE_UP, PAGE_DOWN, HOME, END = 'page_up', 'page_down', 'home', 'end'
+
+_CSI_KEYS = {'A': UP, 'B': DOWN, 'C': RIGHT, 'D': LEFT, 'H': HOME, 'F': END}
+# ESC [ <номер> ~ - клавиши редактирования
+_TILDE_KEYS = {'1': HOME, '7': HOME, '4': END, '8': END, '5': PAGE_UP, '6': PAGE_DOWN}
+_WINDOWS_KEYS = {'H': UP, 'P': DOWN, 'M': RIGHT, 'K': LEFT,
+                 'I': PAGE_UP, 'Q': PAGE_DOWN, 'G': HOME, 'O': END}
+
+BELL = '\a'
+ERASE_TO_END = '\033[K'
+
+
+def terminal_available():
+    """Подключен ли stdin к терминалу, из которого можно читать клавиши."""
+    if termios is None and msvcrt is None:
+        return False
+    try:
+        return sys.stdin.isatty()
+    except (AttributeError, ValueError):
+        return False
+
+
+def keys_available():
+    """Можно ли читать отдельные нажатия клавиш в меню."""
+    return SINGLE_KEY and terminal_available()
+
+
+class _PosixTerminal:
+    """Режим cbreak на время чтения клавиш; при выходе режим восстанавливается."""
+
+    def __init__(self):
+        self.fd = sys.stdin.fileno()
+        self.saved = None
+
+    def __enter__(self):
+        self.saved = termios.tcgetattr(self.fd)
+        mode = termios.tcgetattr(self.fd)
+        mode[3] &= ~(termios.ICANON | termios.ECHO)
+        mode[6][termios.VMIN] = 1
+        mode[6][termios.VTIME] = 0
+        # TCSANOW, а не TCSAFLUSH: клавиши, нажатые заранее, не теряются
+        termios.tcsetattr(self.fd, termios.TCSANOW, mode)
+        return self
+
+    def __exit__(self, *exc_info):
+        termios.tcsetattr(self.fd, termios.TCSANOW, self.saved)
+
+    def _pending(self, timeout):
+        return bool(select.select([self.fd], [], [], timeout)[0])
+
+    def wait(self, timeout):
+        """Ждет нажатия не дольше timeout секунд; True, если оно есть."""
+        return self._pending(timeout)
+
+    def _read_byte(self):
+        data = os.read(self.fd, 1)
+        if not data:
+            raise EOFError
+        return data[0]
+
+    def read_key(self):
+        """Возвращает символ, имя специальной клавиши или None для неизвестных."""
+        byte = self._read_byte()
+        if byte == 0x1b:
+            if not self._pending(ESCAPE_TIMEOUT):
+                return ESCAPE
+            introducer = self._read_byte()
+            if introducer not in (ord('['), ord('O')):
+                return None
+            # Последовательность заканчивается байтом из диапазона 0x40-0x7e
+            params = ''
+            final = self._read_byte()
+            while not 0x40 <= final <= 0x7e:
+                params += chr(final)
+                final = self._read_byte()
+            if final == ord('~'):
+                return _TILDE_KEYS.get(params.split(';')[0])
+            return _CSI_KEYS.get(chr(final))
+        if byte in (0x0a, 0x0d):
+            return ENTER
+        if byte in (0x7f, 0x08):
+            return BACKSPACE
+        if byte == 0x04:  # Ctrl+D, как EOF в input()
+            raise EOFError
+        # Многобайтовый символ UTF-8: длина по старшим битам первого байта
+        length = 1
+        if byte >= 0xf0:
+            length = 4
+        elif byte >= 0xe0:
+            length = 3
+        elif byte >= 0xc0:
+            length = 2
+        data = bytes([byte] + [self._read_byte() for _ in range(length - 1)])
+        return data.decode('utf-8', errors='replace')
+
+
+class _WindowsTerminal:
+    """Консоль Windows уже отдает отдельные нажатия через msvcrt."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+    def wait(self, timeout):
+        deadline = time.monotonic() + timeout
+        while not msvcrt.kbhit():
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.02)
+        return True
+
+    def read_key(self):
+        char = msvcrt.getwch()
+        if char in ('\x00', '\xe0'):
+            return _WINDOWS_KEYS.get(msvcrt.getwch())
+        if char == '\r':
+            return ENTER
+        if char == '\x08':
+            return BACKSPACE
+        if char == '\x1b':
+            return ESCAPE
+        if char == '\x03':
+            raise KeyboardInterrupt
+        if char == '\x1a':
+            raise EOFError
+        return char
+
+
+def key_terminal():
+    """Терминал в режиме чтения клавиш: with key_terminal() as t: t.read_key()."""
+    return _PosixTerminal() if termios is not None else _WindowsTerminal()
+
+
+def _write(text):
+    sys.stdout.write(text)
+    sys.stdout.flush()
+
+
+def read_choice(prompt, choices, back='0'):
+    """Читает выбор пункта меню.
+
+    Args:
+        prompt (str): Приглашение (может содержать цветовые коды)
+        choices (list): Допустимые ответы в порядке пунктов меню
+        back (str): Ответ, который выбирается по Esc
+
+    В построчном режиме возвращает введенную строку как есть, поэтому
+    вызывающий код по-прежнему сам сообщает о неверном выборе.
+    """
+    if not keys_available():
+        return input(prompt)
+
+    choices = list(choices)
+    _write(prompt)
+    typed, selected = '', None
+    with key_terminal() as terminal:
+        while True:
+            key = terminal.read_key()
+            shown, done = typed, False
+            if key in (UP, DOWN):
+                if selected is None:
+                    selected = 0 if key == DOWN else len(choices) - 1
+                else:
+                    selected = (selected + (1 if key == DOWN else -1)) % len(choices)
+                typed = choices[selected]
+            elif key == ENTER:
+                done = typed in choices
+                if not done:
+                    _write(BELL)
+            elif key == ESCAPE and back in choices:
+                typed, done = back, True
+            elif key == BACKSPACE:
+                typed, selected = typed[:-1], None
+            elif key and len(key) == 1 and key.isprintable():
+                candidate = typed + key
+                if not any(choice.startswith(candidate) for choice in choices):
+                    # Нажатие, не продолжающее набранное, начинает выбор заново
+                    candidate = key
+                if not any(choice.startswith(candidate) for choice in choices):
+                    _write(BELL)
+                    continue
+                typed, selected = candidate, None
+                longer = any(choice != typed and choice.startswith(typed) for choice in choices)
+                done = typed in choices and not longer
+            if typed != shown:
+                _write('\b' * len(shown) + ERASE_TO_END + typed)
+            if done:
+                break
+    _write('\n')
+    return typed
+
+
+def pause(line_prompt, key_prompt):
+    """Ждет нажатия Enter (построчный режим) или любой клавиши."""
+    if not keys_available():
+        input(line_prompt)
+        return
+    _write(key_prompt)
+    with key_terminal() as terminal:
+        terminal.read_key()
+    _write('\n')
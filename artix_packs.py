@@ -0,0 +1,384 @@
+"""
+Пакеты обновлений учебного контента.
+
+Вместо рассылки всего training_data.json на каждый терминал можно
+отправить небольшой пакет изменений (*.delta.json): операции add, replace
+и remove над модулями, командами, заданиями, уровнями тестов, вопросами и
+сценариями по их стабильным ключам (как в diff_content):
+
+    {"format": 1, "base": "<версия>", "version": "<версия>",
+     "ops_sha256": "<sha256 операций>", "ops": [
+        {"op": "add", "kind": "tasks", "key": ["1", "2", "Текст задания"],
+         "after": "Текст предыдущего задания", "value": {...}}]}
+
+Версия - content_fingerprint() модели. Пакеты образуют цепочку по хешам:
+пакет применяется, только если его base совпадает с текущей версией, хеш
+операций сходится, а модель после применения дает ровно version. Загрузчик
+берет собранную базовую модель (артефакт artix_compiler.py или встроенную
+в zipapp) и по цепочке применяет подходящие пакеты из CONTENT_PACKS_DIR;
+неизмененные модули и команды переиспользуются как есть.
+
+Запуск:
+    python artix_packs.py diff old.json new.json   # пакет в content_packs/
+    python artix_packs.py status                   # версия и примененные пакеты
+"""
+
+import copy
+import hashlib
+import json
+import os
+import sys
+
+from artix_content import (Content, Module, build_command, build_module, build_question,
+                           build_scenario, build_task, build_test_level, content_fingerprint,
+                           is_module_entry)
+from artix_paths import APP_DIR, CONTENT_PACKS_DIR
+
+PACK_FORMAT = 1
+PACK_SUFFIX = '.delta.json'
+
+# Порядок видов важен: родители добавляются раньше своих элементов
+KINDS = ('modules', 'commands', 'tasks', 'tests', 'questions', 'scenarios')
+_PARENT = {'commands': 'modules', 'tasks': 'commands', 'questions': 'tests'}
+# Поле родителя с дочерними элементами
+_CHILDREN = {'modules': 'commands', 'commands': 'practice', 'tests': 'questions'}
+# Длина ключа каждого вида: путь от верхнего уровня
+_KEY_LENGTH = {'modules': 1, 'commands': 2, 'tasks': 3, 'tests': 1, 'questions': 2, 'scenarios': 1}
+# Поле элемента, по которому он адресуется внутри родителя
+_KEY_FIELD = {'modules': 'id', 'commands': 'id', 'tasks': 'task', 'tests': 'level',
+              'questions': 'question', 'scenarios': 'key'}
+
+
+class PackError(ValueError):
+    """Пакет не подходит к текущей версии контента или поврежден."""
+
+
+def ops_digest(ops):
+    data = json.dumps(ops, ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+
+def _item_key(kind, item):
+    return getattr(item, _KEY_FIELD[kind])
+
+
+def _with_children(kind, parent, children):
+    if kind == 'modules':
+        # Индекс commands_by_id строится в конструкторе
+        return Module(parent.id, parent.name, children)
+    parent = copy.copy(parent)
+    setattr(parent, _CHILDREN[kind], children)
+    return parent
+
+
+def _build(kind, key, raw, old):
+    """Строит элемент из JSON операции; у родителей сохраняются прежние дети."""
+    if not isinstance(raw, dict):
+        raise PackError(f"{kind} {key}: значение должно быть объектом")
+    try:
+        if kind == 'modules':
+            item = build_module(key[-1], dict(raw, commands={}))
+        elif kind == 'commands':
+            item = build_command(key[-1], dict(raw, practice=[]))
+        elif kind == 'tasks':
+            item = build_task(raw)
+        elif kind == 'tests':
+            item = build_test_level(key[-1], dict(raw, questions=[]))
+        elif kind == 'questions':
+            item = build_question(raw)
+        else:
+            item = build_scenario(key[-1], raw)
+    except (KeyError, TypeError, AttributeError) as e:
+        raise PackError(f"{kind} {key}: неполное значение ({e})") from None
+    if old is not None and kind in _CHILDREN:
+        item = _with_children(kind, item, getattr(old, _CHILDREN[kind]))
+    if _item_key(kind, item) != key[-1]:
+        raise PackError(f"{kind} {key}: ключ не совпадает со значением")
+    return item
+
+
+def _index(kind, items, name, key):
+    for i, item in enumerate(items):
+        if _item_key(kind, item) == name:
+            return i
+    raise PackError(f"{kind} {key}: элемент {name!r} не найден")
+
+
+class _Workspace:
+    """Изменяемая копия верхних уровней модели; вложенные записи пересобираются по пути."""
+
+    def __init__(self, content):
+        self.roots = {'modules': list(content.modules), 'tests': list(content.tests),
+                      'scenarios': list(content.scenarios)}
+
+    def children(self, kind, parent):
+        parent_kind = _PARENT.get(kind)
+        if parent_kind is None:
+            return list(self.roots[kind])
+        siblings = self.children(parent_kind, parent[:-1])
+        owner = siblings[_index(parent_kind, siblings, parent[-1], parent)]
+        return list(getattr(owner, _CHILDREN[parent_kind]))
+
+    def store(self, kind, parent, items):
+        parent_kind = _PARENT.get(kind)
+        if parent_kind is None:
+            self.roots[kind] = items
+            return
+        siblings = self.children(parent_kind, parent[:-1])
+        i = _index(parent_kind, siblings, parent[-1], parent)
+        siblings[i] = _with_children(parent_kind, siblings[i], tuple(items))
+        self.store(parent_kind, parent[:-1], siblings)
+
+    def apply(self, op):
+        kind, action = op.get('kind'), op.get('op')
+        key = tuple(op.get('key') or ())
+        if kind not in KINDS or len(key) != _KEY_LENGTH[kind]:
+            raise PackError(f"неверная операция: {kind} {list(key)}")
+        items = self.children(kind, key[:-1])
+        name = key[-1]
+        if action == 'remove':
+            del items[_index(kind, items, name, key)]
+        elif action in ('add', 'replace'):
+            old, position = None, len(items)
+            if action == 'replace':
+                position = _index(kind, items, name, key)
+                old = items.pop(position)
+            elif any(_item_key(kind, item) == name for item in items):
+                raise PackError(f"{kind} {list(key)}: элемент уже есть")
+            if 'after' in op:
+                after = op['after']
+                position = 0 if after is None else _index(kind, items, after, key) + 1
+            items.insert(position, _build(kind, key, op.get('value'), old))
+        else:
+            raise PackError(f"неизвестная операция {action!r}")
+        self.store(kind, key[:-1], items)
+
+    def content(self):
+        return Content(tuple(self.roots['modules']), tuple(self.roots['scenarios']),
+                       tuple(self.roots['tests']))
+
+
+def apply_pack(content, pack):
+    """Применяет пакет к модели и возвращает новую модель с новой версией."""
+    version = content.version or content_fingerprint(content)
+    if pack.get('base') != version:
+        raise PackError("пакет собран для другой версии контента")
+    ops = pack.get('ops')
+    if not isinstance(ops, list) or ops_digest(ops) != pack.get('ops_sha256'):
+        raise PackError("хеш операций не совпадает - пакет поврежден")
+    workspace = _Workspace(content)
+    for op in ops:
+        if not isinstance(op, dict):
+            raise PackError("неверная операция")
+        workspace.apply(op)
+    result = workspace.content()
+    result.version = content_fingerprint(result)
+    if result.version != pack.get('version'):
+        raise PackError("результат не совпал с версией пакета")
+    return result
+
+
+def read_packs(directory=CONTENT_PACKS_DIR):
+    """Возвращает ([(имя файла, пакет)], [проблемы]) для *.delta.json каталога."""
+    packs, problems = [], []
+    try:
+        names = sorted(os.listdir(directory))
+    except (FileNotFoundError, NotADirectoryError):
+        return packs, problems
+    for name in names:
+        if not name.endswith(PACK_SUFFIX):
+            continue
+        try:
+            with open(os.path.join(directory, name), 'r', encoding='utf-8') as f:
+                pack = json.load(f)
+        except (OSError, ValueError) as e:
+            problems.append(f"{name}: {e}")
+            continue
+        if not isinstance(pack, dict) or pack.get('format') != PACK_FORMAT:
+            problems.append(f"{name}: неизвестный формат пакета")
+            continue
+        packs.append((name, pack))
+    return packs, problems
+
+
+def apply_packs(content, directory=CONTENT_PACKS_DIR):
+    """Применяет по цепочке все пакеты, подходящие к версии content.
+
+    Returns:
+        tuple: (модель, имена примененных пакетов, список проблем)
+
+    Пакеты к другим версиям (например, уже вошедшие в новую базу)
+    пропускаются молча. На первом непригодном пакете цепочка
+    останавливается: остается последняя проверенная версия.
+    """
+    packs, problems = read_packs(directory)
+    by_base = {}
+    for name, pack in packs:
+        by_base.setdefault(pack.get('base'), []).append((name, pack))
+    if content.version is None:
+        content.version = content_fingerprint(content)
+    applied = []
+    while content.version in by_base:
+        candidates = by_base.pop(content.version)
+        if len(candidates) > 1:
+            problems.append(f"к версии {content.version[:12]} несколько пакетов, взят {candidates[0][0]}")
+        name, pack = candidates[0]
+        try:
+            content = apply_pack(content, pack)
+        except PackError as e:
+            problems.append(f"{name}: {e}")
+            break
+        applied.append(name)
+    return content, applied, problems
+
+
+# --- СБОРКА ПАКЕТА ---
+
+def _without(raw, field):
+    return {key: value for key, value in raw.items() if key != field}
+
+
+def _raw_items(raw):
+    """Раскладывает JSON на {вид: {ключ: значение без дочерних элементов}} в порядке файла."""
+    items = {kind: {} for kind in KINDS}
+    for module_id, module in raw.items():
+        if not is_module_entry(module):
+            continue
+        items['modules'][(module_id,)] = _without(module, 'commands')
+        for command_id, command in module['commands'].items():
+            items['commands'][(module_id, command_id)] = _without(command, 'practice')
+            for task in command.get('practice', ()):
+                items['tasks'][(module_id, command_id, task['task'])] = task
+    for level, test in raw.get('tests', {}).items():
+        items['tests'][(level,)] = _without(test, 'questions')
+        for question in test.get('questions', ()):
+            items['questions'][(level, question['question'])] = question
+    for key, scenario in raw.get('scenarios', {}).items():
+        items['scenarios'][(key,)] = scenario
+    return items
+
+
+def _group_by_parent(keys):
+    groups = {}
+    for key in keys:
+        groups.setdefault(key[:-1], []).append(key)
+    return groups
+
+
+def _removed_with_parent(kind, key, removed):
+    parent_kind = _PARENT.get(kind)
+    while parent_kind is not None:
+        key = key[:-1]
+        if (parent_kind, key) in removed:
+            return True
+        parent_kind = _PARENT.get(parent_kind)
+    return False
+
+
+def diff_ops(old_raw, new_raw):
+    """Операции пакета, переводящие old_raw в new_raw (разобранные JSON)."""
+    old_items, new_items = _raw_items(old_raw), _raw_items(new_raw)
+    ops, removed = [], set()
+    for kind in KINDS:
+        for key in old_items[kind]:
+            if key not in new_items[kind]:
+                removed.add((kind, key))
+                # Элементы удаленного родителя уходят вместе с ним
+                if not _removed_with_parent(kind, key, removed):
+                    ops.append({'op': 'remove', 'kind': kind, 'key': list(key)})
+
+    for kind in KINDS:
+        old_groups = _group_by_parent(old_items[kind])
+        for parent, keys in _group_by_parent(new_items[kind]).items():
+            old_position = {key: i for i, key in enumerate(old_groups.get(parent, ()))}
+            # Оставшиеся элементы, нарушающие прежний порядок, переставляются
+            moved, last = set(), -1
+            for key in keys:
+                if key in old_position:
+                    if old_position[key] > last:
+                        last = old_position[key]
+                    else:
+                        moved.add(key)
+            for i, key in enumerate(keys):
+                value = new_items[kind][key]
+                after = keys[i - 1][-1] if i else None
+                if key not in old_position:
+                    ops.append({'op': 'add', 'kind': kind, 'key': list(key), 'after': after, 'value': value})
+                elif key in moved:
+                    ops.append({'op': 'replace', 'kind': kind, 'key': list(key), 'after': after, 'value': value})
+                elif value != old_items[kind][key]:
+                    ops.append({'op': 'replace', 'kind': kind, 'key': list(key), 'value': value})
+    return ops
+
+
+def make_pack(old_data, new_data):
+    """Собирает пакет из байтов двух версий training_data.json.
+
+    Новая версия проверяется artix_compiler (ContentValidationError при
+    ошибках), а сам пакет - пробным применением к старой версии.
+    """
+    from artix_compiler import compile_content
+    old_content, _ = compile_content(old_data)
+    new_content, _ = compile_content(new_data)
+    ops = diff_ops(json.loads(old_data.decode('utf-8')), json.loads(new_data.decode('utf-8')))
+    pack = {'format': PACK_FORMAT, 'base': old_content.version, 'version': new_content.version,
+            'ops_sha256': ops_digest(ops), 'ops': ops}
+    apply_pack(old_content, pack)
+    return pack
+
+
+def pack_filename(pack):
+    return f"{pack['base'][:12]}-{pack['version'][:12]}{PACK_SUFFIX}"
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Пакеты обновлений учебного контента")
+    subparsers = parser.add_subparsers(dest="mode", required=True)
+    diff_parser = subparsers.add_parser("diff", help="собрать пакет из двух версий JSON")
+    diff_parser.add_argument("old", help="прежняя версия training_data.json")
+    diff_parser.add_argument("new", help="новая версия training_data.json")
+    diff_parser.add_argument("--output-dir", default=CONTENT_PACKS_DIR, help="каталог пакетов")
+    status_parser = subparsers.add_parser("status", help="версия контента с примененными пакетами")
+    status_parser.add_argument("--data", default=os.path.join(APP_DIR, "training_data.json"),
+                               help="базовый training_data.json")
+    status_parser.add_argument("--packs", default=CONTENT_PACKS_DIR, help="каталог пакетов")
+    args = parser.parse_args()
+
+    from artix_content import ContentValidationError
+    if args.mode == "diff":
+        with open(args.old, 'rb') as f:
+            old_data = f.read()
+        with open(args.new, 'rb') as f:
+            new_data = f.read()
+        try:
+            pack = make_pack(old_data, new_data)
+        except ContentValidationError as e:
+            for issue in e.issues:
+                print(issue)
+            sys.exit("❌ Контент не прошел проверку")
+        if pack['base'] == pack['version']:
+            print("Версии совпадают - пакет не нужен.")
+            return
+        os.makedirs(args.output_dir, exist_ok=True)
+        path = os.path.join(args.output_dir, pack_filename(pack))
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(pack, f, ensure_ascii=False, indent=1)
+        print(f"✅ Пакет {path}: {len(pack['ops'])} операций, {os.path.getsize(path) / 1024:.1f} КБ "
+              f"(полный JSON - {len(new_data) / 1024:.0f} КБ)")
+        return
+
+    from artix_compiler import load_content
+    content = load_content(args.data)
+    print(f"Базовая версия: {content.version[:12]}")
+    content, applied, problems = apply_packs(content, args.packs)
+    for name in applied:
+        print(f"  + {name}")
+    for problem in problems:
+        print(f"  ! {problem}")
+    print(f"Текущая версия: {content.version[:12]}, {content.task_count} заданий")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,331 @@
+"""
+Встроенный постраничный просмотр длинных экранов.
+
+Теория команды и экран прогресса могут быть длиннее окна терминала: на
+маленьких экранах киосков начало уходит за край, а по SSH каждый раз
+передается весь текст. page() раскладывает строки по ширине терминала
+один раз (ANSI-цвета не занимают места, широкие символы - две колонки)
+и выводит только видимое окно, поэтому объем вывода зависит от высоты
+экрана, а не от длины текста.
+
+Клавиши как в less:
+    j, Enter, стрелка вниз      - строка вниз
+    k, стрелка вверх            - строка вверх
+    Пробел, f, PgDn             - страница вниз
+    b, PgUp                     - страница вверх
+    d / u                       - полстраницы вниз / вверх
+    g, Home / G, End            - начало / конец
+    /текст, n / N               - поиск, следующее / предыдущее совпадение
+    q, Esc                      - выход
+
+При изменении размера окна (SIGWINCH) текст раскладывается заново, а
+верхней остается та же строка. Если текст помещается на экран, stdin или
+stdout - не терминал или задано ARTIX_PAGER=0, строки выводятся как есть.
+"""
+
+import os
+import re
+import shutil
+import signal
+import sys
+import threading
+import unicodedata
+
+from artix_keys import (BACKSPACE, DOWN, END, ENTER, ESCAPE, HOME, PAGE_DOWN, PAGE_UP, UP,
+                        key_terminal, terminal_available)
+
+# Встроенный просмотр длинных экранов; ARTIX_PAGER=0 - выводить целиком
+PAGER = os.getenv("ARTIX_PAGER", "1") != "0"
+
+# Как часто проверять размер окна, пока не нажата клавиша (секунды)
+RESIZE_POLL = 0.1
+
+_ANSI = re.compile(r'\033\[[0-9;?]*[A-Za-z]')
+RESET = '\033[0m'
+REVERSE, REVERSE_OFF = '\033[7m', '\033[27m'
+CLEAR = '\033[H\033[2J'
+ERASE_LINE = '\r\033[K'
+
+
+def strip_ansi(text):
+    return _ANSI.sub('', text)
+
+
+def fold(text):
+    """Нижний регистр для поиска без изменения длины строки."""
+    return ''.join(char.lower() if len(char.lower()) == 1 else char for char in text)
+
+
+def char_width(char):
+    """Ширина символа в колонках терминала: 0, 1 или 2."""
+    if unicodedata.combining(char) or unicodedata.category(char) in ('Mn', 'Me', 'Cf'):
+        return 0
+    return 2 if unicodedata.east_asian_width(char) in ('W', 'F') else 1
+
+
+def wrap_line(line, width):
+    """Разбивает строку с ANSI-кодами на экранные строки не шире width.
+
+    Цвет, начатый в одной экранной строке, закрывается в ее конце и
+    открывается заново в следующей.
+    """
+    rows, row, used, active = [], '', 0, []
+    pos = 0
+    while pos < len(line):
+        match = _ANSI.match(line, pos)
+        if match:
+            code = match.group()
+            row += code
+            if code in (RESET, '\033[m'):
+                active = []
+            elif code.endswith('m'):
+                active.append(code)
+            pos = match.end()
+            continue
+        char = line[pos]
+        pos += 1
+        size = char_width(char)
+        if used + size > width and used > 0:
+            rows.append(row + RESET if active else row)
+            row, used = ''.join(active), 0
+        row += char
+        used += size
+    rows.append(row)
+    return rows
+
+
+def layout(lines, width):
+    """Экранные строки и номер исходной строки для каждой из них."""
+    rows, sources = [], []
+    for number, line in enumerate(lines):
+        for row in wrap_line(line.expandtabs(), width):
+            rows.append(row)
+            sources.append(number)
+    return rows, sources
+
+
+def highlight(row, pattern):
+    """Выделяет совпадения pattern (без учета регистра) инверсией цвета."""
+    plain, offsets = [], []
+    pos = 0
+    while pos < len(row):
+        match = _ANSI.match(row, pos)
+        if match:
+            pos = match.end()
+            continue
+        plain.append(row[pos])
+        offsets.append(pos)
+        pos += 1
+    text = fold(''.join(plain))
+    spans = []
+    start = text.find(pattern)
+    while start >= 0 and pattern:
+        spans.append((offsets[start], offsets[start + len(pattern) - 1] + 1))
+        start = text.find(pattern, start + len(pattern))
+    for begin, end in reversed(spans):
+        row = row[:begin] + REVERSE + row[begin:end] + REVERSE_OFF + row[end:]
+    return row
+
+
+def _screen_size():
+    size = shutil.get_terminal_size()
+    return max(size.columns, 10), max(size.lines, 3)
+
+
+def _write(text):
+    sys.stdout.write(text)
+    sys.stdout.flush()
+
+
+def _print_lines(lines):
+    for line in lines:
+        print(line)
+
+
+def _stdout_is_terminal():
+    try:
+        return sys.stdout.isatty()
+    except (AttributeError, ValueError):
+        return False
+
+
+class Pager:
+    """Окно просмотра поверх заранее разложенного буфера строк."""
+
+    def __init__(self, lines):
+        self.lines = lines
+        self.top = 0
+        self.pattern = ''
+        self.match = None
+        self.message = ''
+        self.resized = False
+        self.rows, self.sources = [], []
+        self.relayout()
+
+    def relayout(self):
+        """Раскладывает строки по текущему размеру окна, сохраняя верхнюю строку."""
+        anchor = self.sources[self.top] if self.sources else 0
+        self.width, self.height = _screen_size()
+        self.rows, self.sources = layout(self.lines, self.width)
+        self._plain = None
+        self.top = self.sources.index(anchor) if anchor in self.sources else 0
+        self.scroll(0)
+
+    @property
+    def window(self):
+        return self.height - 1
+
+    @property
+    def max_top(self):
+        return max(len(self.rows) - self.window, 0)
+
+    def scroll(self, delta):
+        self.top = min(max(self.top + delta, 0), self.max_top)
+
+    def find(self, start, step):
+        """Номер экранной строки с совпадением, начиная со start, или None."""
+        if self._plain is None:
+            self._plain = [fold(strip_ansi(row)) for row in self.rows]
+        index = start
+        while 0 <= index < len(self.rows):
+            if self.pattern in self._plain[index]:
+                return index
+            index += step
+        return None
+
+    def jump(self, start, step):
+        found = self.find(start, step) if self.pattern else None
+        if found is None:
+            self.message = f"Не найдено: {self.pattern}" if self.pattern else "Нет шаблона поиска"
+            return
+        self.match = found
+        self.top = found
+        self.scroll(0)
+
+    def status(self):
+        if self.message:
+            text = self.message
+        else:
+            last = min(self.top + self.window, len(self.rows))
+            percent = last * 100 // len(self.rows) if self.rows else 100
+            text = (f"строки {self.top + 1}-{last} из {len(self.rows)} ({percent}%)  "
+                    "q - выход, пробел/b - страница, / - поиск")
+        shown, used = '', 0
+        for char in text:
+            used += char_width(char)
+            if used > self.width - 1:
+                break
+            shown += char
+        return f"{REVERSE}{shown}{RESET}"
+
+    def render(self):
+        """Выводит только видимые строки и строку состояния."""
+        visible = self.rows[self.top:self.top + self.window]
+        if self.pattern:
+            visible = [highlight(row, self.pattern) for row in visible]
+        visible += [''] * (self.window - len(visible))
+        _write(CLEAR + '\n'.join(visible) + '\n' + self.status())
+        self.message = ''
+
+    def read_pattern(self, terminal):
+        """Читает строку поиска в строке состояния; None - поиск отменен."""
+        typed = ''
+        while True:
+            _write(f"{ERASE_LINE}/{typed}")
+            key = terminal.read_key()
+            if key == ENTER:
+                return typed
+            if key == ESCAPE:
+                return None
+            if key == BACKSPACE:
+                if not typed:
+                    return None
+                typed = typed[:-1]
+            elif key and len(key) == 1 and key.isprintable():
+                typed += key
+
+    def handle(self, key, terminal):
+        """Обрабатывает клавишу; False - просмотр окончен."""
+        page, half = max(self.window, 1), max(self.window // 2, 1)
+        if key in ('q', 'Q', ESCAPE):
+            return False
+        if key in ('j', 'e', ENTER, DOWN):
+            self.scroll(1)
+        elif key in ('k', 'y', UP):
+            self.scroll(-1)
+        elif key in (' ', 'f', PAGE_DOWN):
+            self.scroll(page)
+        elif key in ('b', PAGE_UP):
+            self.scroll(-page)
+        elif key == 'd':
+            self.scroll(half)
+        elif key == 'u':
+            self.scroll(-half)
+        elif key in ('g', '<', HOME):
+            self.top = 0
+        elif key in ('G', '>', END):
+            self.top = self.max_top
+        elif key == '/':
+            pattern = self.read_pattern(terminal)
+            if pattern:
+                self.pattern = fold(pattern)
+                self.jump(self.top, 1)
+        elif key == 'n':
+            self.jump((self.top if self.match is None else self.match) + 1, 1)
+        elif key == 'N':
+            self.jump((self.top if self.match is None else self.match) - 1, -1)
+        return True
+
+    def run(self):
+        with key_terminal() as terminal:
+            self.render()
+            while True:
+                # Пока клавиша не нажата, следим за размером окна
+                while not terminal.wait(RESIZE_POLL):
+                    if self.resized or _screen_size() != (self.width, self.height):
+                        self.resized = False
+                        self.relayout()
+                        self.render()
+                if not self.handle(terminal.read_key(), terminal):
+                    break
+                self.render()
+        # Последнее окно остается на экране, строка состояния стирается
+        _write(ERASE_LINE)
+
+
+def page(lines, reserve=0):
+    """Показывает строки; длинные - в окне просмотра.
+
+    Args:
+        lines (list): Строки текста (могут содержать цветовые коды)
+        reserve (int): Сколько строк экрана нужно под вывод после текста
+
+    Возвращает True, если текст просматривался в окне (пользователь уже
+    нажал q, и ждать Enter не нужно), и False, если он выведен целиком.
+    """
+    if not PAGER or not terminal_available() or not _stdout_is_terminal():
+        _print_lines(lines)
+        return False
+    width, height = _screen_size()
+    rows = reserve
+    for line in lines:
+        rows += len(wrap_line(line.expandtabs(), width))
+        if rows > height:
+            break
+    else:
+        _print_lines(lines)
+        return False
+
+    pager = Pager(lines)
+    # Обработчик сигнала можно ставить только из главного потока
+    watch_resize = hasattr(signal, 'SIGWINCH') and threading.current_thread() is threading.main_thread()
+    if watch_resize:
+        def on_resize(signum, frame):
+            pager.resized = True
+        previous = signal.signal(signal.SIGWINCH, on_resize)
+    try:
+        pager.run()
+    finally:
+        if watch_resize:
+            signal.signal(signal.SIGWINCH, previous)
+    return True
@@ -0,0 +1,60 @@
+"""
+Расположение файлов тренажера.
+
+Учебный контент ищется рядом со скриптом, а состояние пользователей
+(прогресс, журналы, кеши) хранится в каталоге данных пользователя:
+
+- ARTIX_DATA_DIR, если задан;
+- Windows: %APPDATA%\\artix-training;
+- иначе: $XDG_DATA_HOME/artix-training (по умолчанию ~/.local/share).
+
+Раньше состояние лежало в текущем каталоге. prepare_state_dir() один раз
+копирует такие файлы в каталог данных, если там их еще нет.
+"""
+
+import os
+import shutil
+import sys
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Пакеты обновлений контента (artix_packs.py): рядом со скриптом, а для
+# zipapp (APP_DIR - сам архив) - рядом с архивом
+CONTENT_PACKS_DIR = os.getenv("ARTIX_CONTENT_PACKS") or os.path.join(
+    os.path.dirname(APP_DIR) if os.path.isfile(APP_DIR) else APP_DIR, 'content_packs')
+
+# Файлы состояния, которые раньше создавались в текущем каталоге
+LEGACY_STATE_FILES = ('user_progress.json', 'training_log.txt', 'test_attempts.jsonl', 'solution_cache.json')
+
+
+def data_dir():
+    override = os.getenv("ARTIX_DATA_DIR")
+    if override:
+        return os.path.abspath(os.path.expanduser(override))
+    if sys.platform == 'win32':
+        base = os.getenv('APPDATA') or os.path.expanduser('~')
+    else:
+        base = os.getenv('XDG_DATA_HOME') or os.path.join(os.path.expanduser('~'), '.local', 'share')
+    return os.path.join(base, 'artix-training')
+
+
+DATA_DIR = data_dir()
+
+
+def state_path(name):
+    """Путь к файлу состояния в каталоге данных пользователя."""
+    return os.path.join(DATA_DIR, name)
+
+
+def prepare_state_dir():
+    """Создает каталог данных и переносит в него файлы из текущего каталога.
+
+    Старые файлы копируются, а не перемещаются: установленные ранее версии
+    тренажера продолжат с ними работать.
+    """
+    os.makedirs(DATA_DIR, exist_ok=True)
+    for name in LEGACY_STATE_FILES:
+        legacy, target = os.path.abspath(name), state_path(name)
+        if legacy != target and os.path.isfile(legacy) and not os.path.exists(target):
+            shutil.copy2(legacy, target)
+    return DATA_DIR
@@ -0,0 +1,151 @@
+"""
+Выбор вопросов для попытки теста.
+
+В попытку попадает заданное число вопросов уровня. Вероятность вопроса
+пропорциональна 1 + MISSED_BOOST * (число прошлых ошибок в нем), то есть
+вопросы, в которых пользователь ошибался, выпадают чаще.
+
+Такое распределение раскладывается в смесь: равномерный выбор по всему
+банку и выбор по таблице псевдонимов (alias-метод Уолкера/Воуза),
+построенной только по вопросам с ошибками. Каждый выбор стоит O(1), и
+стоимость попытки зависит от числа вопросов в ней и числа вопросов с
+ошибками у пользователя, но не от размера банка.
+
+Повторно выпавший вопрос отбрасывается. Когда попытка берет больше
+половины банка или вопросы с ошибками раз за разом выпадают повторно,
+отбрасывание становится дорогим, и оставшиеся вопросы выбираются за
+один проход взвешенной выборкой без возвращения (Efraimidis-Spirakis):
+распределение результата то же самое.
+"""
+
+import heapq
+import os
+import random
+
+from artix_stats import question_key
+
+# Число вопросов в попытке, если у уровня не задан questions_per_attempt
+# (не меньше одного: пустая попытка не имеет результата)
+QUESTIONS_PER_ATTEMPT = max(int(os.getenv("ARTIX_TEST_QUESTIONS", 20)), 1)
+
+# Во сколько раз каждая прошлая ошибка увеличивает вес вопроса
+MISSED_BOOST = 3
+
+# Предел выборов с отбрасыванием повторов: REJECTION_DRAWS на вопрос попытки
+REJECTION_DRAWS = 4
+
+
+class AliasTable:
+    """Таблица псевдонимов для выбора индекса с заданными весами за O(1).
+
+    Args:
+        weights (list): Неотрицательные веса, хотя бы один положительный
+    """
+
+    def __init__(self, weights):
+        n = len(weights)
+        total = float(sum(weights))
+        scaled = [w * n / total for w in weights]
+        self.prob = [1.0] * n
+        self.alias = list(range(n))
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            less, more = small.pop(), large.pop()
+            self.prob[less] = scaled[less]
+            self.alias[less] = more
+            scaled[more] -= 1.0 - scaled[less]
+            (small if scaled[more] < 1.0 else large).append(more)
+        # Остатки равны 1 с точностью до округления
+        for i in small + large:
+            self.prob[i] = 1.0
+
+    def __len__(self):
+        return len(self.prob)
+
+    def sample(self, rng=random):
+        i = int(rng.random() * len(self.prob))
+        return i if rng.random() < self.prob[i] else self.alias[i]
+
+
+def weighted_sample(items, weights, count, rng=random):
+    """Выбор count элементов без возвращения с вероятностями по весам.
+
+    Метод Efraimidis-Spirakis: ключ элемента u ** (1 / вес), где u
+    равномерно на [0, 1), берутся count наибольших ключей. Порядок по
+    убыванию ключа распределен так же, как последовательный выбор.
+    """
+    keyed = ((rng.random() ** (1.0 / weight), item) for item, weight in zip(items, weights))
+    return [item for _, item in heapq.nlargest(count, keyed)]
+
+
+class QuestionSampler:
+    """Выбор вопросов одного уровня; индекс ключей строится один раз.
+
+    Args:
+        test_level (TestLevel): Уровень теста из модели контента
+    """
+
+    def __init__(self, test_level):
+        self.questions = test_level.questions
+        self.index_by_key = {question_key(q.question): i for i, q in enumerate(self.questions)}
+
+    def sample(self, count, missed=None, rng=random):
+        """Возвращает до count разных вопросов в случайном порядке.
+
+        Args:
+            count (int): Число вопросов в попытке
+            missed (dict): Ключ вопроса -> число прошлых ошибок
+        """
+        n = len(self.questions)
+        if count >= n:
+            chosen = list(range(n))
+            rng.shuffle(chosen)
+            return [self.questions[i] for i in chosen]
+
+        missed_indexes, missed_weights = [], []
+        for key, misses in (missed or {}).items():
+            index = self.index_by_key.get(key)
+            if index is not None and misses > 0:
+                missed_indexes.append(index)
+                missed_weights.append(misses)
+
+        chosen, seen = [], set()
+        if count <= n // 2:
+            boost_weight = MISSED_BOOST * sum(missed_weights)
+            missed_share = boost_weight / (n + boost_weight)
+            table = AliasTable(missed_weights) if missed_indexes else None
+
+            # Выбор без возвращения отбрасыванием повторов: count < n, а
+            # равномерная часть смеси всегда дает шанс любому вопросу
+            for _ in range(REJECTION_DRAWS * count):
+                if table is not None and rng.random() < missed_share:
+                    index = missed_indexes[table.sample(rng)]
+                else:
+                    index = int(rng.random() * n)
+                if index not in seen:
+                    seen.add(index)
+                    chosen.append(index)
+                    if len(chosen) == count:
+                        return [self.questions[i] for i in chosen]
+
+        # Остаток попытки - одним проходом по еще не выбранным вопросам
+        weights = [1] * n
+        for index, misses in zip(missed_indexes, missed_weights):
+            weights[index] = 1 + MISSED_BOOST * misses
+        remaining = [i for i in range(n) if i not in seen]
+        chosen += weighted_sample(remaining, [weights[i] for i in remaining], count - len(chosen), rng)
+        return [self.questions[i] for i in chosen]
+
+
+def shuffle_options(question, rng=random):
+    """Перемешивает варианты ответа.
+
+    Returns:
+        tuple: (варианты в новом порядке, новый индекс правильного,
+                order - исходные индексы показанных вариантов)
+    """
+    order = list(range(len(question.options)))
+    rng.shuffle(order)
+    options = [question.options[i] for i in order]
+    return options, order.index(question.correct), order
@@ -0,0 +1,607 @@
+"""
+Проверка ответов выполнением команд в одноразовой песочнице.
+
+Команда пользователя и эталонное решение запускаются в отдельных копиях
+учебного каталога (fixture) на tmpfs. Каждая команда выполняется в
+непривилегированных user, mount, pid и net namespace (unshare) и видит
+только свою корневую файловую систему: tmpfs, в которую подключены
+копия учебного каталога (домашний каталог /home/trainee), /usr, /bin и
+библиотеки только для чтения, минимальный /dev и свой /tmp. Остальная
+файловая система хоста и сеть команде недоступны; время, память и размер
+файлов ограничены. Если создать такое окружение нельзя (нет unshare или
+user namespace запрещены), проверка выполнением отключается: команды
+пользователя никогда не запускаются без изоляции.
+
+Песочницы создаются заранее и хранятся в пуле; после использования каталог
+восстанавливается из шаблона в фоне, поэтому проверка не ждет подготовки.
+Результаты эталонных решений кешируются на диске (ReferenceCache), так что
+при проверке выполняется только команда пользователя.
+"""
+
+import atexit
+import collections
+import concurrent.futures
+import contextlib
+import hashlib
+import json
+import os
+import queue
+import re
+import shutil
+import signal
+import stat
+import subprocess
+import tempfile
+import threading
+
+from artix_paths import APP_DIR, prepare_state_dir, state_path
+
+# --- НАСТРОЙКИ ПЕСОЧНИЦЫ ---
+
+SANDBOX_TIMEOUT = float(os.getenv("ARTIX_SANDBOX_TIMEOUT", 2.0))
+SANDBOX_POOL_SIZE = int(os.getenv("ARTIX_SANDBOX_POOL_SIZE", 4))
+# Сколько ждать свободную песочницу; дольше - проверка только по тексту ответа
+SANDBOX_ACQUIRE_TIMEOUT = float(os.getenv("ARTIX_SANDBOX_ACQUIRE_TIMEOUT", 5.0))
+SANDBOX_FIXTURE = os.getenv("ARTIX_SANDBOX_FIXTURE")
+SOLUTION_CACHE_FILE = os.getenv("ARTIX_SOLUTION_CACHE") or state_path("solution_cache.json")
+
+OUTPUT_LIMIT = 64 * 1024
+CPU_LIMIT_SECONDS = 2
+FILE_SIZE_LIMIT = 4 * 1024 * 1024
+MEMORY_LIMIT = 512 * 1024 * 1024
+# Процессов на пользователя: fork-бомба упирается в лимит, а не в машину
+PROCESS_LIMIT = 64
+
+# Домашний каталог внутри песочницы; в выводе заменяется на "~"
+SANDBOX_HOME = "/home/trainee"
+SANDBOX_PATH_PLACEHOLDER = "~"
+
+# Фиксированное время изменения файлов учебного каталога: вывод ls -l
+# должен совпадать между песочницами и между запусками (для кеша эталонов)
+FIXTURE_MTIME = 1705312800  # 2024-01-15 10:00 UTC
+
+# Версия окружения песочницы: при ее смене кеш эталонов сбрасывается
+SANDBOX_LAYOUT = 2
+
+# Каталоги хоста, подключаемые в песочницу только для чтения
+READONLY_DIRS = ("usr", "bin", "sbin", "lib", "lib32", "lib64", "libx32")
+DEVICE_NODES = ("null", "zero", "full", "random", "urandom")
+
+# Подготовка корня песочницы; выполняется внутри новых namespace.
+# $1 - точка монтирования корня, $2 - копия учебного каталога, $3 - команда.
+# Любая ошибка (set -e) прерывает запуск до выполнения команды.
+ISOLATE_SCRIPT = r"""
+set -e
+root=$1 work=$2
+mount -t tmpfs -o mode=0755,size=1m artix-sandbox "$root"
+for dir in %(readonly)s; do
+    if [ -L "/$dir" ]; then
+        ln -s "$(readlink "/$dir")" "$root/$dir"
+    elif [ -d "/$dir" ]; then
+        mkdir "$root/$dir"
+        mount --bind "/$dir" "$root/$dir"
+        mount -o remount,bind,ro "$root/$dir"
+    fi
+done
+mkdir -p "$root/dev" "$root/proc" "$root/tmp" "$root/etc" "$root%(home)s"
+for node in %(devices)s; do
+    touch "$root/dev/$node"
+    mount --bind "/dev/$node" "$root/dev/$node"
+done
+mount -t proc -o nosuid,nodev,noexec proc "$root/proc"
+mount -t tmpfs -o mode=1777,size=4m tmpfs "$root/tmp"
+echo "trainee:x:0:0:trainee:%(home)s:/bin/sh" > "$root/etc/passwd"
+echo "trainee:x:0:" > "$root/etc/group"
+mount --bind "$work" "$root%(home)s"
+touch -d @%(mtime)d "$root/home" "$root"
+mount -o remount,ro "$root"
+exec chroot "$root" /bin/sh -c 'cd %(home)s && exec /bin/sh -c "$1"' sh "$3"
+""" % {'readonly': ' '.join(READONLY_DIRS), 'devices': ' '.join(DEVICE_NODES),
+       'home': SANDBOX_HOME, 'mtime': FIXTURE_MTIME}
+
+UNSHARE_ARGS = ("--user", "--map-root-user", "--mount", "--pid", "--fork", "--kill-child", "--net")
+
+# Команды, которые не запускаются ни при каких условиях. Это не защита
+# (изоляция обеспечивается namespace), а отсев заведомо разрушительных
+# ответов до запуска песочницы.
+BLOCKED_PATTERNS = tuple(re.compile(pattern) for pattern in (
+    r"\brm\s+(-\w+\s+)*(/|~|\$HOME)(\s|\*|$)",
+    r"\bmkfs(\.\w+)?\b",
+    r"\bdd\b.*\bof=/dev/",
+    r">\s*/dev/(sd|nvme|hd|mmcblk)",
+    r"\b(shutdown|reboot|halt|poweroff|init\s+[06])\b",
+    r":\s*\(\s*\)\s*\{",
+    r"\b(chmod|chown)\s+(-\w+\s+)*\S+\s+/(\s|$)",
+    r"\bkill(all)?\s+(-\w+\s+)*(-1|1)\b",
+))
+
+# Учебный каталог по умолчанию: файлы, которые упоминаются в заданиях.
+# Ключи, оканчивающиеся на '/', - каталоги.
+DEFAULT_FIXTURE = {
+    "test.txt": "Это тестовый файл.\nВторая строка.\n",
+    "file.txt": "первая строка\n\nstatus=ok\ntest line\nпоследняя строка\n",
+    "file1.txt": "содержимое файла 1\n",
+    "file2.txt": "содержимое файла 2\n",
+    "file3.txt": "содержимое файла 3\n",
+    "config.txt": "# настройки\nport=8080\n\nhost=localhost\n",
+    "data.txt": "test\ntesting\nunit test\n",
+    "old.txt": "старый файл\n",
+    "important.txt": "важные данные\n",
+    "document.txt": "Сайт: https://example.com/docs и http://test.local/page\n",
+    "contacts.txt": "Иван ivan@example.com +7912-345-67-89\nОльга olga@mail.ru +7903-111-22-33\n",
+    "logfile.txt": "2024-01-15 service started\nrandom line\n2024-01-16 service stopped\n",
+    "system.log": (
+        "2024-01-15 10:00:01 INFO service started\n"
+        "2024-01-15 10:05:12 WARNING disk usage 85%\n"
+        "2024-01-15 10:07:44 ERROR connection failed\n"
+        "2024-01-15 10:08:00 INFO retry success\n"
+        "2024-01-15 10:09:13 CRITICAL service crashed\n"
+        "2024-01-15 10:10:00 error: failed to restart\n"
+    ),
+    "app.log": "DEBUG init\nINFO ready\nError: timeout\nDEBUG tick\nerror: retry\n",
+    "new.log": "INFO ok\nerror in module\n",
+    "error.log": "line 1\nline 2\nline 3\nline 4\nline 5\nNullPointer exception\n",
+    "access.log": (
+        "192.168.1.10 - - GET /index.html 200\n"
+        "10.0.0.5 - - GET /login 401\n"
+        "192.168.1.10 - - POST /login 200\n"
+        "172.16.0.3 - - GET /admin 403\n"
+    ),
+    "temp.log": "временный лог\n",
+    "backup/": None,
+    "documents/": None,
+    "archive/": None,
+    "temp/": None,
+    "temp/cache.tmp": "cache\n",
+    "old_project/": None,
+    "old_project/readme.md": "# old\n",
+    "project/": None,
+    "project/src/": None,
+    "project/src/main.py": "import os\n# TODO: написать main\n",
+}
+
+ExecResult = collections.namedtuple('ExecResult', 'returncode stdout state timed_out')
+
+
+def is_blocked(command):
+    """Проверяет команду по списку заведомо разрушительных шаблонов."""
+    return any(pattern.search(command) for pattern in BLOCKED_PATTERNS)
+
+
+def _tmpfs_root():
+    """Каталог для песочниц: /dev/shm, если доступен, иначе системный temp."""
+    shm = "/dev/shm"
+    if os.path.isdir(shm) and os.access(shm, os.W_OK):
+        return shm
+    return tempfile.gettempdir()
+
+
+def write_fixture(path, fixture=None):
+    """Создает учебный каталог из описания fixture (по умолчанию DEFAULT_FIXTURE)."""
+    for rel_path, content in sorted((fixture or DEFAULT_FIXTURE).items()):
+        target = os.path.join(path, rel_path)
+        if rel_path.endswith('/'):
+            os.makedirs(target, exist_ok=True)
+            continue
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, 'w', encoding='utf-8') as f:
+            f.write(content)
+    freeze_mtimes(path)
+
+
+def freeze_mtimes(path):
+    """Выставляет FIXTURE_MTIME всем файлам и каталогам, включая сам path."""
+    for dirpath, dirnames, filenames in os.walk(path, topdown=False):
+        for name in filenames + dirnames:
+            os.utime(os.path.join(dirpath, name), (FIXTURE_MTIME, FIXTURE_MTIME), follow_symlinks=False)
+    os.utime(path, (FIXTURE_MTIME, FIXTURE_MTIME))
+
+
+def snapshot_state(path):
+    """Возвращает хеш состояния каталога: имена, права и содержимое файлов."""
+    digest = hashlib.sha256()
+    for dirpath, dirnames, filenames in os.walk(path):
+        dirnames.sort()
+        for name in sorted(dirnames + filenames):
+            full = os.path.join(dirpath, name)
+            rel = os.path.relpath(full, path)
+            st = os.lstat(full)
+            digest.update(f"{rel}\0{stat.S_IFMT(st.st_mode)}\0{stat.S_IMODE(st.st_mode)}\0".encode('utf-8', 'surrogateescape'))
+            if stat.S_ISREG(st.st_mode):
+                with open(full, 'rb') as f:
+                    digest.update(f.read(OUTPUT_LIMIT))
+            elif stat.S_ISLNK(st.st_mode):
+                digest.update(os.readlink(full).encode('utf-8', 'surrogateescape'))
+    return digest.hexdigest()
+
+
+_ISOLATION_AVAILABLE = None
+_ISOLATION_LOCK = threading.Lock()
+
+
+def isolation_argv(root, work, command):
+    """Команда запуска command в изолированном корне root с копией каталога work."""
+    return ["unshare", *UNSHARE_ARGS, "/bin/sh", "-c", ISOLATE_SCRIPT, "artix-sandbox",
+            root, work, command]
+
+
+def isolation_available():
+    """Проверяет (один раз), можно ли собрать изолированный корень песочницы.
+
+    Пробный запуск проходит ту же подготовку, что и настоящая команда:
+    unshare, монтирование и chroot.
+    """
+    global _ISOLATION_AVAILABLE
+    with _ISOLATION_LOCK:
+        if _ISOLATION_AVAILABLE is None:
+            _ISOLATION_AVAILABLE = False
+            if os.name == 'posix' and shutil.which("unshare"):
+                probe = tempfile.mkdtemp(prefix="artix-probe-", dir=_tmpfs_root())
+                try:
+                    os.makedirs(os.path.join(probe, "root"))
+                    os.makedirs(os.path.join(probe, "work"))
+                    result = subprocess.run(
+                        isolation_argv(os.path.join(probe, "root"), os.path.join(probe, "work"), "test -d /proc/self"),
+                        stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=5)
+                    _ISOLATION_AVAILABLE = result.returncode == 0
+                except (OSError, subprocess.SubprocessError):
+                    pass
+                finally:
+                    shutil.rmtree(probe, ignore_errors=True)
+    return _ISOLATION_AVAILABLE
+
+
+def _apply_limits():
+    """Ограничения ресурсов для процесса в песочнице (выполняется после fork)."""
+    import resource
+    resource.setrlimit(resource.RLIMIT_CPU, (CPU_LIMIT_SECONDS, CPU_LIMIT_SECONDS))
+    resource.setrlimit(resource.RLIMIT_FSIZE, (FILE_SIZE_LIMIT, FILE_SIZE_LIMIT))
+    resource.setrlimit(resource.RLIMIT_AS, (MEMORY_LIMIT, MEMORY_LIMIT))
+    resource.setrlimit(resource.RLIMIT_CORE, (0, 0))
+    resource.setrlimit(resource.RLIMIT_NPROC, (PROCESS_LIMIT, PROCESS_LIMIT))
+
+
+def _restore_permissions(path):
+    """Возвращает владельцу права на все каталоги дерева.
+
+    Внутри user namespace команда - root и может сделать chmod 000 на
+    каталог; без этого rmtree не сможет его ни прочитать, ни очистить.
+    """
+    stack = [path]
+    while stack:
+        current = stack.pop()
+        with contextlib.suppress(OSError):
+            os.chmod(current, stat.S_IRWXU)
+            with os.scandir(current) as entries:
+                stack.extend(entry.path for entry in entries if entry.is_dir(follow_symlinks=False))
+
+
+def _remove_tree(path):
+    """Удаляет дерево песочницы; OSError, если оно осталось на месте."""
+    if os.path.lexists(path) and not os.path.islink(path):
+        _restore_permissions(path)
+    shutil.rmtree(path, ignore_errors=True)
+    if os.path.lexists(path):
+        raise OSError(f"не удалось очистить песочницу {path}")
+
+
+class Sandbox:
+    """Одноразовый учебный каталог, восстанавливаемый из шаблона.
+
+    Рядом с рабочим каталогом лежит пустой каталог root: внутри namespace
+    на него монтируется корень песочницы, на хосте он остается пустым.
+    """
+
+    def __init__(self, template, root):
+        self.template = template
+        self.parent = tempfile.mkdtemp(prefix="artix-sandbox-", dir=root)
+        self.path = os.path.join(self.parent, "work")
+        self.root = os.path.join(self.parent, "root")
+        os.makedirs(self.root)
+        self.reset()
+
+    def reset(self):
+        """Возвращает каталог в исходное состояние шаблона (OSError - не удалось)."""
+        _remove_tree(self.path)
+        shutil.copytree(self.template, self.path, symlinks=True)
+
+    def run(self, command, timeout=SANDBOX_TIMEOUT):
+        """Выполняет команду в изолированной песочнице и возвращает ExecResult.
+
+        Без изоляции команда не запускается: вызывающий код должен
+        проверить isolation_available().
+        """
+        if not isolation_available():
+            raise OSError("изоляция песочницы недоступна")
+        argv = isolation_argv(self.root, self.path, command)
+        env = {
+            "PATH": "/usr/bin:/bin:/usr/sbin:/sbin",
+            "HOME": SANDBOX_HOME,
+            "TMPDIR": "/tmp",
+            "USER": "trainee",
+            "LANG": "C.UTF-8",
+            "TERM": "dumb",
+        }
+        proc = subprocess.Popen(argv, cwd=self.path, env=env, stdin=subprocess.DEVNULL,
+                                stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                                preexec_fn=_apply_limits, start_new_session=True)
+        timed_out = False
+        try:
+            stdout, _ = proc.communicate(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            # Убиваем всю группу: команда могла породить дочерние процессы
+            with contextlib.suppress(ProcessLookupError):
+                os.killpg(proc.pid, signal.SIGKILL)
+            stdout, _ = proc.communicate()
+            timed_out = True
+
+        output = stdout[:OUTPUT_LIMIT].decode('utf-8', 'replace').replace(SANDBOX_HOME, SANDBOX_PATH_PLACEHOLDER)
+        output = '\n'.join(line.rstrip() for line in output.rstrip().splitlines())
+        return ExecResult(proc.returncode, output, snapshot_state(self.path), timed_out)
+
+    def remove(self):
+        with contextlib.suppress(OSError):
+            _remove_tree(self.parent)
+
+
+class SandboxPool:
+    """Пул заранее подготовленных песочниц.
+
+    Возвращенная в пул песочница восстанавливается в фоновом потоке,
+    так что acquire() почти всегда отдает готовый каталог сразу.
+    """
+
+    def __init__(self, size=SANDBOX_POOL_SIZE, fixture_dir=SANDBOX_FIXTURE):
+        self.root = tempfile.mkdtemp(prefix="artix-pool-", dir=_tmpfs_root())
+        self.template = os.path.join(self.root, "template")
+        if fixture_dir:
+            shutil.copytree(fixture_dir, self.template, symlinks=True)
+            freeze_mtimes(self.template)
+        else:
+            os.makedirs(self.template)
+            write_fixture(self.template)
+        self.pristine_state = snapshot_state(self.template)
+        self._ready = queue.Queue()
+        for _ in range(max(size, 2)):
+            self._ready.put(Sandbox(self.template, self.root))
+
+    def acquire(self, timeout=SANDBOX_ACQUIRE_TIMEOUT):
+        """Берет готовую песочницу; TimeoutError, если ее нет дольше timeout."""
+        try:
+            return self._ready.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError("нет свободной песочницы") from None
+
+    def release(self, sandbox):
+        threading.Thread(target=self._recycle, args=(sandbox,), daemon=True).start()
+
+    def _recycle(self, sandbox):
+        try:
+            sandbox.reset()
+        except OSError:
+            # Каталог не восстановить: песочница заменяется новой из шаблона
+            sandbox.remove()
+            try:
+                sandbox = Sandbox(self.template, self.root)
+            except OSError:
+                return
+        self._ready.put(sandbox)
+
+    @contextlib.contextmanager
+    def sandbox(self, wait=SANDBOX_ACQUIRE_TIMEOUT):
+        """Контекстный менеджер: берет песочницу из пула и возвращает ее обратно."""
+        sandbox = self.acquire(wait)
+        try:
+            yield sandbox
+        finally:
+            self.release(sandbox)
+
+    def run(self, command, timeout=SANDBOX_TIMEOUT, wait=SANDBOX_ACQUIRE_TIMEOUT):
+        with self.sandbox(wait) as sandbox:
+            return sandbox.run(command, timeout)
+
+    def close(self):
+        with contextlib.suppress(OSError):
+            _remove_tree(self.root)
+
+
+# --- КЕШ РЕЗУЛЬТАТОВ ЭТАЛОННЫХ РЕШЕНИЙ ---
+
+def reference_key(solution, fixture_state):
+    """Ключ кеша: хеш текста решения и снимка учебного каталога."""
+    return hashlib.sha256(f"{fixture_state}\0{solution}".encode('utf-8')).hexdigest()
+
+
+class ReferenceCache:
+    """Постоянный кеш результатов эталонных решений.
+
+    Запись хранит снимок учебного каталога, для которого она получена:
+    при смене каталога или окружения песочницы (SANDBOX_LAYOUT) старые
+    записи отбрасываются при загрузке, а при смене текста решения просто
+    не находятся по ключу.
+    """
+
+    def __init__(self, path, fixture_state):
+        self.path = path
+        self.fixture_state = fixture_state
+        self._entries = {}
+        self._lock = threading.Lock()
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                stored = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            stored = {}
+        if stored.get('fixture') == fixture_state and stored.get('layout') == SANDBOX_LAYOUT:
+            self._entries = stored.get('entries', {})
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, solution):
+        entry = self._entries.get(reference_key(solution, self.fixture_state))
+        return ExecResult(*entry) if entry is not None else None
+
+    def put(self, solution, result, save=True):
+        with self._lock:
+            self._entries[reference_key(solution, self.fixture_state)] = list(result)
+        if save:
+            self.save()
+
+    def prune(self, solutions):
+        """Удаляет записи решений, которых больше нет в контенте."""
+        keep = {reference_key(solution, self.fixture_state) for solution in solutions}
+        with self._lock:
+            removed = len(self._entries) - len(keep & self._entries.keys())
+            self._entries = {key: value for key, value in self._entries.items() if key in keep}
+        return removed
+
+    def save(self):
+        with self._lock:
+            data = {'fixture': self.fixture_state, 'layout': SANDBOX_LAYOUT, 'entries': dict(self._entries)}
+        # Пишем во временный файл и подменяем, чтобы не оставить кеш наполовину
+        # записанным. У каждого писателя (потоки, параллельные тренажеры и
+        # make warm-cache) свой временный файл в том же каталоге
+        fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(self.path)}.",
+                                        suffix=".tmp", dir=os.path.dirname(self.path) or ".")
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            with contextlib.suppress(OSError):
+                os.unlink(tmp_path)
+            raise
+
+
+_POOL = None
+_CACHE = None
+_EXECUTOR = None
+_POOL_LOCK = threading.Lock()
+
+
+def get_pool():
+    """Возвращает общий пул песочниц, создавая его при первом вызове."""
+    global _POOL, _CACHE, _EXECUTOR
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = SandboxPool()
+            _CACHE = ReferenceCache(SOLUTION_CACHE_FILE, _POOL.pristine_state)
+            _EXECUTOR = concurrent.futures.ThreadPoolExecutor(max_workers=SANDBOX_POOL_SIZE,
+                                                              thread_name_prefix="sandbox")
+            atexit.register(_POOL.close)
+    return _POOL
+
+
+def reference_result(solution, timeout=SANDBOX_TIMEOUT, save=True, wait=SANDBOX_ACQUIRE_TIMEOUT):
+    """Возвращает результат эталонного решения из кеша или выполняет его."""
+    pool = get_pool()
+    result = _CACHE.get(solution)
+    if result is None:
+        result = pool.run(solution, timeout, wait)
+        # Таймаут может быть случайным (нагрузка на машину), такое не кешируем
+        if not result.timed_out:
+            _CACHE.put(solution, result, save)
+    return result
+
+
+def prewarm():
+    """Подготавливает пул в фоне, чтобы первая проверка не ждала его создания."""
+    thread = threading.Thread(target=get_pool, name="sandbox-prewarm", daemon=True)
+    thread.start()
+    return thread
+
+
+def grade_by_execution(user_command, solution, timeout=SANDBOX_TIMEOUT):
+    """Сравнивает результат команды пользователя с результатом эталонного решения.
+
+    Засчитывается только совпадение с успешным эталоном, который что-то
+    вывел или изменил в каталоге: иначе две одинаково упавшие команды
+    (например, без сети) считались бы равными. Если свободной песочницы
+    нет дольше SANDBOX_ACQUIRE_TIMEOUT, возвращается False и ответ
+    проверяется только по тексту.
+    """
+    if not user_command.strip() or is_blocked(user_command) or is_blocked(solution):
+        return False
+    if not isolation_available():
+        return False
+
+    pool = get_pool()
+    try:
+        expected = _CACHE.get(solution)
+        if expected is None:
+            # Промах кеша: эталон выполняется параллельно с командой пользователя
+            reference = _EXECUTOR.submit(reference_result, solution, timeout)
+            actual = pool.run(user_command, timeout)
+            expected = reference.result()
+        else:
+            actual = pool.run(user_command, timeout)
+    except (OSError, subprocess.SubprocessError):
+        return False
+
+    if expected.timed_out or actual.timed_out or expected.returncode != 0:
+        return False
+    if not expected.stdout and expected.state == pool.pristine_state:
+        return False
+    return (actual.returncode, actual.stdout, actual.state) == (expected.returncode, expected.stdout, expected.state)
+
+
+# --- ПРОГРЕВ КЕША ---
+
+def content_solutions(content):
+    """Возвращает уникальные эталонные решения заданий и шагов сценариев."""
+    solutions = {task.solution for module in content.modules
+                 for command in module.commands for task in command.practice}
+    solutions.update(step.solution for scenario in content.scenarios for step in scenario.steps)
+    return sorted(solutions)
+
+
+def warm_cache(content, jobs=SANDBOX_POOL_SIZE, timeout=SANDBOX_TIMEOUT):
+    """Параллельно заполняет кеш результатами всех эталонных решений.
+
+    Возвращает (выполнено, из кеша, пропущено, удалено устаревших).
+    """
+    get_pool()
+    solutions = content_solutions(content)
+    pending = [s for s in solutions if not is_blocked(s) and _CACHE.get(s) is None]
+    skipped = sum(1 for s in solutions if is_blocked(s))
+    with concurrent.futures.ThreadPoolExecutor(max_workers=jobs) as executor:
+        # Заданий больше, чем песочниц: прогрев ждет свободную без ограничения
+        list(executor.map(lambda solution: reference_result(solution, timeout, save=False, wait=None), pending))
+    removed = _CACHE.prune(solutions)
+    _CACHE.save()
+    cached = len(solutions) - len(pending) - skipped
+    return len(pending), cached, skipped, removed
+
+
+def main():
+    import argparse
+    from artix_content import build_content
+
+    parser = argparse.ArgumentParser(description="Песочница для проверки ответов выполнением")
+    parser.add_argument("--warm-cache", action="store_true",
+                        help="выполнить все эталонные решения и сохранить результаты в кеш")
+    parser.add_argument("--data", default=os.path.join(APP_DIR, "training_data.json"),
+                        help="путь к training_data.json")
+    parser.add_argument("--jobs", type=int, default=SANDBOX_POOL_SIZE, help="число параллельных песочниц")
+    args = parser.parse_args()
+
+    if not args.warm_cache:
+        parser.print_help()
+        return
+
+    if not isolation_available():
+        print("Изоляция песочницы недоступна (нужны unshare и user namespace): "
+              "проверка выполнением отключена.")
+        raise SystemExit(1)
+
+    prepare_state_dir()
+    with open(args.data, 'r', encoding='utf-8') as f:
+        content = build_content(json.load(f))
+    executed, cached, skipped, removed = warm_cache(content, jobs=args.jobs)
+    print(f"Кеш эталонных решений: {SOLUTION_CACHE_FILE}")
+    print(f"  выполнено: {executed}, уже в кеше: {cached}, заблокировано: {skipped}, "
+          f"удалено устаревших: {removed}")
+
+
+if __name__ == "__main__":
+    main()
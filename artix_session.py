@@ -0,0 +1,386 @@
+"""
+Сессии пользователей и хранилище профилей с ограниченным кешем.
+
+Раньше прогресс всех пользователей, когда-либо входивших в тренажер,
+держался в памяти одним словарем, а текущий пользователь и журнал сессии
+были глобальными переменными модуля - один процесс мог обслуживать только
+одного ученика.
+
+Теперь каждый профиль лежит в отдельном файле каталога profiles/, а в
+памяти остаются не больше ARTIX_PROFILE_CACHE профилей: при переполнении
+вытесняется давно не использованный (LRU), и если он изменялся, то
+сначала записывается на диск. Профили открытых сессий закреплены и не
+вытесняются, поэтому память процесса зависит от числа одновременных
+сессий и размера кеша, а не от числа всех пользователей.
+
+Рядом с профилем лежит состояние синхронизации пользователя (<имя>.sync:
+теневая копия и метки LWW, см. artix_sync.py). Оно загружается и
+вытесняется вместе с профилем, поэтому синхронизация тоже не держит в
+памяти всех пользователей.
+
+Session - состояние одного ученика: имя, профиль и журнал сессии. Его
+передают функциям тренажера вместо глобальных переменных.
+
+Отчет по профилям:
+    python artix_session.py list
+"""
+
+import collections
+import hashlib
+import json
+import os
+import threading
+from urllib.parse import quote
+
+from artix_paths import state_path
+
+# Каталог профилей: один JSON-файл на пользователя
+PROFILES_DIR = state_path('profiles')
+# Прежний общий файл прогресса; переносится в profiles/ при первом запуске
+LEGACY_PROGRESS_FILE = state_path('user_progress.json')
+
+# Сколько профилей держать в памяти сверх открытых сессий
+PROFILE_CACHE_SIZE = int(os.getenv("ARTIX_PROFILE_CACHE", "128"))
+
+PROFILE_SUFFIX = '.json'
+SYNC_SUFFIX = '.sync'
+# Длинные имена укорачиваются: имя файла не длиннее ~200 байт
+_MAX_QUOTED_NAME = 160
+
+
+def profile_filename(user):
+    """Имя файла профиля: имя пользователя в URL-кодировке.
+
+    Кодировка обратима и безопасна для любой файловой системы; слишком
+    длинные имена обрезаются и дополняются хешем полного имени.
+    """
+    name = quote(user, safe='')
+    if len(name) > _MAX_QUOTED_NAME:
+        digest = hashlib.sha1(user.encode('utf-8')).hexdigest()[:12]
+        name = f"{name[:_MAX_QUOTED_NAME]}-{digest}"
+    return name + PROFILE_SUFFIX
+
+
+def sync_filename(user):
+    """Имя файла состояния синхронизации пользователя, рядом с профилем."""
+    return profile_filename(user)[:-len(PROFILE_SUFFIX)] + SYNC_SUFFIX
+
+
+def _write_json_atomic(path, data):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=4, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def _read_profile(path):
+    """Возвращает (пользователь, прогресс) или None для поврежденного файла."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            record = json.load(f)
+    except ValueError:
+        return None
+    if not isinstance(record, dict) or not isinstance(record.get('progress'), dict):
+        return None
+    return record.get('user'), record['progress']
+
+
+class ProfileStore:
+    """Профили пользователей на диске с LRU-кешем в памяти.
+
+    Args:
+        directory (str): Каталог файлов профилей
+        capacity (int): Сколько незакрепленных профилей держать в памяти
+        legacy_file (str): Общий файл прогресса старых версий для переноса
+
+    Методы потокобезопасны: одно хранилище обслуживает все сессии процесса.
+    """
+
+    def __init__(self, directory=PROFILES_DIR, capacity=PROFILE_CACHE_SIZE, legacy_file=LEGACY_PROGRESS_FILE):
+        self.directory = directory
+        self.capacity = max(capacity, 1)
+        self._cache = collections.OrderedDict()
+        self._dirty = set()
+        self._pins = {}
+        # Состояния синхронизации: только для профилей из кеша
+        self._sync = {}
+        self._dirty_sync = set()
+        self._lock = threading.RLock()
+        self.loads = self.evictions = 0
+        if not os.path.isdir(directory):
+            self._create(legacy_file)
+
+    def _create(self, legacy_file):
+        """Создает каталог профилей, перенося в него старый общий файл.
+
+        Профили сначала пишутся во временный каталог, поэтому прерванный
+        перенос повторится при следующем запуске. Старый файл остается на
+        месте для прежних версий тренажера.
+        """
+        progress = {}
+        if legacy_file:
+            try:
+                with open(legacy_file, 'r', encoding='utf-8') as f:
+                    progress = json.load(f)
+            except (FileNotFoundError, ValueError):
+                progress = {}
+        if not progress:
+            os.makedirs(self.directory, exist_ok=True)
+            return
+        staging = f"{self.directory}.tmp"
+        os.makedirs(staging, exist_ok=True)
+        for user, user_progress in progress.items():
+            _write_json_atomic(os.path.join(staging, profile_filename(user)),
+                               {'user': user, 'progress': user_progress})
+        os.replace(staging, self.directory)
+
+    def _path(self, user):
+        return os.path.join(self.directory, profile_filename(user))
+
+    def _write(self, user):
+        _write_json_atomic(self._path(user), {'user': user, 'progress': self._cache[user]})
+        self._dirty.discard(user)
+
+    def _write_sync(self, user):
+        _write_json_atomic(os.path.join(self.directory, sync_filename(user)),
+                           {'user': user, 'sync': self._sync[user]})
+        self._dirty_sync.discard(user)
+
+    def _drop_sync(self, user):
+        if user in self._dirty_sync:
+            self._write_sync(user)
+        self._sync.pop(user, None)
+
+    def _evict(self):
+        """Вытесняет давно не использованные профили сверх емкости кеша."""
+        idle = [user for user in self._cache if user not in self._pins]
+        for user in idle[:max(len(idle) - self.capacity, 0)]:
+            if user in self._dirty:
+                self._write(user)
+            del self._cache[user]
+            self._drop_sync(user)
+            self.evictions += 1
+
+    def get(self, user):
+        """Профиль пользователя (None, если его нет); недавние - из кеша."""
+        with self._lock:
+            profile = self._cache.get(user)
+            if profile is not None:
+                self._cache.move_to_end(user)
+                return profile
+            try:
+                loaded = _read_profile(self._path(user))
+            except FileNotFoundError:
+                return None
+            if loaded is None or loaded[0] != user:
+                return None
+            profile = self._cache[user] = loaded[1]
+            self.loads += 1
+            self._evict()
+            return profile
+
+    def put(self, user, profile):
+        """Заменяет профиль пользователя; на диск он попадет при save() или вытеснении."""
+        with self._lock:
+            self._cache[user] = profile
+            self._cache.move_to_end(user)
+            self._dirty.add(user)
+            self._evict()
+
+    def mark_dirty(self, user):
+        """Отмечает, что загруженный профиль изменен на месте."""
+        with self._lock:
+            if user in self._cache:
+                self._dirty.add(user)
+
+    def save(self, user):
+        """Сразу записывает профиль на диск."""
+        with self._lock:
+            if user in self._cache:
+                self._write(user)
+
+    def flush(self):
+        """Записывает на диск все измененные профили и состояния синхронизации."""
+        with self._lock:
+            for user in list(self._dirty):
+                self._write(user)
+            self.flush_sync()
+
+    def sync_record(self, user):
+        """Состояние синхронизации пользователя (словарь, изменяемый на месте).
+
+        Загружается вместе с профилем и вытесняется вместе с ним; после
+        изменения нужно вызвать mark_sync_dirty().
+        """
+        with self._lock:
+            record = self._sync.get(user)
+            if record is not None:
+                return record
+            # Профиль в кеше - значит, и состояние будет вытеснено вместе с ним
+            self.get(user)
+            try:
+                with open(os.path.join(self.directory, sync_filename(user)), 'r', encoding='utf-8') as f:
+                    stored = json.load(f)
+            except (FileNotFoundError, ValueError):
+                stored = None
+            if isinstance(stored, dict) and stored.get('user') == user and isinstance(stored.get('sync'), dict):
+                record = stored['sync']
+            else:
+                record = {}
+            self._sync[user] = record
+            return record
+
+    def mark_sync_dirty(self, user):
+        with self._lock:
+            if user in self._sync:
+                self._dirty_sync.add(user)
+
+    def flush_sync(self):
+        """Записывает измененные состояния синхронизации.
+
+        Состояния пользователей, чьих профилей нет в кеше (например, еще не
+        созданных), после записи убираются из памяти.
+        """
+        with self._lock:
+            for user in list(self._dirty_sync):
+                self._write_sync(user)
+            for user in [user for user in self._sync if user not in self._cache]:
+                del self._sync[user]
+
+    def acquire(self, user):
+        """Закрепляет профиль за открытой сессией и возвращает его (или None)."""
+        with self._lock:
+            self._pins[user] = self._pins.get(user, 0) + 1
+            return self.get(user)
+
+    def release(self, user):
+        """Снимает закрепление; измененный профиль записывается на диск."""
+        with self._lock:
+            count = self._pins.get(user, 0) - 1
+            if count > 0:
+                self._pins[user] = count
+                return
+            self._pins.pop(user, None)
+            if user in self._dirty:
+                self._write(user)
+            self._evict()
+
+    def cached_profiles(self):
+        """Загруженные сейчас профили: список пар (пользователь, прогресс)."""
+        with self._lock:
+            return list(self._cache.items())
+
+    def iter_profiles(self):
+        """Все профили по одному, без заполнения кеша: для отчетов."""
+        for name in sorted(os.listdir(self.directory)):
+            if not name.endswith(PROFILE_SUFFIX):
+                continue
+            loaded = _read_profile(os.path.join(self.directory, name))
+            if loaded is None or loaded[0] is None:
+                continue
+            with self._lock:
+                cached = self._cache.get(loaded[0])
+            yield loaded[0], loaded[1] if cached is None else cached
+
+    def view(self):
+        """Профили как словарь для слияния операций синхронизации."""
+        return _StoreView(self)
+
+    def sync_records(self):
+        """Состояния синхронизации пользователей для artix_sync.Replica."""
+        return _SyncRecords(self)
+
+
+class _StoreView:
+    """Прогресс всех пользователей для artix_sync.Replica.
+
+    items() отдает только загруженные профили: изменения остальных уже
+    записаны. Профиль, полученный через get(), считается измененным.
+    """
+
+    def __init__(self, store):
+        self.store = store
+
+    def items(self):
+        return self.store.cached_profiles()
+
+    def get(self, user, default=None):
+        profile = self.store.get(user)
+        if profile is None:
+            return default
+        self.store.mark_dirty(user)
+        return profile
+
+    def __setitem__(self, user, profile):
+        self.store.put(user, profile)
+
+
+class _SyncRecords:
+    """Состояния синхронизации пользователей в файлах рядом с профилями."""
+
+    def __init__(self, store):
+        self.store = store
+
+    def get(self, user):
+        return self.store.sync_record(user)
+
+    def changed(self, user):
+        self.store.mark_sync_dirty(user)
+
+    def flush(self):
+        self.store.flush_sync()
+
+
+class Session:
+    """Состояние одного ученика на время работы с тренажером.
+
+    Args:
+        store (ProfileStore): Хранилище профилей
+        user (str): Имя пользователя
+
+    Профиль закреплен в хранилище, пока сессия не закрыта. Для нового
+    пользователя progress - пустой словарь, is_new - True.
+    """
+
+    def __init__(self, store, user):
+        self.store = store
+        self.user = user
+        profile = store.acquire(user)
+        self.is_new = profile is None
+        self.progress = {} if profile is None else profile
+        # Записи журнала этой сессии для отчета на почту
+        self.log = []
+        # Команды, введенные в этой сессии: история readline общая для
+        # процесса, поэтому перед вводом загружается эта (artix_completion)
+        self.history = []
+
+    def save(self):
+        self.store.put(self.user, self.progress)
+        self.store.save(self.user)
+
+    def close(self):
+        # Профиль мог меняться на месте после последнего save()
+        self.store.mark_dirty(self.user)
+        self.store.release(self.user)
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Профили пользователей тренажера")
+    parser.add_argument("mode", choices=["list"], help="режим работы")
+    parser.add_argument("--profiles", default=PROFILES_DIR, help="каталог профилей")
+    args = parser.parse_args()
+
+    store = ProfileStore(args.profiles)
+    count = 0
+    for user, progress in store.iter_profiles():
+        count += 1
+        stats = progress.get('session_stats', {})
+        print(f"{user[:30]:<30} заданий {len(progress.get('completed_tasks', [])):>4}, "
+              f"последний вход {stats.get('last_login', '—')}")
+    print(f"Профилей: {count}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,297 @@
+"""
+История попыток тестов и сводная статистика по уровням.
+
+Каждый ответ на вопрос теста дописывается строкой JSON в журнал попыток
+(test_attempts.jsonl): журнал только растет и не переписывается. Сводка
+по уровню (лучший и средний результат, время ответа, частые ошибки)
+обновляется инкрементально в профиле пользователя, поэтому экрану
+прогресса и отчетам по группе не нужно перечитывать журнал.
+
+Время ответа хранится гистограммой с логарифмическими корзинами: размер
+сводки не зависит от числа ответов, а p50/p90 получаются с точностью
+около 10%.
+
+Запуск:
+    python artix_stats.py report              # сводка по всем пользователям
+    python artix_stats.py report --from-log   # сводка, заново собранная из журнала
+"""
+
+import hashlib
+import json
+import math
+import os
+import time
+import uuid
+
+from artix_paths import state_path
+
+ATTEMPTS_FILE = os.getenv("ARTIX_ATTEMPTS_FILE") or state_path("test_attempts.jsonl")
+
+# Корзины гистограммы: границы растут в LATENCY_BASE раз
+LATENCY_BASE = 1.2
+LATENCY_MIN_MS = 100
+
+# Сколько частых ошибок показывать
+TOP_MISSED = 3
+
+
+def question_key(question_text):
+    """Стабильный короткий ключ вопроса: не зависит от порядка вопросов в тесте."""
+    return hashlib.sha1(question_text.encode('utf-8')).hexdigest()[:12]
+
+
+# --- ГИСТОГРАММА ВРЕМЕНИ ОТВЕТА ---
+
+def latency_bucket(ms):
+    """Номер логарифмической корзины для времени ответа в миллисекундах."""
+    if ms <= LATENCY_MIN_MS:
+        return 0
+    return int(math.log(ms / LATENCY_MIN_MS, LATENCY_BASE)) + 1
+
+
+def bucket_value(bucket):
+    """Представитель корзины: середина ее границ в логарифмической шкале."""
+    if bucket == 0:
+        return LATENCY_MIN_MS
+    return LATENCY_MIN_MS * LATENCY_BASE ** (bucket - 0.5)
+
+
+def histogram_percentile(histogram, fraction):
+    """Процентиль по гистограмме {номер корзины (str): число ответов}, в мс."""
+    total = sum(histogram.values())
+    if not total:
+        return None
+    rank = fraction * total
+    seen = 0
+    for bucket in sorted(histogram, key=int):
+        seen += histogram[bucket]
+        if seen >= rank:
+            return bucket_value(int(bucket))
+    return bucket_value(int(max(histogram, key=int)))
+
+
+# --- СВОДКА ПО УРОВНЮ ---
+
+def new_level_stats():
+    return {
+        'attempts': 0,      # начатые попытки
+        'completed': 0,     # доведенные до конца
+        'best': None,
+        'last': None,
+        'score_sum': 0.0,   # для среднего по завершенным попыткам
+        'answers': 0,
+        'correct': 0,
+        'latency': {},      # гистограмма времени ответа
+        'missed': {},       # ключ вопроса -> число ошибок
+    }
+
+
+def level_stats(user_progress, level):
+    """Сводка пользователя по уровню теста (создается при первом обращении)."""
+    all_stats = user_progress.setdefault('test_stats', {})
+    stats = all_stats.get(str(level))
+    if stats is None:
+        stats = all_stats[str(level)] = new_level_stats()
+    return stats
+
+
+def mean_score(stats):
+    if not stats.get('completed'):
+        return None
+    return stats['score_sum'] / stats['completed']
+
+
+def most_missed(stats, limit=TOP_MISSED):
+    """Ключи вопросов с наибольшим числом ошибок."""
+    missed = stats.get('missed', {})
+    return sorted(missed, key=lambda key: (-missed[key], key))[:limit]
+
+
+# --- ЗАПИСЬ ПОПЫТКИ ---
+
+class TestAttempt:
+    """Одна попытка прохождения теста.
+
+    Дописывает ответы в журнал и одновременно обновляет сводку уровня.
+
+    Args:
+        user (str): Имя пользователя
+        level (str): Уровень теста
+        stats (dict): Сводка уровня из профиля (см. level_stats)
+        path (str): Журнал попыток
+    """
+
+    def __init__(self, user, level, stats, path=ATTEMPTS_FILE):
+        self.id = uuid.uuid4().hex[:12]
+        self.user = user
+        self.level = str(level)
+        self.stats = stats
+        self.path = path
+        self.answered = 0
+        self.correct = 0
+        self._shown_at = None
+        stats['attempts'] += 1
+
+    def question_shown(self):
+        """Отмечает момент показа вопроса (монотонные часы)."""
+        self._shown_at = time.monotonic()
+
+    def record_answer(self, question, chosen, is_correct):
+        """Записывает ответ на вопрос и возвращает время ответа в мс.
+
+        chosen - номер выбранного варианта в исходном порядке вариантов
+        вопроса, а не в показанном пользователю перемешанном.
+        """
+        latency_ms = int((time.monotonic() - self._shown_at) * 1000)
+        key = question_key(question.question)
+
+        self.answered += 1
+        self.correct += bool(is_correct)
+        stats = self.stats
+        stats['answers'] += 1
+        stats['correct'] += bool(is_correct)
+        bucket = str(latency_bucket(latency_ms))
+        stats['latency'][bucket] = stats['latency'].get(bucket, 0) + 1
+        if not is_correct:
+            stats['missed'][key] = stats['missed'].get(key, 0) + 1
+
+        record = {'a': self.id, 'u': self.user, 'l': self.level, 'q': key,
+                  'c': chosen, 'ok': int(bool(is_correct)), 'ms': latency_ms}
+        self._append(record)
+        return latency_ms
+
+    def finish(self, score=None):
+        """Закрывает попытку; score None означает, что тест прерван."""
+        if score is not None:
+            stats = self.stats
+            stats['completed'] += 1
+            stats['score_sum'] += score
+            stats['last'] = score
+            if stats['best'] is None or score > stats['best']:
+                stats['best'] = score
+        self._append({'a': self.id, 'u': self.user, 'l': self.level,
+                      'end': time.strftime("%Y-%m-%d %H:%M:%S"), 'n': self.answered,
+                      'ok': self.correct, 'score': score})
+
+    def _append(self, record):
+        try:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n')
+        except OSError:
+            # Журнал вспомогательный: сводка в профиле сохранится и без него
+            pass
+
+
+def read_attempts(path=ATTEMPTS_FILE):
+    """Записи журнала попыток по одной; битые строки (например, оборванные) пропускаются."""
+    try:
+        f = open(path, 'r', encoding='utf-8')
+    except FileNotFoundError:
+        return
+    with f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(record, dict):
+                yield record
+
+
+def rebuild_stats(records):
+    """Собирает сводки уровней заново из записей журнала.
+
+    Возвращает {пользователь: {уровень: сводка}} в формате level_stats().
+    Нужна, если сводки в профилях потеряны или получены старой версией.
+    Попыткой считается каждый id попытки, встреченный в журнале (в ответе
+    или в записи о завершении). Прерванная попытка, даже без ответов,
+    оставляет запись о завершении с score null: она учитывается в
+    attempts, но не в completed - как и в профиле. Попытка, после
+    которой процесс завершился аварийно до первого ответа, записей не
+    оставляет и не учитывается.
+    """
+    summaries = {}
+    seen_attempts = set()
+    for record in records:
+        user, level = record.get('u'), record.get('l')
+        if user is None or level is None:
+            continue
+        stats = summaries.setdefault(user, {}).get(str(level))
+        if stats is None:
+            stats = summaries[user][str(level)] = new_level_stats()
+        if record.get('a') not in seen_attempts:
+            seen_attempts.add(record.get('a'))
+            stats['attempts'] += 1
+
+        if 'end' in record:
+            score = record.get('score')
+            if score is not None:
+                stats['completed'] += 1
+                stats['score_sum'] += score
+                stats['last'] = score
+                if stats['best'] is None or score > stats['best']:
+                    stats['best'] = score
+            continue
+
+        is_correct = bool(record.get('ok'))
+        stats['answers'] += 1
+        stats['correct'] += is_correct
+        bucket = str(latency_bucket(record.get('ms', 0)))
+        stats['latency'][bucket] = stats['latency'].get(bucket, 0) + 1
+        if not is_correct and record.get('q'):
+            stats['missed'][record['q']] = stats['missed'].get(record['q'], 0) + 1
+    return summaries
+
+
+# --- ОТЧЕТ ПО ГРУППЕ ---
+
+def format_seconds(ms):
+    return '—' if ms is None else f"{ms / 1000:.1f} с"
+
+
+def cohort_report(profiles):
+    """Строки отчета по всем пользователям и уровням из сводок профилей.
+
+    profiles - пары (пользователь, прогресс), например ProfileStore.iter_profiles():
+    профили читаются по одному и не накапливаются в памяти.
+    """
+    lines = []
+    for user, progress in profiles:
+        all_stats = progress.get('test_stats', {})
+        for level in sorted(all_stats, key=str):
+            stats = all_stats[level]
+            mean = mean_score(stats)
+            best = stats.get('best')
+            lines.append(
+                f"{user[:20]:<20} уровень {level}: попыток {stats['attempts']}, "
+                f"лучший {'—' if best is None else f'{best:.0f}%'}, "
+                f"средний {'—' if mean is None else f'{mean:.0f}%'}, "
+                f"ответ p50 {format_seconds(histogram_percentile(stats['latency'], 0.5))}, "
+                f"p90 {format_seconds(histogram_percentile(stats['latency'], 0.9))}"
+            )
+    return lines
+
+
+def main():
+    import argparse
+    from artix_session import PROFILES_DIR, ProfileStore
+
+    parser = argparse.ArgumentParser(description="Статистика тестов тренажера")
+    parser.add_argument("mode", choices=["report"], help="режим работы")
+    parser.add_argument("--profiles", default=PROFILES_DIR, help="каталог профилей пользователей")
+    parser.add_argument("--from-log", action="store_true",
+                        help="собрать сводки заново из журнала попыток, а не из профилей")
+    parser.add_argument("--log", default=ATTEMPTS_FILE, help="журнал попыток (test_attempts.jsonl)")
+    args = parser.parse_args()
+
+    if args.from_log:
+        summaries = rebuild_stats(read_attempts(args.log))
+        profiles = ((user, {'test_stats': summaries[user]}) for user in sorted(summaries))
+    else:
+        profiles = ProfileStore(args.profiles).iter_profiles()
+    for line in cohort_report(profiles) or ["Статистики тестов пока нет."]:
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
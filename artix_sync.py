@@ -0,0 +1,688 @@
+"""
+Синхронизация прогресса между терминалами.
+
+Прогресс хранится в профилях каждого терминала (artix_session.py), а
+сливается как набор CRDT-структур, поэтому порядок обмена не важен и
+повторы безвредны:
+
+- completed_tasks, completed_scenarios, achievements, сессии - только
+  растущие множества (объединение);
+- счетчики в session_stats и test_stats - суммы приращений всех терминалов;
+- лучший результат и last_login - максимум, first_login - минимум;
+- test_results и прочие значения - "побеждает последняя запись" (метка
+  времени, при равенстве - id терминала).
+
+При каждом сохранении прогресс сравнивается с теневой копией последнего
+записанного состояния, и разница превращается в операции с номером
+(id терминала, порядковый номер). Тень и метки LWW хранятся по
+пользователям рядом с профилями (ProfileStore.sync_records()) и
+вытесняются из памяти вместе с ними. Векторные часы - последний номер,
+примененный от каждого терминала. Сервер хранит журнал операций; за один
+обмен терминал отправляет свои операции, которых сервер еще не видел, и
+получает чужие, которых нет у него, - объем обмена зависит от числа
+изменений, а не от размера профиля. Ответ сервера разбит на страницы
+(SYNC_PAGE операций), и терминал запрашивает их, пока не догонит сервер;
+журнал сервера периодически сжимается (compact_ops), чтобы новый терминал
+не получал каждое приращение счетчика по отдельности.
+
+Сервер, доступный не только с этой машины, запускается только с токеном
+ARTIX_SYNC_TOKEN; без токена он слушает лишь loopback.
+
+Запуск:
+    ARTIX_SYNC_TOKEN=... python artix_sync.py serve --host 0.0.0.0   # сервер для терминалов в сети
+    ARTIX_SYNC_SERVER=host:7311 python artix_training.py
+    python artix_sync.py sync                   # разовый обмен без тренажера
+"""
+
+import bisect
+import hmac
+import ipaddress
+import json
+import os
+import socket
+import socketserver
+import threading
+import time
+import uuid
+
+from artix_paths import prepare_state_dir, state_path
+
+SYNC_SERVER = os.getenv("ARTIX_SYNC_SERVER")
+SYNC_TOKEN = os.getenv("ARTIX_SYNC_TOKEN", "")
+SYNC_TIMEOUT = float(os.getenv("ARTIX_SYNC_TIMEOUT", "3"))
+DEFAULT_PORT = 7311
+
+STATE_FILE = state_path('sync_state.json')
+LOG_FILE = state_path('sync_log.jsonl')
+SERVER_LOG_FILE = state_path('sync_server.jsonl')
+
+# Предел одного сообщения протокола (строки JSON)
+MAX_MESSAGE = 16 * 1024 * 1024
+# Операций в одном сообщении; страница ответа сервера к тому же не больше
+# четверти MAX_MESSAGE
+SYNC_PAGE = 2000
+PAGE_BYTES = MAX_MESSAGE // 4
+# Журнал сервера сжимается, когда вырос вдвое с прошлого сжатия и больше этого
+COMPACT_THRESHOLD = 4 * 1024 * 1024
+# Сколько сервер ждет запрос от подключившегося терминала (секунды)
+CLIENT_TIMEOUT = 10
+
+# --- ПРАВИЛА СЛИЯНИЯ ---
+
+GSET, COUNTER, MAX, MIN, LWW = 'add', 'inc', 'max', 'min', 'set'
+# Создание пустого поля, если его еще нет
+CREATE = 'new'
+
+_MISSING = object()
+
+# Путь в USER_PROGRESS -> способ слияния; '*' - любой ключ. Пути без правила
+# разбираются вглубь, если значение - словарь, иначе сливаются как LWW.
+MERGE_RULES = (
+    (('*', 'completed_tasks'), GSET),
+    (('*', 'completed_scenarios'), GSET),
+    (('*', 'achievements'), GSET),
+    (('*', 'test_results', '*'), LWW),
+    (('*', 'session_stats', 'first_login'), MIN),
+    (('*', 'session_stats', 'last_login'), MAX),
+    (('*', 'session_stats', 'sessions'), GSET),
+    (('*', 'session_stats', '*'), COUNTER),
+    (('*', 'test_stats', '*', 'best'), MAX),
+    (('*', 'test_stats', '*', 'last'), LWW),
+    (('*', 'test_stats', '*', 'latency', '*'), COUNTER),
+    (('*', 'test_stats', '*', 'missed', '*'), COUNTER),
+    (('*', 'test_stats', '*', '*'), COUNTER),
+)
+
+
+class SyncError(Exception):
+    """Сервер синхронизации недоступен или ответил ошибкой."""
+
+
+def merge_kind(path):
+    for pattern, kind in MERGE_RULES:
+        if len(pattern) == len(path) and all(p == '*' or p == key for p, key in zip(pattern, path)):
+            return kind
+    return None
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _member_key(item):
+    return json.dumps(item, sort_keys=True, ensure_ascii=False)
+
+
+def _is_empty(value, kind):
+    return value is None or value == {} or value == [] or (kind == COUNTER and value == 0)
+
+
+def diff_progress(old, new, path=()):
+    """Операции (kind, path, value), переводящие old в new."""
+    ops = []
+    kind = merge_kind(path) if path else None
+    if old is _MISSING and _is_empty(new, kind):
+        # Пустые поля тоже переносятся: код тренажера ждет их в профиле
+        ops.append((CREATE, path, new))
+    # Словари разбираются по ключам, кроме LWW-записей вроде test_results
+    elif isinstance(new, dict) and kind != LWW:
+        old = old if isinstance(old, dict) else {}
+        for key, value in new.items():
+            ops.extend(diff_progress(old.get(key, _MISSING), value, path + (key,)))
+    elif kind == GSET and isinstance(new, list):
+        seen = {_member_key(item) for item in old} if isinstance(old, list) else set()
+        ops.extend((GSET, path, item) for item in new if _member_key(item) not in seen)
+    elif kind == COUNTER and _is_number(new) and (old is _MISSING or _is_number(old)):
+        base = 0 if old is _MISSING else old
+        if new > base:
+            ops.append((COUNTER, path, new - base))
+    elif new != old and new is not None:
+        ops.append((kind if kind in (MAX, MIN) else LWW, path, new))
+    return ops
+
+
+def _stamp_key(path):
+    return json.dumps(path, ensure_ascii=False)
+
+
+def apply_op(roots, op, stamps):
+    """Применяет операцию к каждому из словарей roots (прогресс и его тень)."""
+    kind, path, value = op['k'], op['p'], op['v']
+    if kind == LWW:
+        stamp = [op['t'], op['r']]
+        key = _stamp_key(path)
+        if key in stamps and stamps[key] >= stamp:
+            return
+        stamps[key] = stamp
+    for root in roots:
+        # У каждого корня своя копия значения: иначе изменение прогресса на
+        # месте изменило бы и тень, и record() не увидел бы разницы
+        value = _snapshot(op['v']) if isinstance(op['v'], (dict, list)) else op['v']
+        node = root
+        for key in path[:-1]:
+            child = node.get(key)
+            if not isinstance(child, dict):
+                child = node[key] = {}
+            node = child
+        leaf, current = path[-1], node.get(path[-1])
+        if kind == CREATE:
+            node.setdefault(leaf, value)
+        elif kind == GSET:
+            items = node.setdefault(leaf, [])
+            if value not in items:
+                items.append(value)
+        elif kind == COUNTER:
+            node[leaf] = (current if _is_number(current) else 0) + value
+        elif kind == MAX:
+            if current is None or value > current:
+                node[leaf] = value
+        elif kind == MIN:
+            if current is None or value < current:
+                node[leaf] = value
+        else:
+            node[leaf] = value
+
+
+def _op_parts(op):
+    """Операции внутри op: пакет после сжатия или сама операция."""
+    return op.get('b') or (op,)
+
+
+def compact_ops(ops, limit=SYNC_PAGE):
+    """Сворачивает подряд идущие операции одного терминала в пакеты.
+
+    Пакет {'r', 'f', 's', 'b'} заменяет операции с номерами f..s и
+    применяется так же, как они по порядку: приращения счетчика
+    складываются, повторные добавления в множество, создания поля и
+    максимумы/минимумы схлопываются, из LWW-записей одного пути остается
+    последняя. Запись в путь закрывает свертку для вложенных путей и других
+    видов операций в нем, чтобы не переставить операции через нее. В
+    пакете не больше limit частей.
+    """
+    batches = []
+    parts, slots, lww, first = [], {}, {}, None
+    for op in ops:
+        if first is None:
+            first = op.get('f', op['s'])
+        for part in _op_parts(op):
+            part = {key: part[key] for key in ('k', 'p', 'v', 't') if key in part}
+            kind, path = part['k'], tuple(part['p'])
+            slot = (path, kind, _member_key(part['v'])) if kind == GSET else (path, kind)
+            if kind == LWW:
+                # Более поздняя запись того же пути перекрывает раннюю при любом исходе
+                if path in lww:
+                    parts[lww[path]] = None
+                lww[path] = len(parts)
+            elif slot in slots:
+                target = parts[slots[slot]]
+                if kind == COUNTER:
+                    target['v'] += part['v']
+                elif kind == MAX:
+                    target['v'] = max(target['v'], part['v'])
+                elif kind == MIN:
+                    target['v'] = min(target['v'], part['v'])
+                continue
+            for other in [other for other in slots
+                          if other[0][:len(path)] == path and (len(other[0]) > len(path) or other[1] != kind)]:
+                del slots[other]
+            if kind != LWW:
+                slots[slot] = len(parts)
+            parts.append(part)
+        if len(parts) >= limit:
+            batches.append({'r': op['r'], 'f': first, 's': op['s'], 'b': [p for p in parts if p is not None]})
+            parts, slots, lww, first = [], {}, {}, None
+    if first is not None:
+        batches.append({'r': ops[-1]['r'], 'f': first, 's': ops[-1]['s'], 'b': [p for p in parts if p is not None]})
+    return batches
+
+
+def _snapshot(progress):
+    return json.loads(json.dumps(progress))
+
+
+def _write_json_atomic(path, data):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(tmp_path, path)
+
+
+def _read_jsonl(path):
+    """Строки журнала; оборванная последняя строка пропускается."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            lines = f.readlines()
+    except FileNotFoundError:
+        return []
+    records = []
+    for line in lines:
+        try:
+            records.append(json.loads(line))
+        except ValueError:
+            continue
+    return records
+
+
+# --- ТЕРМИНАЛ ---
+
+class _StateRecords:
+    """Состояния синхронизации всех пользователей внутри state_file.
+
+    Используется без хранилища профилей (например, для словаря прогресса
+    в тестах); тренажер передает ProfileStore.sync_records().
+    """
+
+    def __init__(self, users):
+        self.users = users
+
+    def get(self, user):
+        return self.users.setdefault(user, {})
+
+    def changed(self, user):
+        pass
+
+    def flush(self):
+        pass
+
+
+class Replica:
+    """Состояние синхронизации одного терминала.
+
+    Args:
+        state_file (str): id терминала, векторные часы и смещение первой
+            неподтвержденной операции в журнале
+        log_file (str): Журнал операций этого терминала (только дозапись)
+        records: Состояния пользователей - {'shadow': теневая копия
+            профиля, 'stamps': метки LWW} - с методами get(user),
+            changed(user) и flush(), например ProfileStore.sync_records().
+            None - хранить их в state_file.
+    """
+
+    def __init__(self, state_file=STATE_FILE, log_file=LOG_FILE, records=None):
+        self.state_file = state_file
+        self.log_file = log_file
+        try:
+            with open(state_file, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (FileNotFoundError, ValueError):
+            state = {}
+        self.id = state.get('replica') or uuid.uuid4().hex[:12]
+        self.clock = state.get('clock', {})
+        # Часы сервера на момент последнего обмена: что ему уже отправлено
+        self.peer_clock = state.get('peer_clock', {})
+        # Байтовое смещение в журнале, до которого все операции подтверждены сервером
+        self.log_offset = state.get('log_offset', 0)
+        self.records = _StateRecords(state.get('users', {})) if records is None else records
+        if 'shadow' in state or 'stamps' in state:
+            self._migrate(state.get('shadow', {}), state.get('stamps', {}))
+
+    def _migrate(self, shadow, stamps):
+        """Переносит общую тень и метки прежнего sync_state.json по пользователям."""
+        for user, profile in shadow.items():
+            self.records.get(user).setdefault('shadow', profile)
+            self.records.changed(user)
+        for key, stamp in stamps.items():
+            user = json.loads(key)[0]
+            self.records.get(user).setdefault('stamps', {})[key] = stamp
+            self.records.changed(user)
+        self.save()
+
+    def save(self):
+        state = {'replica': self.id, 'clock': self.clock, 'peer_clock': self.peer_clock,
+                 'log_offset': self.log_offset}
+        if isinstance(self.records, _StateRecords):
+            state['users'] = self.records.users
+        _write_json_atomic(self.state_file, state)
+        self.records.flush()
+
+    def record(self, progress):
+        """Записывает изменения прогресса с прошлого вызова как операции.
+
+        progress может содержать не всех пользователей (например, только
+        профиль текущей сессии): тень остальных не меняется.
+        """
+        changes = []
+        for user, profile in progress.items():
+            changes.extend(diff_progress(self.records.get(user).get('shadow', _MISSING), profile, (user,)))
+        if not changes:
+            return 0
+        seq = self.clock.get(self.id, 0)
+        now = round(time.time(), 3)
+        ops = []
+        for kind, path, value in changes:
+            seq += 1
+            op = {'r': self.id, 's': seq, 'k': kind, 'p': list(path), 'v': value}
+            if kind == LWW:
+                op['t'] = now
+                self.records.get(path[0]).setdefault('stamps', {})[_stamp_key(op['p'])] = [now, self.id]
+            ops.append(op)
+        with open(self.log_file, 'a', encoding='utf-8') as f:
+            f.writelines(json.dumps(op, ensure_ascii=False, separators=(',', ':')) + '\n' for op in ops)
+        self.clock[self.id] = seq
+        for user, profile in progress.items():
+            self.records.get(user)['shadow'] = _snapshot(profile)
+            self.records.changed(user)
+        self.save()
+        return len(ops)
+
+    def unsent_ops(self, limit=None):
+        """Свои операции, которых сервер еще не подтвердил (не больше limit).
+
+        Журнал читается с log_offset; подтвержденные строки в его начале
+        пропускаются, и смещение сдвигается за них (сохраняется в save()).
+        """
+        sent = self.peer_clock.get(self.id, 0)
+        ops = []
+        try:
+            f = open(self.log_file, 'rb')
+        except FileNotFoundError:
+            self.log_offset = 0
+            return ops
+        with f:
+            if self.log_offset > os.fstat(f.fileno()).st_size:
+                # Журнал заменен или обрезан - читаем заново
+                self.log_offset = 0
+            f.seek(self.log_offset)
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break  # оборванная последняя строка
+                try:
+                    op = json.loads(line)
+                except ValueError:
+                    op = None
+                if isinstance(op, dict) and op.get('r') == self.id and op.get('s', 0) > sent:
+                    ops.append(op)
+                    if limit is not None and len(ops) >= limit:
+                        break
+                elif not ops:
+                    self.log_offset += len(line)
+        return ops
+
+    def merge(self, progress, ops):
+        """Применяет чужие операции к прогрессу; возвращает число примененных.
+
+        progress - словарь пользователей или ProfileStore.view(): профили
+        затронутых пользователей подгружаются по одному.
+        """
+        applied = 0
+        for op in ops:
+            origin, first = op['r'], op.get('f', op['s'])
+            if origin == self.id or first != self.clock.get(origin, 0) + 1:
+                continue  # уже применена или пришла не по порядку
+            for part in _op_parts(op):
+                self._apply(progress, dict(part, r=origin))
+            self.clock[origin] = op['s']
+            applied += op['s'] - first + 1
+        return applied
+
+    def _apply(self, progress, op):
+        user = op['p'][0]
+        record = self.records.get(user)
+        # Тень пользователя - корень с тем же путем, что и прогресс
+        shadow = {user: record['shadow']} if 'shadow' in record else {}
+        apply_op((progress, shadow), op, record.setdefault('stamps', {}))
+        if user in shadow:
+            record['shadow'] = shadow[user]
+        self.records.changed(user)
+
+
+def parse_address(address):
+    host, _, port = address.rpartition(':')
+    if not host:
+        return address, DEFAULT_PORT
+    return host.strip('[]'), int(port)
+
+
+def request(address, message, timeout=SYNC_TIMEOUT):
+    """Один запрос к серверу: строка JSON туда, строка JSON обратно."""
+    try:
+        with socket.create_connection(parse_address(address), timeout=timeout) as sock:
+            sock.sendall(json.dumps(message, ensure_ascii=False).encode('utf-8') + b'\n')
+            with sock.makefile('rb') as reader:
+                line = reader.readline(MAX_MESSAGE)
+    except (OSError, ValueError) as e:
+        raise SyncError(f"сервер {address} недоступен: {e}") from e
+    if not line.endswith(b'\n'):
+        raise SyncError(f"ответ сервера {address} оборван или больше {MAX_MESSAGE} байт")
+    try:
+        reply = json.loads(line)
+    except ValueError:
+        raise SyncError(f"сервер {address} прислал неверный ответ") from None
+    if 'error' in reply:
+        raise SyncError(reply['error'])
+    return reply
+
+
+def sync(replica, progress, address, token=SYNC_TOKEN, timeout=SYNC_TIMEOUT):
+    """Обмен с сервером; возвращает число полученных операций.
+
+    Перед обменом записываются несохраненные изменения, чтобы чужие
+    LWW-записи не затерли их без метки. Операции идут страницами по
+    SYNC_PAGE в обе стороны, пока терминал не догонит сервер; часы
+    сохраняются после каждой страницы.
+    """
+    replica.record(progress)
+    applied = 0
+    while True:
+        outgoing = replica.unsent_ops(SYNC_PAGE)
+        sent = replica.peer_clock.get(replica.id, 0)
+        reply = request(address, {'token': token, 'replica': replica.id, 'clock': replica.clock,
+                                  'ops': outgoing}, timeout)
+        received = replica.merge(progress, reply.get('ops', []))
+        applied += received
+        replica.peer_clock = reply.get('clock', {})
+        replica.save()
+        more_to_send = len(outgoing) == SYNC_PAGE and replica.peer_clock.get(replica.id, 0) > sent
+        if not reply.get('more') and not more_to_send:
+            return applied
+        if reply.get('more') and not received:
+            raise SyncError("сервер прислал операции не по порядку")
+
+
+# --- СЕРВЕР ---
+
+def _encode(op):
+    return json.dumps(op, ensure_ascii=False, separators=(',', ':'))
+
+
+class SyncStore:
+    """Журнал операций всех терминалов в памяти и в файле (только дозапись).
+
+    Рядом с журналом (<журнал>.terminals) хранятся часы, на которых может
+    стоять каждый терминал: запрошенные при последнем обмене и после
+    отправленной ему страницы. Сжатие сворачивает операции только между
+    этими точками, поэтому любой терминал получает пакеты целиком.
+    """
+
+    def __init__(self, log_file=SERVER_LOG_FILE):
+        self.log_file = log_file
+        self.terminals_file = f"{log_file}.terminals"
+        self.lock = threading.Lock()
+        self.ops = {}  # id терминала -> операции (и пакеты) по порядку номеров
+        self._starts = {}  # id терминала -> первый номер каждой операции из ops
+        for op in _read_jsonl(log_file):
+            self._accept(op)
+        try:
+            with open(self.terminals_file, 'r', encoding='utf-8') as f:
+                self.terminals = json.load(f)
+        except (FileNotFoundError, ValueError):
+            self.terminals = {}
+        self.log_size = os.path.getsize(log_file) if os.path.exists(log_file) else 0
+        self.compacted_size = 0
+        if self.log_size > COMPACT_THRESHOLD:
+            self.compact()
+
+    def _accept(self, op):
+        ops = self.ops.get(op['r'], ())
+        first = op.get('f', op['s'])
+        if first != (ops[-1]['s'] if ops else 0) + 1 or op['s'] < first:
+            return False
+        self.ops.setdefault(op['r'], []).append(op)
+        self._starts.setdefault(op['r'], []).append(first)
+        return True
+
+    def clock(self):
+        return {origin: ops[-1]['s'] for origin, ops in self.ops.items() if ops}
+
+    def _after(self, origin, seq):
+        """Индекс первой операции терминала origin после номера seq."""
+        return bisect.bisect_right(self._starts[origin], seq)
+
+    def exchange(self, clock, incoming, terminal=''):
+        """Принимает операции терминала и возвращает страницу тех, которых у него нет.
+
+        Возвращает (операции, часы сервера, есть ли еще страницы).
+        """
+        incoming = [op for op in incoming
+                    if isinstance(op, dict) and isinstance(op.get('r'), str) and isinstance(op.get('s'), int)
+                    and isinstance(op.get('f', op['s']), int)]
+        with self.lock:
+            accepted = [op for op in incoming if self._accept(op)]
+            if accepted:
+                lines = [_encode(op) + '\n' for op in accepted]
+                with open(self.log_file, 'a', encoding='utf-8') as f:
+                    f.writelines(lines)
+                self.log_size += sum(len(line.encode('utf-8')) for line in lines)
+            page, parts, size, more = [], 0, 0, False
+            reached = {origin: seq for origin, seq in clock.items() if origin in self.ops}
+            for origin, ops in self.ops.items():
+                for op in ops[self._after(origin, clock.get(origin, 0)):]:
+                    if page and (parts >= SYNC_PAGE or size >= PAGE_BYTES):
+                        more = True
+                        break
+                    page.append(op)
+                    parts += len(_op_parts(op))
+                    size += len(_encode(op))
+                    reached[origin] = op['s']
+                if more:
+                    break
+            self._remember(terminal, clock, reached)
+            if self.log_size > max(COMPACT_THRESHOLD, 2 * self.compacted_size):
+                self.compact()
+            return page, self.clock(), more
+
+    def _remember(self, terminal, requested, reached):
+        """Запоминает часы, на которых терминал может оказаться после обмена."""
+        points = [{origin: seq for origin, seq in requested.items() if origin in self.ops and seq}, reached]
+        if self.terminals.get(terminal) != points:
+            self.terminals[terminal] = points
+            _write_json_atomic(self.terminals_file, self.terminals)
+
+    def compact(self):
+        """Сворачивает операции каждого терминала между известными часами."""
+        for origin, ops in self.ops.items():
+            last = ops[-1]['s']
+            bounds = sorted({0, last} | {clock.get(origin, 0) for points in self.terminals.values()
+                                         for clock in points if clock.get(origin, 0) <= last})
+            compacted = []
+            for low, high in zip(bounds, bounds[1:]):
+                chunk = ops[self._after(origin, low):self._after(origin, high)]
+                if not chunk or chunk[0].get('f', chunk[0]['s']) != low + 1 or chunk[-1]['s'] != high:
+                    compacted.extend(chunk)  # граница внутри пакета: оставляем как есть
+                elif len(chunk) == 1:
+                    compacted.extend(chunk)
+                else:
+                    compacted.extend(compact_ops(chunk))
+            self.ops[origin] = compacted
+            self._starts[origin] = [op.get('f', op['s']) for op in compacted]
+        tmp_path = f"{self.log_file}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for ops in self.ops.values():
+                f.writelines(_encode(op) + '\n' for op in ops)
+        os.replace(tmp_path, self.log_file)
+        self.log_size = self.compacted_size = os.path.getsize(self.log_file)
+
+
+def is_loopback(host):
+    """Адрес доступен только с этой машины (все адреса имени - loopback)."""
+    try:
+        infos = socket.getaddrinfo(host, None)
+    except (socket.gaierror, UnicodeError):
+        return False
+    return bool(infos) and all(ipaddress.ip_address(info[4][0].split('%')[0]).is_loopback for info in infos)
+
+
+def token_matches(received, expected):
+    """Сравнение токена за постоянное время."""
+    if not isinstance(received, str):
+        return False
+    return hmac.compare_digest(received.encode('utf-8'), expected.encode('utf-8'))
+
+
+class _SyncHandler(socketserver.StreamRequestHandler):
+    # Замолчавший клиент не держит поток обработчика бесконечно
+    timeout = CLIENT_TIMEOUT
+
+    def handle(self):
+        try:
+            message = json.loads(self.rfile.readline(MAX_MESSAGE))
+            if not token_matches(message.get('token', ''), self.server.token):
+                reply = {'error': 'неверный токен синхронизации'}
+            else:
+                ops, clock, more = self.server.store.exchange(
+                    message.get('clock', {}), message.get('ops', []), str(message.get('replica', '')))
+                reply = {'clock': clock, 'ops': ops, 'more': more}
+        except OSError:
+            return  # клиент отключился или не прислал запрос вовремя
+        except (ValueError, KeyError, TypeError, AttributeError):
+            reply = {'error': 'неверный запрос'}
+        try:
+            self.wfile.write(json.dumps(reply, ensure_ascii=False).encode('utf-8') + b'\n')
+        except OSError:
+            pass
+
+
+class SyncServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address, store, token=SYNC_TOKEN):
+        if not token and not is_loopback(address[0]):
+            raise SyncError(f"сервер на {address[0]} доступен по сети: задайте ARTIX_SYNC_TOKEN "
+                            "или слушайте 127.0.0.1")
+        self.store = store
+        self.token = token
+        super().__init__(address, _SyncHandler)
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Синхронизация прогресса между терминалами")
+    parser.add_argument("mode", choices=["serve", "sync"], help="режим работы")
+    parser.add_argument("--host", default="127.0.0.1", help="адрес сервера (serve)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="порт сервера (serve)")
+    parser.add_argument("--log", default=SERVER_LOG_FILE, help="журнал операций сервера (serve)")
+    parser.add_argument("--server", default=SYNC_SERVER, help="адрес host:port сервера (sync)")
+    args = parser.parse_args()
+
+    prepare_state_dir()
+    if args.mode == "serve":
+        store = SyncStore(args.log)
+        try:
+            server = SyncServer((args.host, args.port), store)
+        except SyncError as e:
+            raise SystemExit(f"Сервер не запущен: {e}")
+        with server:
+            print(f"Сервер синхронизации {args.host}:{args.port}, терминалов в журнале: {len(store.ops)}")
+            try:
+                server.serve_forever()
+            except KeyboardInterrupt:
+                pass
+        return
+
+    if not args.server:
+        parser.error("укажите --server или ARTIX_SYNC_SERVER")
+    from artix_session import ProfileStore
+    store = ProfileStore()
+    replica = Replica(records=store.sync_records())
+    try:
+        received = sync(replica, store.view(), args.server)
+    except SyncError as e:
+        raise SystemExit(f"Синхронизация не удалась: {e}")
+    store.flush()
+    print(f"Получено операций: {received}, терминал {replica.id}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,17 @@
 
-import smtplib
 import os
 import random
 import datetime
-import re
 import json
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+import threading
+
+from artix_content import ContentValidationError, diff_content
+from artix_keys import pause, read_choice
+from artix_paths import APP_DIR, CONTENT_PACKS_DIR, prepare_state_dir, state_path
+from artix_session import ProfileStore, Session
+
+# smtplib и email.mime не импортируются при запуске (см. send_report_email()):
+# вместе с ssl и socket они занимают большую часть времени запуска.
 
 # --- ЦВЕТОВЫЕ КОДЫ ДЛЯ КРАСИВОГО ВЫВОДА ---
 class Colors:
@@ -34,39 +39,186 @@ SMTP_PORT = os.getenv("SMTP_PORT", 587)
 SMTP_LOGIN = os.getenv("SMTP_LOGIN")
 SMTP_PASSWORD = os.getenv("SMTP_PASSWORD")
 
-SESSION_LOG = []
-USER_PROGRESS = {}
-CURRENT_USER = ""
+# Проверка ответов выполнением команд в песочнице (см. artix_sandbox.py)
+EXEC_GRADING = os.getenv("ARTIX_EXEC_GRADING") == "1"
+
+# Перечитывать training_data.json при его изменении во время работы
+HOT_RELOAD = os.getenv("ARTIX_HOT_RELOAD", "1") != "0"
+# Контент ищется рядом со скриптом, а не в текущем каталоге
+TRAINING_DATA_FILE = os.path.join(APP_DIR, 'training_data.json')
+
+# Состояние пользователей - в каталоге данных (см. artix_paths.py);
+# профили - в profiles/, по файлу на пользователя (см. artix_session.py)
+LOG_FILE = state_path('training_log.txt')
+
+# Публиковать события прогресса в ленту преподавателя (см. artix_feed.py)
+LIVE_FEED = os.getenv("ARTIX_LIVE_FEED", "1") != "0"
+
+# Сервер синхронизации прогресса между терминалами, host:port (см. artix_sync.py)
+SYNC_SERVER = os.getenv("ARTIX_SYNC_SERVER")
+
+# Хранилище профилей процесса; сессии пользователей - объекты Session
+PROFILE_STORE = None
 
 # --- УПРАВЛЕНИЕ ДАННЫМИ ---
 
+def read_training_data(path=TRAINING_DATA_FILE):
+    """Читает учебные данные и возвращает модель контента.
+
+    Если рядом лежит артефакт artix_compiler.py, собранный из этих же байтов
+    JSON, берется готовая модель; иначе JSON проверяется по схеме и
+    разбирается заново (ContentValidationError при ошибках). Если JSON нет,
+    но тренажер запущен из zipapp, берется встроенный в архив артефакт.
+    Затем применяются пакеты обновлений из CONTENT_PACKS_DIR.
+    """
+    from artix_compiler import load_content, load_embedded_content
+    content = None
+    if not os.path.exists(path):
+        content = load_embedded_content()
+    if content is None:
+        content = load_content(path)
+    # Пакеты обновлений поверх базовой версии (см. artix_packs.py)
+    if os.path.isdir(CONTENT_PACKS_DIR):
+        from artix_packs import apply_packs
+        content, applied, problems = apply_packs(content, CONTENT_PACKS_DIR)
+        for problem in problems:
+            log_action(None, f"Пакет обновления контента не применен: {problem}", "WARNING")
+    return content
+
 def load_training_data():
-    """Загружает учебные данные из JSON-файла."""
+    """Загружает учебные данные из JSON-файла и строит по ним модель контента."""
     try:
-        with open('training_data.json', 'r', encoding='utf-8') as f:
-            return json.load(f)
+        return read_training_data()
     except FileNotFoundError:
         print(f"{Colors.FAIL}Ошибка: Файл training_data.json не найден.{Colors.ENDC}")
         return None
     except json.JSONDecodeError:
         print(f"{Colors.FAIL}Ошибка: Неверный формат JSON в файле training_data.json.{Colors.ENDC}")
         return None
+    except ContentValidationError as e:
+        print(f"{Colors.FAIL}Ошибка: training_data.json не прошел проверку:{Colors.ENDC}")
+        for issue in e.issues:
+            print(f"  {issue}")
+        print(f"Подробнее: {Colors.BOLD}python artix_compiler.py --check{Colors.ENDC}")
+        return None
 
 def load_user_progress():
-    """Загружает прогресс пользователей."""
-    global USER_PROGRESS
+    """Открывает хранилище профилей; старый user_progress.json переносится в него."""
+    global PROFILE_STORE
+    PROFILE_STORE = ProfileStore()
+    return PROFILE_STORE
+
+def save_user_progress(session):
+    """Сохраняет профиль пользователя сессии."""
+    session.save()
+    if SYNC_SERVER:
+        # Изменения с прошлого сохранения уходят в журнал операций терминала
+        get_sync_replica().record({session.user: session.progress})
+
+# --- СИНХРОНИЗАЦИЯ ПРОГРЕССА ---
+
+_SYNC_REPLICA = None
+
+def get_sync_replica():
+    global _SYNC_REPLICA
+    if _SYNC_REPLICA is None:
+        from artix_sync import Replica
+        # Тень и метки LWW пользователей живут рядом с профилями и вытесняются с ними
+        _SYNC_REPLICA = Replica(records=PROFILE_STORE.sync_records())
+    return _SYNC_REPLICA
+
+def sync_progress():
+    """Обменивается изменениями прогресса с сервером синхронизации.
+
+    Без сервера тренажер работает как обычно: операции копятся в журнале
+    терминала и уйдут при следующем удачном обмене.
+    """
+    from artix_sync import SyncError, sync
     try:
-        with open('user_progress.json', 'r', encoding='utf-8') as f:
-            USER_PROGRESS = json.load(f)
-    except FileNotFoundError:
-        USER_PROGRESS = {}
+        received = sync(get_sync_replica(), PROFILE_STORE.view(), SYNC_SERVER)
+    except SyncError as e:
+        log_action(None, f"Синхронизация прогресса не удалась: {e}", "WARNING")
+        return False
+    if received:
+        PROFILE_STORE.flush()
+        log_action(None, f"Получено изменений прогресса с других терминалов: {received}.")
+    return True
+
+def start_progress_sync():
+    """Синхронизирует прогресс в фоне, пока пользователь вводит имя."""
+    thread = threading.Thread(target=sync_progress, name="progress-sync", daemon=True)
+    thread.start()
+    return thread
+
+# Учебные данные загружаются при первом обращении, а не при импорте модуля
+TRAINING_DATA = None
+_TRAINING_DATA_LOADED = False
+_TRAINING_DATA_LOCK = threading.Lock()
+
+def get_training_data():
+    """Возвращает учебные данные, загружая их при первом вызове."""
+    global TRAINING_DATA, _TRAINING_DATA_LOADED
+    if not _TRAINING_DATA_LOADED:
+        with _TRAINING_DATA_LOCK:
+            if not _TRAINING_DATA_LOADED:
+                TRAINING_DATA = load_training_data()
+                _TRAINING_DATA_LOADED = True
+    return TRAINING_DATA
+
+# Обработчики смены контента: listener(diff, content) вызывается после подмены
+_CONTENT_LISTENERS = []
+
+def on_content_change(listener):
+    """Регистрирует обработчик горячей перезагрузки (можно как декоратор)."""
+    _CONTENT_LISTENERS.append(listener)
+    return listener
+
+def reload_training_data():
+    """Перечитывает учебные данные и атомарно подменяет их.
 
-def save_user_progress():
-    """Сохраняет прогресс пользователей."""
-    with open('user_progress.json', 'w', encoding='utf-8') as f:
-        json.dump(USER_PROGRESS, f, indent=4, ensure_ascii=False)
+    Производные кеши сбрасываются обработчиками on_content_change только
+    для затронутых модулей, тестов и сценариев. Меню берут контент заново
+    при каждой перерисовке, а начатые задание, тест или сценарий
+    дорабатывают со старой версией.
+    """
+    global TRAINING_DATA
+    old_content = get_training_data()
+    try:
+        new_content = read_training_data()
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        # Файл мог быть сохранен наполовину - оставляем текущую версию
+        log_action(None, f"Не удалось перезагрузить {TRAINING_DATA_FILE}: {e}", "WARNING")
+        return None
+
+    diff = diff_content(old_content, new_content) if old_content is not None else None
+    if diff is not None and not diff:
+        return diff
 
-TRAINING_DATA = load_training_data()
+    with _TRAINING_DATA_LOCK:
+        TRAINING_DATA = new_content
+    if diff is not None:
+        for listener in _CONTENT_LISTENERS:
+            listener(diff, new_content)
+        log_action(None, f"Учебные данные перезагружены: {diff.summary()}")
+    return diff
+
+def start_content_watcher():
+    """Запускает наблюдение за training_data.json и пакетами обновлений."""
+    from artix_watch import FileWatcher
+    watcher = FileWatcher(TRAINING_DATA_FILE, reload_training_data,
+                          directories=(CONTENT_PACKS_DIR,)).start()
+    log_action(None, f"Горячая перезагрузка контента включена ({watcher.mode}).")
+    return watcher
+
+def prefetch_training_data():
+    """Запускает фоновую загрузку учебных данных.
+
+    Пока пользователь вводит имя, разбор JSON идет в отдельном потоке,
+    поэтому первое приглашение появляется без задержки.
+    """
+    thread = threading.Thread(target=get_training_data, name="training-data-prefetch", daemon=True)
+    thread.start()
+    return thread
 
 # --- СИСТЕМА ДОСТИЖЕНИЙ ---
 
@@ -98,20 +250,52 @@ ACHIEVEMENTS = {
     }
 }
 
+# Кеш: id модуля -> множество текстов его заданий
+_MODULE_TASKS = {}
+
+def get_module_tasks(module_id):
+    """Возвращает множество заданий модуля (None, если модуля нет)."""
+    module_tasks = _MODULE_TASKS.get(module_id)
+    if module_tasks is None:
+        training_data = get_training_data()
+        module = training_data.modules_by_id.get(module_id) if training_data else None
+        if module is None:
+            return None
+        module_tasks = frozenset(task.task for command in module.commands for task in command.practice)
+        _MODULE_TASKS[module_id] = module_tasks
+    return module_tasks
+
+@on_content_change
+def _invalidate_module_tasks(diff, content):
+    for module_id in diff.affected_modules():
+        _MODULE_TASKS.pop(module_id, None)
+
 def check_module_completion(progress, module_id):
     """Проверяет завершение всех заданий в модуле."""
-    if not TRAINING_DATA or module_id not in TRAINING_DATA:
+    module_tasks = get_module_tasks(module_id)
+    if module_tasks is None:
         return False
     
-    module_tasks = set()
     completed_tasks = set(progress.get('completed_tasks', []))
     
-    for cmd_data in TRAINING_DATA[module_id].get('commands', {}).values():
-        for task in cmd_data.get('practice', []):
-            module_tasks.add(task['task'])
-    
     return module_tasks.issubset(completed_tasks)
 
+# Кеш: уровень теста -> QuestionSampler с индексом ключей вопросов
+_TEST_SAMPLERS = {}
+
+def get_test_sampler(test_level_data):
+    """Возвращает объект выбора вопросов для уровня теста."""
+    sampler = _TEST_SAMPLERS.get(test_level_data.level)
+    if sampler is None:
+        from artix_sampling import QuestionSampler
+        sampler = _TEST_SAMPLERS[test_level_data.level] = QuestionSampler(test_level_data)
+    return sampler
+
+@on_content_change
+def _invalidate_test_samplers(diff, content):
+    for level in diff.affected_tests():
+        _TEST_SAMPLERS.pop(level, None)
+
 def check_consecutive_days(progress):
     """Проверяет количество последовательных дней занятий."""
     sessions = progress.get('session_stats', {}).get('sessions', [])
@@ -132,8 +316,9 @@ def check_consecutive_days(progress):
             
     return max_streak >= 5
 
-def check_achievements(user_progress):
+def check_achievements(session):
     """Проверяет и обновляет достижения пользователя."""
+    user_progress = session.progress
     if 'achievements' not in user_progress:
         user_progress['achievements'] = []
         
@@ -143,15 +328,23 @@ def check_achievements(user_progress):
             achievement['condition'](user_progress)):
             user_progress['achievements'].append(achievement_id)
             new_achievements.append(achievement)
+            publish_event(session, 'achievement', id=achievement_id)
             
     return new_achievements
 
+def announce_achievements(session):
+    """Проверяет достижения пользователя сессии и поздравляет с новыми."""
+    for achievement in check_achievements(session):
+        print(f"\n{Colors.OKGREEN}🏅 Новое достижение: {achievement['name']}{Colors.ENDC} - {achievement['description']}")
+        log_action(session, f"Получено достижение: {achievement['name']}", "SUCCESS")
+
 # --- ВСПОМОГАТЕЛЬНЫЕ ФУНКЦИИ ---
 
-def log_action(message, category="INFO"):
+def log_action(session, message, category="INFO"):
     """Логирует действия пользователя с категорией и временной меткой.
     
     Args:
+        session (Session): Сессия пользователя; None - событие всего процесса
         message (str): Сообщение для логирования
         category (str): Категория сообщения (INFO, SUCCESS, WARNING, ERROR)
     """
@@ -164,39 +357,44 @@ def log_action(message, category="INFO"):
     }
     color = category_colors.get(category, Colors.ENDC)
     
+    user = session.user if session is not None else "-"
     log_entry = {
         "timestamp": timestamp,
-        "user": CURRENT_USER,
+        "user": user,
         "category": category,
         "message": message
     }
     
-    formatted_entry = f"[{timestamp}] [{color}{category}{Colors.ENDC}] [{CURRENT_USER}] {message}"
-    SESSION_LOG.append(formatted_entry)
+    formatted_entry = f"[{timestamp}] [{color}{category}{Colors.ENDC}] [{user}] {message}"
+    if session is not None:
+        session.log.append(formatted_entry)
     
     # Сохраняем лог в файл
     try:
-        with open('training_log.txt', 'a', encoding='utf-8') as f:
+        with open(LOG_FILE, 'a', encoding='utf-8') as f:
             f.write(formatted_entry + '\n')
     except Exception as e:
         print(f"{Colors.PURPLE}Ошибка при сохранении лога: {e}{Colors.ENDC}")
 
-def send_report_email():
+def send_report_email(session):
     """Отправляет отчет о сессии на почту."""
+    # Почтовый стек (smtplib, email.mime) импортировать здесь, а не в начале
+    # модуля: вместе с ssl и socket он занимает большую часть времени запуска
     pass
 
 def clear_screen():
     os.system('cls' if os.name == 'nt' else 'clear')
 
 def wait_for_enter():
-    input(f"\n{Colors.CYAN}Нажмите Enter, чтобы продолжить...{Colors.ENDC}")
+    pause(f"\n{Colors.CYAN}Нажмите Enter, чтобы продолжить...{Colors.ENDC}",
+          f"\n{Colors.CYAN}Нажмите любую клавишу, чтобы продолжить...{Colors.ENDC}")
 
-def check_answer(user_answer, task_data):
+def check_answer(session, user_answer, task_data):
     """
     Проверяет ответ пользователя, давая контекстные подсказки.
     Возвращает (bool, str): (корректность, сообщение).
     """
-    correct_answer = task_data['solution']
+    correct_answer = task_data.solution
     user_clean = ' '.join(user_answer.lower().split())
     correct_clean = ' '.join(correct_answer.lower().split())
 
@@ -205,13 +403,19 @@ def check_answer(user_answer, task_data):
         return True, f"{Colors.OKGREEN}Правильно!{Colors.ENDC}"
 
     # 2. Симуляция распространенных ошибок из training_data.json
-    if 'error_simulation' in task_data:
-        for sim in task_data['error_simulation']:
-            if user_clean == sim['wrong_input'].lower():
-                log_action(f"Пользователь допустил симулированную ошибку: {sim['wrong_input']}")
-                return False, f"{Colors.FAIL}Неправильно. {sim['message']}{Colors.ENDC}"
+    for sim in task_data.error_simulation:
+        if user_clean == sim.wrong_input.lower():
+            log_action(session, f"Пользователь допустил симулированную ошибку: {sim.wrong_input}")
+            return False, f"{Colors.FAIL}Неправильно. {sim.message}{Colors.ENDC}"
+
+    # 3. Проверка выполнением: другая запись команды с тем же результатом
+    if EXEC_GRADING:
+        from artix_sandbox import grade_by_execution
+        if grade_by_execution(user_answer, correct_answer):
+            log_action(session, f"Ответ '{user_answer}' засчитан по результату выполнения.")
+            return True, f"{Colors.OKGREEN}Правильно! Команда дает тот же результат, что и эталон: {Colors.OKBLUE}{correct_answer}{Colors.ENDC}"
 
-    # 3. Общие контекстные подсказки
+    # 4. Общие контекстные подсказки
     if user_clean.startswith("sudo "):
         return False, f"Неправильно. {Colors.YELLOW}Подсказка: Права суперпользователя (sudo) здесь не требуются.{Colors.ENDC}"
     if '"' in user_answer or "'" in user_answer:
@@ -222,21 +426,74 @@ def check_answer(user_answer, task_data):
     if correct_clean.startswith("rm -r") and not user_clean.startswith("rm -r") and user_clean.startswith("rm "):
          return False, f"Неправильно. {Colors.YELLOW}Подсказка: Для удаления директорий используется флаг '-r'.{Colors.ENDC}"
 
+    # 5. Опечатка: ответ в паре правок от правильного - не раскрываем его
+    from artix_completion import levenshtein, suggestion_threshold
+    if levenshtein(user_clean, correct_clean) <= suggestion_threshold(correct_clean):
+        log_action(session, f"Почти правильный ответ. Пользователь: '{user_answer}', Ожидалось: '{correct_answer}'")
+        return False, f"Неправильно. {Colors.YELLOW}Подсказка: Вы очень близки - проверьте написание команды и флагов.{Colors.ENDC}"
+
     # Общий ответ, если ничего не подошло
-    log_action(f"Неправильный ответ. Пользователь: '{user_answer}', Ожидалось: '{correct_answer}'")
-    return False, f"Неправильно. Правильный ответ: {Colors.OKBLUE}{correct_answer}{Colors.ENDC}"
+    log_action(session, f"Неправильный ответ. Пользователь: '{user_answer}', Ожидалось: '{correct_answer}'")
+    message = f"Неправильно. Правильный ответ: {Colors.OKBLUE}{correct_answer}{Colors.ENDC}"
+    suggestion = get_completion_index().closest(user_clean)
+    if suggestion == user_clean:
+        message = f"{Colors.YELLOW}Эта команда - решение другого задания.{Colors.ENDC}\n{message}"
+    elif suggestion:
+        message = f"{Colors.YELLOW}Ваш ответ похож на команду: {Colors.BOLD}{suggestion}{Colors.ENDC}\n{message}"
+    return False, message
+
+def get_completion_index():
+    """Возвращает индекс автодополнения и подсказок, строя его при первом вызове."""
+    global _COMPLETION_INDEX
+    if _COMPLETION_INDEX is None:
+        from artix_completion import CompletionIndex
+        _COMPLETION_INDEX = CompletionIndex(get_training_data())
+    return _COMPLETION_INDEX
+
+_COMPLETION_INDEX = None
+
+@on_content_change
+def _invalidate_completion_index(diff, content):
+    global _COMPLETION_INDEX
+    # Индекс строится по решениям и блокам params - модули и тесты его не касаются
+    if diff.commands or diff.tasks or diff.scenarios:
+        _COMPLETION_INDEX = None
+
+def read_answer(session, prompt):
+    """Читает ответ-команду с историей сессии и автодополнением по Tab."""
+    from artix_completion import read_command
+    return read_command(prompt, get_completion_index(), session.history)
+
+# --- ЛЕНТА ДЛЯ ПРЕПОДАВАТЕЛЯ ---
+
+_FEED_PUBLISHER = None
+
+def publish_event(session, kind, **fields):
+    """Отправляет событие прогресса в ленту преподавателя.
+
+    Отправка не блокирует: событие уходит в очередь фонового потока и
+    отбрасывается, если очередь полна или брокер не запущен.
+    """
+    global _FEED_PUBLISHER
+    if not LIVE_FEED:
+        return
+    if _FEED_PUBLISHER is None:
+        import artix_feed
+        if not artix_feed.feed_available():
+            return
+        _FEED_PUBLISHER = artix_feed.EventPublisher()
+    event = {'t': round(datetime.datetime.now().timestamp(), 1), 'u': session.user, 'e': kind}
+    event.update(fields)
+    _FEED_PUBLISHER.publish(event)
 
 # --- ФУНКЦИИ МЕНЮ (ПЕРЕРАБОТАННЫЕ) ---
 
-def run_practice_session(command_data):
+def run_practice_session(session, command_data):
     """
     Запускает практическое задание, начиная с самого легкого из нерешенных.
     """
-    completed_tasks = USER_PROGRESS[CURRENT_USER].get('completed_tasks', [])
-    unsolved_tasks = [
-        t for t in command_data.get('practice', [])
-        if t['task'] not in completed_tasks
-    ]
+    completed_tasks = session.progress.get('completed_tasks', [])
+    unsolved_tasks = [t for t in command_data.practice if t.task not in completed_tasks]
 
     if not unsolved_tasks:
         print(f"{Colors.YELLOW}Вы решили все задания для этой команды!{Colors.ENDC}")
@@ -244,47 +501,45 @@ def run_practice_session(command_data):
         return
 
     # Находим минимальный уровень сложности среди нерешенных задач
-    min_difficulty = min(t['difficulty'] for t in unsolved_tasks)
+    min_difficulty = min(t.difficulty for t in unsolved_tasks)
     
     # Отбираем только задачи этого уровня
-    tasks_to_ask = [t for t in unsolved_tasks if t['difficulty'] == min_difficulty]
+    tasks_to_ask = [t for t in unsolved_tasks if t.difficulty == min_difficulty]
     
     task_data = random.choice(tasks_to_ask)
 
     clear_screen()
-    print(f"{Colors.HEADER}--- Практика: {command_data['name']} ---{Colors.ENDC}")
+    print(f"{Colors.HEADER}--- Практика: {command_data.name} ---{Colors.ENDC}")
     print(f"{Colors.BOLD}Уровень сложности: {min_difficulty}{Colors.ENDC}\n")
-    print(f"{Colors.CYAN}Задание:{Colors.ENDC}\n{task_data['task']}\n")
+    print(f"{Colors.CYAN}Задание:{Colors.ENDC}\n{task_data.task}\n")
     
-    user_answer = input(f"{Colors.YELLOW}Ваш ответ:{Colors.ENDC} ")
-    log_action(f"Пользователь ввел ответ: '{user_answer}' для задания: '{task_data['task']}'")
+    user_answer = read_answer(session, f"{Colors.YELLOW}Ваш ответ:{Colors.ENDC} ")
+    log_action(session, f"Пользователь ввел ответ: '{user_answer}' для задания: '{task_data.task}'")
     
-    is_correct, message = check_answer(user_answer, task_data)
+    is_correct, message = check_answer(session, user_answer, task_data)
+    publish_event(session, 'answer', cmd=command_data.name.split(' - ')[0], ok=is_correct)
     
     print(f"\n{message}\n")
     
     if is_correct:
-        # Инициализируем структуру прогресса, если её нет
-        if CURRENT_USER not in USER_PROGRESS:
-            USER_PROGRESS[CURRENT_USER] = {}
-        
         # Инициализируем список выполненных заданий
-        if 'completed_tasks' not in USER_PROGRESS[CURRENT_USER]:
-            USER_PROGRESS[CURRENT_USER]['completed_tasks'] = []
+        if 'completed_tasks' not in session.progress:
+            session.progress['completed_tasks'] = []
         
         # Добавляем задание в список выполненных
-        if task_data['task'] not in USER_PROGRESS[CURRENT_USER]['completed_tasks']:
-            USER_PROGRESS[CURRENT_USER]['completed_tasks'].append(task_data['task'])
-        save_user_progress()
-        log_action(f"Задание '{task_data['task']}' отмечено как выполненное.")
+        if task_data.task not in session.progress['completed_tasks']:
+            session.progress['completed_tasks'].append(task_data.task)
+        announce_achievements(session)
+        save_user_progress(session)
+        log_action(session, f"Задание '{task_data.task}' отмечено как выполненное.")
         
-        if 'explanation' in task_data:
-            print(f"{Colors.OKGREEN}Пояснение:{Colors.ENDC} {task_data['explanation']}")
+        if task_data.explanation:
+            print(f"{Colors.OKGREEN}Пояснение:{Colors.ENDC} {task_data.explanation}")
     else:
-        log_action("Ответ неправильный.")
+        log_action(session, "Ответ неправильный.")
         wait_for_enter()
 
-def run_test_session():
+def run_test_session(session):
     """Запускает сессию тестирования."""
     clear_screen()
     print(f"{Colors.HEADER}{Colors.BOLD}--- Тестирование ---{Colors.ENDC}\n")
@@ -299,45 +554,61 @@ def run_test_session():
     print(" 0. Назад")
     print("------------------------------------------")
 
-    level_choice = input("\nВыберите тест: ")
+    level_choice = read_choice("\nВыберите тест: ", ['1', '2', '3', '4', '5', '6', '0'])
     if level_choice == '0':
         return
     elif level_choice in ['1', '2', '3', '4', '5', '6']:
-        run_level_test(int(level_choice))
+        run_level_test(session, int(level_choice))
     else:
         print(f"\n{Colors.FAIL}Неверный выбор.{Colors.ENDC}")
         wait_for_enter()
 
-def run_level_test(level):
+def run_level_test(session, level):
     """Запускает тест определенного уровня."""
-    test_level_data = TRAINING_DATA.get('tests', {}).get(str(level), {})
-    if not test_level_data or 'questions' not in test_level_data:
+    test_level_data = get_training_data().tests_by_level.get(str(level))
+    questions = []
+    if test_level_data is not None:
+        from artix_stats import level_stats
+        from artix_sampling import QUESTIONS_PER_ATTEMPT
+
+        stats = level_stats(session.progress, level)
+        # Из банка берем часть вопросов, чаще те, в которых пользователь ошибался
+        questions = get_test_sampler(test_level_data).sample(
+            test_level_data.questions_per_attempt or QUESTIONS_PER_ATTEMPT, stats['missed'])
+    if not questions:
         print(f"{Colors.YELLOW}Тесты для этого уровня пока не добавлены.{Colors.ENDC}")
         wait_for_enter()
         return
 
-    questions = test_level_data['questions']
+    from artix_stats import TestAttempt
+    from artix_sampling import shuffle_options
+
     total_questions = len(questions)
     correct_answers = 0
+    attempt = TestAttempt(session.user, level, stats)
     
     for i, question in enumerate(questions, 1):
         clear_screen()
         print(f"{Colors.HEADER}Вопрос {i} из {total_questions}{Colors.ENDC}\n")
-        print(f"{Colors.CYAN}{question['question']}{Colors.ENDC}\n")
+        print(f"{Colors.CYAN}{question.question}{Colors.ENDC}\n")
         
-        # Показываем варианты ответов
-        options = question['options']
+        # Показываем варианты ответов в случайном порядке
+        options, correct_index, order = shuffle_options(question)
         for j, option in enumerate(options):
             print(f"{Colors.YELLOW}{j + 1}. {option}{Colors.ENDC}")
         
         print(f"\n{Colors.BLUE}Введите номер правильного ответа (1-{len(options)}) или 0 для выхода{Colors.ENDC}")
+        answer_choices = [str(j) for j in range(1, len(options) + 1)] + ['0']
+        attempt.question_shown()
         
         while True:
-            user_input = input(f"\n{Colors.YELLOW}Ваш ответ:{Colors.ENDC} ").strip()
+            user_input = read_choice(f"\n{Colors.YELLOW}Ваш ответ:{Colors.ENDC} ", answer_choices).strip()
             
             # Проверяем на выход
             if user_input == '0' or user_input.lower() in ['exit', 'quit', 'выход']:
                 print(f"\n{Colors.WARNING}Тест прерван.{Colors.ENDC}")
+                attempt.finish()
+                save_user_progress(session)
                 if i > 1:  # Если ответили хотя бы на один вопрос
                     answered_questions = i - 1
                     partial_score = (correct_answers / answered_questions) * 100
@@ -355,15 +626,17 @@ def run_level_test(level):
                     print(f"{Colors.FAIL}Введите число от 1 до {len(options)} или 0 для выхода{Colors.ENDC}")
                     continue
                 
-                correct_index = question['correct']
-                if user_answer == correct_index:
+                is_correct = user_answer == correct_index
+                latency_ms = attempt.record_answer(question, order[user_answer], is_correct)
+                publish_event(session, 'test_answer', level=level, q=i, ok=is_correct, ms=latency_ms)
+                if is_correct:
                     correct_answers += 1
                     print(f"\n{Colors.OKGREEN}Правильно!{Colors.ENDC}")
                 else:
                     print(f"\n{Colors.FAIL}Неправильно.{Colors.ENDC}")
                 
                 print(f"\n{Colors.BOLD}Правильный ответ:{Colors.ENDC} {options[correct_index]}")
-                print(f"\n{Colors.CYAN}Объяснение:{Colors.ENDC} {question['explanation']}")
+                print(f"\n{Colors.CYAN}Объяснение:{Colors.ENDC} {question.explanation}")
                 wait_for_enter()
                 break
                 
@@ -386,90 +659,97 @@ def run_level_test(level):
         print(f"{Colors.RED}Стоит еще попрактиковаться. Не сдавайтесь!{Colors.ENDC}")
     
     # Сохраняем результат
-    test_results = USER_PROGRESS[CURRENT_USER].setdefault('test_results', {})
+    test_results = session.progress.setdefault('test_results', {})
     test_results[str(level)] = {
         'score': score_percentage,
         'completed_at': datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     }
-    save_user_progress()
+    attempt.finish(score_percentage)
+    publish_event(session, 'test_done', level=level, score=round(score_percentage, 1))
+    announce_achievements(session)
+    save_user_progress(session)
     wait_for_enter()
 
-def run_scenario_session():
+def run_scenario_session(session):
     """Запускает сессию с практическими сценариями."""
     clear_screen()
     print(f"{Colors.HEADER}{Colors.BOLD}--- Практические сценарии ---{Colors.ENDC}\n")
     
-    # Загружаем сценарии из конфигурации
-    scenarios = TRAINING_DATA.get('scenarios', {})
-    if not scenarios:
+    if not get_training_data().scenarios:
         print(f"{Colors.YELLOW}Сценарии пока не добавлены в базу данных.{Colors.ENDC}")
         wait_for_enter()
         return
     
     while True:
+        # Сценарии берутся заново на каждом шаге: контент мог перезагрузиться
+        training_data = get_training_data()
         clear_screen()
         print(f"{Colors.HEADER}Доступные сценарии:{Colors.ENDC}\n")
         
         # Показываем список доступных сценариев
-        for scenario_id, scenario_data in scenarios.items():
-            completed = scenario_data['id'] in USER_PROGRESS[CURRENT_USER].get('completed_scenarios', [])
+        for scenario_data in training_data.scenarios:
+            completed = scenario_data.id in session.progress.get('completed_scenarios', [])
             status = f"{Colors.OKGREEN}[✓]" if completed else f"{Colors.WARNING}[ ]"
-            print(f" {scenario_id}. {Colors.CYAN}{scenario_data['name']}{Colors.ENDC} {status}")
-            print(f"    Сложность: {Colors.YELLOW}{'★' * scenario_data['difficulty']}{Colors.ENDC}")
-            print(f"    {scenario_data['description']}\n")
+            print(f" {scenario_data.key}. {Colors.CYAN}{scenario_data.name}{Colors.ENDC} {status}")
+            print(f"    Сложность: {Colors.YELLOW}{'★' * scenario_data.difficulty}{Colors.ENDC}")
+            print(f"    {scenario_data.description}\n")
         
         print("------------------------------------------")
         print(" 0. Назад")
         print("------------------------------------------")
         
-        choice = input("\nВыберите сценарий: ")
+        choice = read_choice("\nВыберите сценарий: ", list(training_data.scenarios_by_key) + ['0'])
         if choice == '0':
             break
             
-        if choice in scenarios:
-            run_single_scenario(scenarios[choice])
+        if choice in training_data.scenarios_by_key:
+            run_single_scenario(session, training_data.scenarios_by_key[choice])
         else:
             print(f"\n{Colors.FAIL}Неверный выбор сценария.{Colors.ENDC}")
             wait_for_enter()
 
-def run_single_scenario(scenario_data):
+def run_single_scenario(session, scenario_data):
     """Запускает отдельный сценарий."""
     clear_screen()
-    print(f"{Colors.HEADER}--- {scenario_data['name']} ---{Colors.ENDC}\n")
-    print(f"{Colors.BOLD}Описание:{Colors.ENDC}\n{scenario_data['description']}\n")
-    print(f"{Colors.BOLD}Сложность:{Colors.ENDC} {scenario_data['difficulty']}/5\n")
+    print(f"{Colors.HEADER}--- {scenario_data.name} ---{Colors.ENDC}\n")
+    print(f"{Colors.BOLD}Описание:{Colors.ENDC}\n{scenario_data.description}\n")
+    print(f"{Colors.BOLD}Сложность:{Colors.ENDC} {scenario_data.difficulty}/5\n")
     
     # Показываем задания сценария
-    for step_num, step in enumerate(scenario_data['steps'], 1):
+    for step_num, step in enumerate(scenario_data.steps, 1):
         print(f"\n{Colors.CYAN}Шаг {step_num}:{Colors.ENDC}")
-        print(step['task'])
+        print(step.task)
         
         while True:
-            user_answer = input(f"\n{Colors.YELLOW}Ваше решение [{Colors.BOLD}help{Colors.ENDC}{Colors.YELLOW} для подсказки, {Colors.BOLD}skip{Colors.ENDC}{Colors.YELLOW} для пропуска]:{Colors.ENDC} ")
+            user_answer = read_answer(session, f"\n{Colors.YELLOW}Ваше решение [{Colors.BOLD}help{Colors.ENDC}{Colors.YELLOW} для подсказки, {Colors.BOLD}skip{Colors.ENDC}{Colors.YELLOW} для пропуска]:{Colors.ENDC} ")
             
             if user_answer.lower() == 'help':
-                print(f"\n{Colors.BLUE}Подсказка:{Colors.ENDC} {step['hint']}")
+                print(f"\n{Colors.BLUE}Подсказка:{Colors.ENDC} {step.hint}")
                 continue
                 
             if user_answer.lower() == 'skip':
-                print(f"\n{Colors.WARNING}Шаг пропущен. Правильное решение: {Colors.BOLD}{step['solution']}{Colors.ENDC}")
+                publish_event(session, 'step', scenario=scenario_data.id, step=step_num, skipped=True)
+                print(f"\n{Colors.WARNING}Шаг пропущен. Правильное решение: {Colors.BOLD}{step.solution}{Colors.ENDC}")
                 break
                 
-            is_correct, message = check_answer(user_answer, {'solution': step['solution']})
+            is_correct, message = check_answer(session, user_answer, step)
+            publish_event(session, 'step', scenario=scenario_data.id, step=step_num, ok=is_correct)
             print(f"\n{message}")
             
             if is_correct:
-                if 'explanation' in step:
-                    print(f"\n{Colors.OKGREEN}Объяснение:{Colors.ENDC} {step['explanation']}")
+                if step.explanation:
+                    print(f"\n{Colors.OKGREEN}Объяснение:{Colors.ENDC} {step.explanation}")
                 break
             else:
                 print(f"\n{Colors.YELLOW}Введите 'help' для подсказки или попробуйте снова.{Colors.ENDC}")
     
     # Отмечаем сценарий как выполненный
-    completed_scenarios = USER_PROGRESS[CURRENT_USER].setdefault('completed_scenarios', [])
-    if scenario_data['id'] not in completed_scenarios:
-        completed_scenarios.append(scenario_data['id'])
-        save_user_progress()
+    completed_scenarios = session.progress.setdefault('completed_scenarios', [])
+    publish_event(session, 'scenario_done', scenario=scenario_data.id)
+    if scenario_data.id not in completed_scenarios:
+        completed_scenarios.append(scenario_data.id)
+        announce_achievements(session)
+        save_user_progress(session)
         print(f"\n{Colors.OKGREEN}Поздравляем! Сценарий успешно завершен!{Colors.ENDC}")
     
         wait_for_enter()
@@ -506,37 +786,36 @@ def show_guidance():
     print(f"{Colors.YELLOW}Совет: Всегда проверяйте параметры команд через man или --help перед использованием!{Colors.ENDC}")
     wait_for_enter()
 
-def show_user_progress():
-    """Показывает статистику текущего пользователя."""
+def show_user_progress(session):
+    """Показывает статистику пользователя сессии."""
     clear_screen()
+    lines = []
     
     # Создаем заголовок с именем пользователя
-    title = f" Прогресс пользователя: {CURRENT_USER} "
+    title = f" Прогресс пользователя: {session.user} "
     padding = "═" * ((60 - len(title)) // 2)
-    print(f"{Colors.HEADER}╔{padding}{title}{padding}╗{Colors.ENDC}")
-    print(f"{Colors.HEADER}║{' ' * (len(padding)*2 + len(title))}║{Colors.ENDC}")
+    lines.append(f"{Colors.HEADER}╔{padding}{title}{padding}╗{Colors.ENDC}")
+    lines.append(f"{Colors.HEADER}║{' ' * (len(padding)*2 + len(title))}║{Colors.ENDC}")
+
+    training_data = get_training_data()
 
     # Показываем общий прогресс
-    completed_tasks = USER_PROGRESS[CURRENT_USER].get('completed_tasks', [])
-    total_tasks = sum(
-        len(cmd.get('practice', []))
-        for mod in TRAINING_DATA.values()
-        if isinstance(mod, dict) and 'commands' in mod
-        for cmd in mod['commands'].values()
-    )
+    completed_tasks = session.progress.get('completed_tasks', [])
+    total_tasks = training_data.task_count
     
     if total_tasks > 0:
         total_percentage = (len(completed_tasks) / total_tasks) * 100
         progress_bar = create_progress_bar(total_percentage)
-        print(f"{Colors.HEADER}║{Colors.ENDC} {Colors.BOLD}{Colors.PURPLE}ОБЩИЙ ПРОГРЕСС:{Colors.ENDC}")
-        print(f"{Colors.HEADER}║{Colors.ENDC} {progress_bar}")
-        print(f"{Colors.HEADER}║{Colors.ENDC} Выполнено задач: {Colors.CYAN}{len(completed_tasks)}/{total_tasks}{Colors.ENDC} ({Colors.YELLOW}{total_percentage:.1f}%{Colors.ENDC})")
-        print(f"{Colors.HEADER}║{Colors.ENDC}")
+        lines.append(f"{Colors.HEADER}║{Colors.ENDC} {Colors.BOLD}{Colors.PURPLE}ОБЩИЙ ПРОГРЕСС:{Colors.ENDC}")
+        lines.append(f"{Colors.HEADER}║{Colors.ENDC} {progress_bar}")
+        lines.append(f"{Colors.HEADER}║{Colors.ENDC} Выполнено задач: {Colors.CYAN}{len(completed_tasks)}/{total_tasks}{Colors.ENDC} ({Colors.YELLOW}{total_percentage:.1f}%{Colors.ENDC})")
+        lines.append(f"{Colors.HEADER}║{Colors.ENDC}")
 
     # Показываем результаты тестов
-    test_results = USER_PROGRESS[CURRENT_USER].get('test_results', {})
+    test_results = session.progress.get('test_results', {})
+    test_stats = session.progress.get('test_stats', {})
     if test_results:
-        print(f"{Colors.HEADER}║{Colors.ENDC} {Colors.BOLD}{Colors.BLUE}РЕЗУЛЬТАТЫ ТЕСТИРОВАНИЯ:{Colors.ENDC}")
+        lines.append(f"{Colors.HEADER}║{Colors.ENDC} {Colors.BOLD}{Colors.BLUE}РЕЗУЛЬТАТЫ ТЕСТИРОВАНИЯ:{Colors.ENDC}")
         levels = {
             "1": "🌱 Новичок",
             "2": "🌿 Что-то понимаю", 
@@ -552,95 +831,97 @@ def show_user_progress():
             completed_at = result.get('completed_at', 'Неизвестно')
             color = Colors.OKGREEN if score >= 90 else Colors.CYAN if score >= 70 else Colors.PURPLE
             progress_bar = create_progress_bar(score)
-            print(f"{Colors.HEADER}║{Colors.ENDC} {levels[level]}")
-            print(f"{Colors.HEADER}║{Colors.ENDC} {progress_bar}")
-            print(f"{Colors.HEADER}║{Colors.ENDC} {color}{score:.1f}%{Colors.ENDC} (пройден {completed_at})")
-            print(f"{Colors.HEADER}║{Colors.ENDC}")
+            lines.append(f"{Colors.HEADER}║{Colors.ENDC} {levels[level]}")
+            lines.append(f"{Colors.HEADER}║{Colors.ENDC} {progress_bar}")
+            lines.append(f"{Colors.HEADER}║{Colors.ENDC} {color}{score:.1f}%{Colors.ENDC} (пройден {completed_at})")
+            stats = test_stats.get(level)
+            if stats:
+                lines.extend(format_level_stats(stats, training_data.tests_by_level.get(level)))
+            lines.append(f"{Colors.HEADER}║{Colors.ENDC}")
 
     # Показываем прогресс по модулям
-    print(f"{Colors.HEADER}║{Colors.ENDC} {Colors.BOLD}{Colors.GREEN}ПРОГРЕСС ПО МОДУЛЯМ:{Colors.ENDC}")
-    for module_id, module_data in TRAINING_DATA.items():
-        if not isinstance(module_data, dict) or 'commands' not in module_data:
-            continue
-            
+    lines.append(f"{Colors.HEADER}║{Colors.ENDC} {Colors.BOLD}{Colors.GREEN}ПРОГРЕСС ПО МОДУЛЯМ:{Colors.ENDC}")
+    completed_set = set(completed_tasks)
+    for module_data in training_data.modules:
         module_completed = 0
         module_total = 0
         
         # Считаем прогресс по модулю
-        for cmd_id, cmd_data in module_data['commands'].items():
-            cmd_completed = sum(1 for task in cmd_data.get('practice', []) if task['task'] in completed_tasks)
-            cmd_total = len(cmd_data.get('practice', []))
+        for cmd_data in module_data.commands:
+            cmd_completed = sum(1 for task in cmd_data.practice if task.task in completed_set)
+            cmd_total = len(cmd_data.practice)
             module_completed += cmd_completed
             module_total += cmd_total
             
         if module_total > 0:
             percentage = (module_completed / module_total) * 100
             progress_bar = create_progress_bar(percentage)
-            module_name = module_data.get('name', f'Модуль {module_id}')
-            print(f"{Colors.HEADER}║{Colors.ENDC}")
-            print(f"{Colors.HEADER}║{Colors.ENDC} {Colors.BOLD}{module_name}{Colors.ENDC}")
-            print(f"{Colors.HEADER}║{Colors.ENDC} {progress_bar}")
-            print(f"{Colors.HEADER}║{Colors.ENDC} Прогресс: {Colors.CYAN}{module_completed}/{module_total}{Colors.ENDC} ({Colors.YELLOW}{percentage:.1f}%{Colors.ENDC})")
+            module_name = module_data.name
+            lines.append(f"{Colors.HEADER}║{Colors.ENDC}")
+            lines.append(f"{Colors.HEADER}║{Colors.ENDC} {Colors.BOLD}{module_name}{Colors.ENDC}")
+            lines.append(f"{Colors.HEADER}║{Colors.ENDC} {progress_bar}")
+            lines.append(f"{Colors.HEADER}║{Colors.ENDC} Прогресс: {Colors.CYAN}{module_completed}/{module_total}{Colors.ENDC} ({Colors.YELLOW}{percentage:.1f}%{Colors.ENDC})")
             
             # Показываем прогресс по каждой команде
-            for cmd_id, cmd_data in module_data['commands'].items():
-                cmd_completed = sum(1 for task in cmd_data.get('practice', []) if task['task'] in completed_tasks)
-                cmd_total = len(cmd_data.get('practice', []))
+            for cmd_data in module_data.commands:
+                cmd_completed = sum(1 for task in cmd_data.practice if task.task in completed_set)
+                cmd_total = len(cmd_data.practice)
                 if cmd_total > 0:
                     cmd_percentage = (cmd_completed / cmd_total) * 100
                     cmd_color = Colors.OKGREEN if cmd_percentage == 100 else Colors.CYAN if cmd_percentage > 50 else Colors.PURPLE
-                    print(f"{Colors.HEADER}║{Colors.ENDC}   • {cmd_color}{cmd_data.get('name', f'Команда {cmd_id}')}: {cmd_completed}/{cmd_total}{Colors.ENDC}")
+                    lines.append(f"{Colors.HEADER}║{Colors.ENDC}   • {cmd_color}{cmd_data.name}: {cmd_completed}/{cmd_total}{Colors.ENDC}")
     
     # Показываем прогресс по сценариям
-    completed_scenarios = USER_PROGRESS[CURRENT_USER].get('completed_scenarios', [])
-    scenarios = TRAINING_DATA.get('scenarios', {})
+    completed_scenarios = session.progress.get('completed_scenarios', [])
+    scenarios = training_data.scenarios
     if scenarios:
-        print(f"{Colors.HEADER}║{Colors.ENDC}")
-        print(f"{Colors.HEADER}║{Colors.ENDC} {Colors.BOLD}{Colors.YELLOW}СЦЕНАРИИ:{Colors.ENDC}")
+        lines.append(f"{Colors.HEADER}║{Colors.ENDC}")
+        lines.append(f"{Colors.HEADER}║{Colors.ENDC} {Colors.BOLD}{Colors.YELLOW}СЦЕНАРИИ:{Colors.ENDC}")
         total_scenarios = len(scenarios)
         completed_count = len(completed_scenarios)
         if total_scenarios > 0:
             scenario_percentage = (completed_count / total_scenarios) * 100
             progress_bar = create_progress_bar(scenario_percentage)
-            print(f"{Colors.HEADER}║{Colors.ENDC} {progress_bar}")
-            print(f"{Colors.HEADER}║{Colors.ENDC} Выполнено: {Colors.CYAN}{completed_count}/{total_scenarios}{Colors.ENDC} ({Colors.YELLOW}{scenario_percentage:.1f}%{Colors.ENDC})")
+            lines.append(f"{Colors.HEADER}║{Colors.ENDC} {progress_bar}")
+            lines.append(f"{Colors.HEADER}║{Colors.ENDC} Выполнено: {Colors.CYAN}{completed_count}/{total_scenarios}{Colors.ENDC} ({Colors.YELLOW}{scenario_percentage:.1f}%{Colors.ENDC})")
             
             # Показываем список пройденных сценариев
     if completed_scenarios:
-        print(f"{Colors.HEADER}║{Colors.ENDC}")
-        print(f"{Colors.HEADER}║{Colors.ENDC} Пройденные сценарии:")
+        lines.append(f"{Colors.HEADER}║{Colors.ENDC}")
+        lines.append(f"{Colors.HEADER}║{Colors.ENDC} Пройденные сценарии:")
         for scenario_id in completed_scenarios:
-            if scenario_id in scenarios:
-                print(f"{Colors.HEADER}║{Colors.ENDC}   {Colors.OKGREEN}✓{Colors.ENDC} {scenarios[scenario_id]['name']}")
+            scenario = training_data.scenarios_by_id.get(scenario_id)
+            if scenario is not None:
+                lines.append(f"{Colors.HEADER}║{Colors.ENDC}   {Colors.OKGREEN}✓{Colors.ENDC} {scenario.name}")
 
     # Показываем достижения
-    achievements = USER_PROGRESS[CURRENT_USER].get('achievements', [])
-    print(f"{Colors.HEADER}║{Colors.ENDC}")
-    print(f"{Colors.HEADER}║{Colors.ENDC} {Colors.BOLD}{Colors.PURPLE}ДОСТИЖЕНИЯ:{Colors.ENDC}")
+    achievements = session.progress.get('achievements', [])
+    lines.append(f"{Colors.HEADER}║{Colors.ENDC}")
+    lines.append(f"{Colors.HEADER}║{Colors.ENDC} {Colors.BOLD}{Colors.PURPLE}ДОСТИЖЕНИЯ:{Colors.ENDC}")
     if achievements:
         for achievement_id in achievements:
             achievement = ACHIEVEMENTS.get(achievement_id)
             if achievement:
-                print(f"{Colors.HEADER}║{Colors.ENDC}   {achievement['name']} - {Colors.CYAN}{achievement['description']}{Colors.ENDC}")
+                lines.append(f"{Colors.HEADER}║{Colors.ENDC}   {achievement['name']} - {Colors.CYAN}{achievement['description']}{Colors.ENDC}")
     else:
-        print(f"{Colors.HEADER}║{Colors.ENDC}   Пока нет достижений. Продолжайте обучение!")
+        lines.append(f"{Colors.HEADER}║{Colors.ENDC}   Пока нет достижений. Продолжайте обучение!")
 
     # Показываем статистику сессий
-    stats = USER_PROGRESS[CURRENT_USER].get('session_stats', {})
-    print(f"{Colors.HEADER}║{Colors.ENDC}")
-    print(f"{Colors.HEADER}║{Colors.ENDC} {Colors.BOLD}{Colors.BLUE}СТАТИСТИКА:{Colors.ENDC}")
-    print(f"{Colors.HEADER}║{Colors.ENDC}   Первый вход: {Colors.CYAN}{stats.get('first_login', 'Неизвестно')}{Colors.ENDC}")
-    print(f"{Colors.HEADER}║{Colors.ENDC}   Последний вход: {Colors.CYAN}{stats.get('last_login', 'Неизвестно')}{Colors.ENDC}")
+    stats = session.progress.get('session_stats', {})
+    lines.append(f"{Colors.HEADER}║{Colors.ENDC}")
+    lines.append(f"{Colors.HEADER}║{Colors.ENDC} {Colors.BOLD}{Colors.BLUE}СТАТИСТИКА:{Colors.ENDC}")
+    lines.append(f"{Colors.HEADER}║{Colors.ENDC}   Первый вход: {Colors.CYAN}{stats.get('first_login', 'Неизвестно')}{Colors.ENDC}")
+    lines.append(f"{Colors.HEADER}║{Colors.ENDC}   Последний вход: {Colors.CYAN}{stats.get('last_login', 'Неизвестно')}{Colors.ENDC}")
     
     correct_answers = stats.get('correct_answers', 0)
     total_attempts = stats.get('total_attempts', 0)
     if total_attempts > 0:
         success_rate = (correct_answers / total_attempts) * 100
-        print(f"{Colors.HEADER}║{Colors.ENDC}   Успешность: {Colors.CYAN}{success_rate:.1f}%{Colors.ENDC} ({correct_answers}/{total_attempts})")
+        lines.append(f"{Colors.HEADER}║{Colors.ENDC}   Успешность: {Colors.CYAN}{success_rate:.1f}%{Colors.ENDC} ({correct_answers}/{total_attempts})")
     
     sessions = stats.get('sessions', [])
     if sessions:
-        print(f"{Colors.HEADER}║{Colors.ENDC}   Количество сессий: {Colors.CYAN}{len(sessions)}{Colors.ENDC}")
+        lines.append(f"{Colors.HEADER}║{Colors.ENDC}   Количество сессий: {Colors.CYAN}{len(sessions)}{Colors.ENDC}")
         
         # Находим текущую серию дней
         dates = sorted(set(s['date'] for s in sessions))
@@ -652,13 +933,88 @@ def show_user_progress():
                 current_streak += 1
             else:
                 break
-        print(f"{Colors.HEADER}║{Colors.ENDC}   Текущая серия: {Colors.CYAN}{current_streak}{Colors.ENDC} дней")
+        lines.append(f"{Colors.HEADER}║{Colors.ENDC}   Текущая серия: {Colors.CYAN}{current_streak}{Colors.ENDC} дней")
 
     # Закрываем рамку
-    print(f"{Colors.HEADER}║{Colors.ENDC}")
-    print(f"{Colors.HEADER}╚{'═' * (len(padding)*2 + len(title))}╝{Colors.ENDC}")
+    lines.append(f"{Colors.HEADER}║{Colors.ENDC}")
+    lines.append(f"{Colors.HEADER}╚{'═' * (len(padding)*2 + len(title))}╝{Colors.ENDC}")
     
-    wait_for_enter()
+    # Длинный отчет листается во встроенном просмотре; выход из него - q
+    from artix_pager import page
+    if not page(lines, reserve=2):
+        wait_for_enter()
+
+def format_level_stats(stats, test_level_data):
+    """Строки сводки попыток по уровню теста для экрана прогресса."""
+    from artix_stats import format_seconds, histogram_percentile, mean_score, most_missed, question_key
+
+    lines = []
+    best = stats.get('best')
+    mean = mean_score(stats)
+    summary = f"Попыток: {Colors.CYAN}{stats['attempts']}{Colors.ENDC}"
+    if best is not None:
+        summary += f", лучший: {Colors.CYAN}{best:.1f}%{Colors.ENDC}, средний: {Colors.CYAN}{mean:.1f}%{Colors.ENDC}"
+    lines.append(f"{Colors.HEADER}║{Colors.ENDC} {summary}")
+
+    p50 = histogram_percentile(stats['latency'], 0.5)
+    if p50 is not None:
+        p90 = histogram_percentile(stats['latency'], 0.9)
+        lines.append(f"{Colors.HEADER}║{Colors.ENDC} Время ответа: медиана {Colors.CYAN}{format_seconds(p50)}{Colors.ENDC}, 90% ответов быстрее {Colors.CYAN}{format_seconds(p90)}{Colors.ENDC}")
+
+    missed = most_missed(stats)
+    if missed and test_level_data is not None:
+        questions = {question_key(q.question): q.question for q in test_level_data.questions}
+        missed = [key for key in missed if key in questions]
+        if missed:
+            lines.append(f"{Colors.HEADER}║{Colors.ENDC} Чаще всего ошибки:")
+            for key in missed:
+                text = questions[key]
+                if len(text) > 60:
+                    text = text[:57] + '...'
+                lines.append(f"{Colors.HEADER}║{Colors.ENDC}   {Colors.PURPLE}✗{Colors.ENDC} {text} ({stats['missed'][key]})")
+    return lines
+
+def format_command_card(command_data):
+    """Строки карточки команды (теория, применение, параметры) и меню под ней."""
+    lines = []
+    # Создаем красивую рамку с заголовком
+    title = f" {command_data.name} "
+    padding = "═" * ((50 - len(title)) // 2)
+    lines.append(f"{Colors.HEADER}╔{padding}{title}{padding}╗{Colors.ENDC}")
+    lines.append(f"{Colors.HEADER}║{' ' * (len(padding)*2 + len(title))}║{Colors.ENDC}")
+
+    # Выводим теорию с цветным форматированием
+    lines.append(f"{Colors.HEADER}║{Colors.ENDC} {Colors.BOLD}{Colors.PURPLE}ТЕОРИЯ:{Colors.ENDC}")
+    theory_lines = command_data.theory.split('\n')
+    for line in theory_lines:
+        if line.strip():
+            lines.append(f"{Colors.HEADER}║{Colors.ENDC} {Colors.CYAN}{line}{Colors.ENDC}")
+    lines.append(f"{Colors.HEADER}║{Colors.ENDC}")
+
+    # Выводим информацию о применении
+    lines.append(f"{Colors.HEADER}║{Colors.ENDC} {Colors.BOLD}{Colors.YELLOW}КОГДА ИСПОЛЬЗОВАТЬ:{Colors.ENDC}")
+    usage_lines = command_data.when_useful.split('\n')
+    for line in usage_lines:
+        if line.strip():
+            lines.append(f"{Colors.HEADER}║{Colors.ENDC} {Colors.GREEN}{line}{Colors.ENDC}")
+    lines.append(f"{Colors.HEADER}║{Colors.ENDC}")
+
+    # Выводим параметры
+    lines.append(f"{Colors.HEADER}║{Colors.ENDC} {Colors.BOLD}{Colors.BLUE}ПАРАМЕТРЫ:{Colors.ENDC}")
+    params_lines = command_data.params.split('\n')
+    for line in params_lines:
+        if line.strip():
+            lines.append(f"{Colors.HEADER}║{Colors.ENDC} {Colors.YELLOW}{line}{Colors.ENDC}")
+    lines.append(f"{Colors.HEADER}║{Colors.ENDC}")
+
+    # Нижняя часть рамки с меню
+    menu = [
+        f"{Colors.HEADER}╠{'═' * (len(padding)*2 + len(title))}╣{Colors.ENDC}",
+        f"{Colors.HEADER}║{Colors.ENDC} {Colors.GREEN}1.{Colors.ENDC} {Colors.BOLD}Практика{Colors.ENDC}",
+        f"{Colors.HEADER}║{Colors.ENDC} {Colors.RED}0.{Colors.ENDC} {Colors.BOLD}Назад{Colors.ENDC}",
+        f"{Colors.HEADER}╚{'═' * (len(padding)*2 + len(title))}╝{Colors.ENDC}",
+    ]
+    return lines, menu
 
 def create_progress_bar(percentage, width=40):
     """Создает красивый прогресс-бар заданной ширины."""
@@ -677,23 +1033,11 @@ def create_progress_bar(percentage, width=40):
 
 # --- ГЛАВНЫЙ ЦИКЛ ПРОГРАММЫ ---
 
-def main():
-    """Основная функция, запускающая программу."""
-    global CURRENT_USER
-    
-    if TRAINING_DATA is None:
-        return
-
-    load_user_progress()
-    
-    clear_screen()
-    CURRENT_USER = input("Введите ваше имя: ").strip()
-    if not CURRENT_USER:
-        CURRENT_USER = "Гость"
-        
-    # Инициализация или обновление профиля пользователя
-    if CURRENT_USER not in USER_PROGRESS:
-        USER_PROGRESS[CURRENT_USER] = {
+def open_session(user):
+    """Открывает сессию пользователя, создавая или обновляя его профиль."""
+    session = Session(PROFILE_STORE, user)
+    if session.is_new:
+        session.progress.update({
             'completed_tasks': [],
             'test_results': {},
             'completed_scenarios': [],
@@ -706,26 +1050,81 @@ def main():
                 'total_attempts': 0,
                 'sessions': []
             }
-        }
-        log_action(f"Создан новый профиль пользователя {CURRENT_USER}", "SUCCESS")
+        })
+        log_action(session, f"Создан новый профиль пользователя {user}", "SUCCESS")
     else:
         # Обновляем статистику существующего пользователя
-        stats = USER_PROGRESS[CURRENT_USER].setdefault('session_stats', {})
+        stats = session.progress.setdefault('session_stats', {})
         stats['last_login'] = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         stats.setdefault('sessions', []).append({
             'date': datetime.datetime.now().strftime("%Y-%m-%d"),
             'start_time': datetime.datetime.now().strftime("%H:%M:%S")
         })
-        log_action(f"С возвращением, {CURRENT_USER}!", "INFO")
+        log_action(session, f"С возвращением, {user}!", "INFO")
     
-        save_user_progress()
+        save_user_progress(session)
+    return session
+
+def main():
+    """Основная функция, запускающая программу."""
+    # Разбираем учебные данные в фоне, пока пользователь вводит имя
+    prefetch_training_data()
+    if EXEC_GRADING:
+        from artix_sandbox import prewarm
+        prewarm()
+    prepare_state_dir()
+    load_user_progress()
+    sync_thread = start_progress_sync() if SYNC_SERVER else None
+    
+    clear_screen()
+    user = input("Введите ваше имя: ").strip()
+    if not user:
+        user = "Гость"
+    if sync_thread is not None:
+        sync_thread.join()
+
+    if get_training_data() is None:
+        return
+    # В zipapp контент встроен в архив - следить не за чем
+    if HOT_RELOAD and os.path.exists(TRAINING_DATA_FILE):
+        start_content_watcher()
+
+    # История ввода команд своя у каждой сессии (Session.history)
+    from artix_completion import start_session
+    start_session()
+
+    # Инициализация или обновление профиля пользователя
+    session = open_session(user)
+    try:
+        run_main_menu(session)
+    except KeyboardInterrupt:
+        print("\n\nПрограмма прервана пользователем.")
+        log_action(session, "Программа принудительно прервана (Ctrl+C).")
+        send_report_email(session)
+    finally:
+        session.close()
 
-    log_action("Запуск тренажера.")
+def find_command(module_id, command_id=None):
+    """Модуль (или команда модуля) из текущей версии учебных данных.
+
+    Меню хранят только идентификаторы и на каждом шаге находят по ним
+    объекты заново, поэтому после горячей перезагрузки показывают новый
+    контент. None - модуль или команда удалены.
+    """
+    module_data = get_training_data().modules_by_id.get(module_id)
+    if module_data is None or command_id is None:
+        return module_data
+    return module_data.commands_by_id.get(command_id)
+
+def run_main_menu(session):
+    """Главное меню сессии пользователя до выхода."""
+    log_action(session, "Запуск тренажера.")
+    publish_event(session, 'login')
     while True:
         clear_screen()
         print(f"\n{Colors.HEADER}╔══════════════════════════════════════════════════╗{Colors.ENDC}")
         print(f"{Colors.HEADER}║{Colors.BOLD}           ИНТЕРАКТИВНЫЙ ТРЕНАЖЕР LINUX           {Colors.ENDC}{Colors.HEADER}║{Colors.ENDC}")
-        print(f"{Colors.HEADER}║{Colors.YELLOW} Пользователь: {CURRENT_USER}{' ' * (39 - len(CURRENT_USER))}{Colors.ENDC}{Colors.HEADER}║{Colors.ENDC}")
+        print(f"{Colors.HEADER}║{Colors.YELLOW} Пользователь: {session.user}{' ' * (39 - len(session.user))}{Colors.ENDC}{Colors.HEADER}║{Colors.ENDC}")
         print(f"{Colors.HEADER}╠══════════════════════════════════════════════════╣{Colors.ENDC}")
         print(f"{Colors.HEADER}║{Colors.ENDC} {Colors.PURPLE}1. 📖 Начни с меня.{Colors.ENDC}{' ' * 35}{Colors.HEADER}║{Colors.ENDC}")
         print(f"{Colors.HEADER}║{Colors.ENDC} {Colors.CYAN}2. 📚 Учебные модули{Colors.ENDC}{' ' * 31}{Colors.HEADER}║{Colors.ENDC}")
@@ -736,11 +1135,12 @@ def main():
         print(f"{Colors.HEADER}║{Colors.ENDC} {Colors.RED}0. 🚪 Выход и отправка отчета{Colors.ENDC}{' ' * 23}{Colors.HEADER}║{Colors.ENDC}")
         print(f"{Colors.HEADER}╚══════════════════════════════════════════════════╝{Colors.ENDC}")
 
-        mode_choice = input("Выберите режим: ")
+        mode_choice = read_choice("Выберите режим: ", ['1', '2', '3', '4', '5', '0'])
         if mode_choice == '1':
             show_guidance()
         elif mode_choice == '2':
             while True:
+                training_data = get_training_data()
                 clear_screen()
                 print(f"\n{Colors.HEADER}╔══════════════════════════════════════╗{Colors.ENDC}")
                 print(f"{Colors.HEADER}║{Colors.BOLD}      ВЫБЕРИТЕ УЧЕБНЫЙ МОДУЛЬ       {Colors.ENDC}{Colors.HEADER}║{Colors.ENDC}")
@@ -755,33 +1155,33 @@ def main():
                     "5": "🔧"   # Работа с оборудованием
                 }
                 
-                for module_id, module_data in TRAINING_DATA.items():
-                    # Пропускаем специальные секции (tests, scenarios)
-                    if not isinstance(module_data, dict) or 'commands' not in module_data:
-                        continue
-                    icon = module_icons.get(str(module_id), "•")
-                    print(f"{Colors.HEADER}║{Colors.ENDC} {Colors.YELLOW}{module_id}{Colors.ENDC}. {icon} {Colors.CYAN}{module_data.get('name', f'Модуль {module_id}')}{Colors.ENDC}")
+                for module_data in training_data.modules:
+                    icon = module_icons.get(module_data.id, "•")
+                    print(f"{Colors.HEADER}║{Colors.ENDC} {Colors.YELLOW}{module_data.id}{Colors.ENDC}. {icon} {Colors.CYAN}{module_data.name}{Colors.ENDC}")
                 
                 print(f"{Colors.HEADER}╠══════════════════════════════════════╣{Colors.ENDC}")
                 print(f"{Colors.HEADER}║{Colors.ENDC} {Colors.RED}0. ⬅️  Назад{Colors.ENDC}")
                 print(f"{Colors.HEADER}╚══════════════════════════════════════╝{Colors.ENDC}")
                 
-                module_choice = input("\nВыберите модуль: ")
+                module_choice = read_choice("\nВыберите модуль: ", list(training_data.modules_by_id) + ['0'])
                 if module_choice == '0':
                     break
                     
-                if module_choice in TRAINING_DATA and isinstance(TRAINING_DATA[module_choice], dict) and 'commands' in TRAINING_DATA[module_choice]:
+                if module_choice in training_data.modules_by_id:
                     # Показываем команды выбранного модуля
                     while True:
+                        module_data = find_command(module_choice)
+                        if module_data is None:
+                            break
                         clear_screen()
-                        module_name = TRAINING_DATA[module_choice].get('name', f'Модуль {module_choice}')
+                        module_name = module_data.name
                         print(f"\n{Colors.HEADER}╔{'═' * (len(module_name) + 8)}╗{Colors.ENDC}")
                         print(f"{Colors.HEADER}║   {Colors.BOLD}{module_name}{Colors.ENDC}{Colors.HEADER}   ║{Colors.ENDC}")
                         print(f"{Colors.HEADER}╠{'═' * (len(module_name) + 8)}╣{Colors.ENDC}")
                         
-                        commands = TRAINING_DATA[module_choice]['commands']
-                        for cmd_id, cmd_data in commands.items():
-                            name = cmd_data.get('name', f'Команда {cmd_id}')
+                        for cmd_data in module_data.commands:
+                            cmd_id = cmd_data.id
+                            name = cmd_data.name
                             if ' - ' in name:
                                 command_name = name.split(' - ')[0]
                                 description = name.split(' - ')[1]
@@ -802,9 +1202,9 @@ def main():
                                 icon = "💻"
                             
                             # Определяем сложность команды по практическим заданиям
-                            practice_tasks = cmd_data.get('practice', [])
+                            practice_tasks = cmd_data.practice
                             if practice_tasks:
-                                max_difficulty = max(task.get('difficulty', 1) for task in practice_tasks)
+                                max_difficulty = max(task.difficulty for task in practice_tasks)
                                 difficulty_color = Colors.GREEN if max_difficulty <= 2 else Colors.YELLOW if max_difficulty <= 3 else Colors.RED
                                 difficulty_stars = '★' * max_difficulty
                             else:
@@ -826,56 +1226,28 @@ def main():
                         print(f"{Colors.HEADER}║{Colors.ENDC} {Colors.RED}0. ⬅️  Назад{Colors.ENDC}")
                         print(f"{Colors.HEADER}╚{'═' * (len(module_name) + 8)}╝{Colors.ENDC}")
                         
-                        cmd_choice = input("\nВыберите команду: ")
+                        cmd_choice = read_choice("\nВыберите команду: ", list(module_data.commands_by_id) + ['0'])
                         if cmd_choice == '0':
                             break
                             
-                        if cmd_choice in commands:
-                            command_data = commands[cmd_choice]
-                            
+                        if cmd_choice in module_data.commands_by_id:
                             while True:
+                                command_data = find_command(module_choice, cmd_choice)
+                                if command_data is None:
+                                    break
                                 clear_screen()
-                                # Создаем красивую рамку с заголовком
-                                title = f" {command_data['name']} "
-                                padding = "═" * ((50 - len(title)) // 2)
-                                print(f"{Colors.HEADER}╔{padding}{title}{padding}╗{Colors.ENDC}")
-                                print(f"{Colors.HEADER}║{' ' * (len(padding)*2 + len(title))}║{Colors.ENDC}")
-
-                                # Выводим теорию с цветным форматированием
-                                print(f"{Colors.HEADER}║{Colors.ENDC} {Colors.BOLD}{Colors.PURPLE}ТЕОРИЯ:{Colors.ENDC}")
-                                theory_lines = command_data['theory'].split('\n')
-                                for line in theory_lines:
-                                    if line.strip():
-                                        print(f"{Colors.HEADER}║{Colors.ENDC} {Colors.CYAN}{line}{Colors.ENDC}")
-                                print(f"{Colors.HEADER}║{Colors.ENDC}")
-
-                                # Выводим информацию о применении
-                                print(f"{Colors.HEADER}║{Colors.ENDC} {Colors.BOLD}{Colors.YELLOW}КОГДА ИСПОЛЬЗОВАТЬ:{Colors.ENDC}")
-                                usage_lines = command_data['when_useful'].split('\n')
-                                for line in usage_lines:
-                                    if line.strip():
-                                        print(f"{Colors.HEADER}║{Colors.ENDC} {Colors.GREEN}{line}{Colors.ENDC}")
-                                print(f"{Colors.HEADER}║{Colors.ENDC}")
-
-                                # Выводим параметры
-                                print(f"{Colors.HEADER}║{Colors.ENDC} {Colors.BOLD}{Colors.BLUE}ПАРАМЕТРЫ:{Colors.ENDC}")
-                                params_lines = command_data['params'].split('\n')
-                                for line in params_lines:
-                                    if line.strip():
-                                        print(f"{Colors.HEADER}║{Colors.ENDC} {Colors.YELLOW}{line}{Colors.ENDC}")
-                                print(f"{Colors.HEADER}║{Colors.ENDC}")
-
-                                # Нижняя часть рамки с меню
-                                print(f"{Colors.HEADER}╠{'═' * (len(padding)*2 + len(title))}╣{Colors.ENDC}")
-                                print(f"{Colors.HEADER}║{Colors.ENDC} {Colors.GREEN}1.{Colors.ENDC} {Colors.BOLD}Практика{Colors.ENDC}")
-                                print(f"{Colors.HEADER}║{Colors.ENDC} {Colors.RED}0.{Colors.ENDC} {Colors.BOLD}Назад{Colors.ENDC}")
-                                print(f"{Colors.HEADER}╚{'═' * (len(padding)*2 + len(title))}╝{Colors.ENDC}")
+                                lines, menu = format_command_card(command_data)
+                                # Длинная теория листается, меню всегда под ней
+                                from artix_pager import page
+                                page(lines, reserve=len(menu) + 2)
+                                for line in menu:
+                                    print(line)
                                 
-                                action_choice = input("\nВыберите действие: ")
+                                action_choice = read_choice("\nВыберите действие: ", ['1', '0'])
                                 if action_choice == '0':
                                     break
                                 elif action_choice == '1':
-                                    run_practice_session(command_data)
+                                    run_practice_session(session, command_data)
                                 else:
                                     print("\nНеверный выбор.")
                                     wait_for_enter()
@@ -886,21 +1258,26 @@ def main():
                     print("\nНеверный выбор модуля.")
                     wait_for_enter()
         elif mode_choice == '3':
-            run_scenario_session()
+            run_scenario_session(session)
         elif mode_choice == '4':
-            run_test_session()
+            run_test_session(session)
         elif mode_choice == '5':
-            show_user_progress()
+            show_user_progress(session)
         elif mode_choice == '0':
-            log_action("Пользователь выбрал выход.")
+            log_action(session, "Пользователь выбрал выход.")
             break
         else:
             print("\nНеверный выбор.")
             wait_for_enter()
 
     print("\nЗавершение сессии...")
-    log_action("Сессия завершена.")
-    send_report_email()
+    log_action(session, "Сессия завершена.")
+    publish_event(session, 'logout')
+    if _FEED_PUBLISHER is not None:
+        _FEED_PUBLISHER.flush()
+    if SYNC_SERVER and not sync_progress():
+        print(f"{Colors.YELLOW}Сервер синхронизации недоступен - прогресс отправится при следующем входе.{Colors.ENDC}")
+    send_report_email(session)
     print("До свидания!")
 
 
@@ -908,7 +1285,7 @@ if __name__ == "__main__":
     try:
         main()
     except KeyboardInterrupt:
+        # Прерывание до открытия сессии, например при вводе имени
         print("\n\nПрограмма прервана пользователем.")
-        log_action("Программа принудительно прервана (Ctrl+C).")
-        send_report_email()
+        log_action(None, "Программа принудительно прервана (Ctrl+C).")
         print("До свидания!")
\ No newline at end of file
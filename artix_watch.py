@@ -0,0 +1,201 @@
+"""
+Отслеживание изменений файла с учебным контентом и каталогов рядом с ним.
+
+На Linux используется inotify (через ctypes, без внешних зависимостей):
+следим за каталогом файла, потому что редакторы часто сохраняют файл
+через переименование временного. Дополнительные каталоги (например,
+content_packs/ с пакетами обновлений) отслеживаются целиком, включая
+удаление файлов; каталог, которого еще нет, начинает отслеживаться после
+создания. Если inotify недоступен, файл и каталоги опрашиваются по
+mtime, размеру и inode.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+import time
+
+POLL_INTERVAL = float(os.getenv("ARTIX_RELOAD_POLL_INTERVAL", 2.0))
+
+# Пауза после события: редактор может писать файл несколькими вызовами
+DEBOUNCE_SECONDS = 0.3
+
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = 0o2000000
+
+# Новая версия файла; удаление и переименование учитываются только для каталогов
+CHANGE_MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_MODIFY
+WATCH_MASK = CHANGE_MASK | IN_DELETE | IN_MOVED_FROM
+
+_EVENT_HEADER = struct.Struct('iIII')
+
+
+def _load_inotify():
+    """Возвращает libc с функциями inotify или None, если их нет."""
+    if not sys.platform.startswith('linux'):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        libc.inotify_init1
+        libc.inotify_add_watch
+    except (OSError, AttributeError):
+        return None
+    return libc
+
+
+class FileWatcher:
+    """Вызывает callback() в фоновом потоке после каждого изменения файла.
+
+    Args:
+        path (str): Путь к отслеживаемому файлу
+        callback (callable): Функция без аргументов
+        poll_interval (float): Период опроса для режима без inotify
+        directories (tuple): Каталоги, любое изменение в которых тоже
+            вызывает callback()
+    """
+
+    def __init__(self, path, callback, poll_interval=POLL_INTERVAL, directories=()):
+        self.path = os.path.abspath(path)
+        self.callback = callback
+        self.poll_interval = poll_interval
+        self.directories = tuple(os.path.abspath(directory) for directory in directories)
+        self.mode = None
+        self._stop = threading.Event()
+        self._thread = None
+        # inotify: дескриптор наблюдения -> имена файлов (None - любой файл каталога)
+        self._libc = None
+        self._watches = {}
+        self._watched_dirs = set()
+
+    def start(self):
+        fd = self._init_inotify()
+        if fd is not None:
+            self.mode = 'inotify'
+            target, args = self._run_inotify, (fd,)
+        else:
+            self.mode = 'poll'
+            target, args = self._run_poll, ()
+        self._thread = threading.Thread(target=target, args=args, name="content-watcher", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.poll_interval + 1)
+
+    def _notify(self):
+        try:
+            self.callback()
+        except Exception:
+            # Ошибка перезагрузки не должна останавливать наблюдение
+            pass
+
+    # --- inotify ---
+
+    def _init_inotify(self):
+        libc = _load_inotify()
+        if libc is None:
+            return None
+        fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            return None
+        self._libc = libc
+        if not self._add_watch(fd, os.path.dirname(self.path), os.path.basename(self.path)):
+            os.close(fd)
+            return None
+        for directory in self.directories:
+            self._watch_directory(fd, directory)
+        return fd
+
+    def _add_watch(self, fd, directory, name):
+        wd = self._libc.inotify_add_watch(fd, os.fsencode(directory), WATCH_MASK)
+        if wd < 0:
+            return False
+        self._watches.setdefault(wd, set()).add(None if name is None else os.fsencode(name))
+        return True
+
+    def _watch_directory(self, fd, directory):
+        """Следит за каталогом, а пока его нет - за его появлением в родительском."""
+        if self._add_watch(fd, directory, None):
+            self._watched_dirs.add(directory)
+        else:
+            self._add_watch(fd, os.path.dirname(directory), os.path.basename(directory))
+
+    def _is_relevant(self, wd, mask, name):
+        names = self._watches.get(wd, ())
+        if None in names:
+            return True
+        return name in names and bool(mask & CHANGE_MASK)
+
+    def _run_inotify(self, fd):
+        try:
+            while not self._stop.is_set():
+                ready, _, _ = select.select([fd], [], [], 1.0)
+                if not ready or not any(self._is_relevant(*event) for event in self._read_events(fd)):
+                    continue
+                # Ждем, пока запись утихнет, и сбрасываем накопившиеся события
+                time.sleep(DEBOUNCE_SECONDS)
+                self._read_events(fd)
+                for directory in self.directories:
+                    if directory not in self._watched_dirs and os.path.isdir(directory):
+                        self._watch_directory(fd, directory)
+                self._notify()
+        finally:
+            os.close(fd)
+
+    @staticmethod
+    def _read_events(fd):
+        """Возвращает события inotify: список (дескриптор, маска, имя)."""
+        events = []
+        try:
+            data = os.read(fd, 64 * 1024)
+        except BlockingIOError:
+            return events
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, mask, _, name_len = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            events.append((wd, mask, data[offset:offset + name_len].rstrip(b'\0')))
+            offset += name_len
+        return events
+
+    # --- опрос по mtime ---
+
+    @staticmethod
+    def _file_signature(path):
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+    def _directory_signature(self, directory):
+        try:
+            names = sorted(os.listdir(directory))
+        except (FileNotFoundError, NotADirectoryError):
+            return None
+        return tuple((name, self._file_signature(os.path.join(directory, name))) for name in names)
+
+    def _signature(self):
+        return (self._file_signature(self.path),
+                tuple(self._directory_signature(directory) for directory in self.directories))
+
+    def _run_poll(self):
+        last = self._signature()
+        while not self._stop.wait(self.poll_interval):
+            current = self._signature()
+            # Пропавший основной файл - скорее всего, середина сохранения
+            if current != last and current[0] is not None:
+                last = current
+                self._notify()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк памяти модели контента.
+
+Сравнивает размер дерева словарей из json.load с моделью artix_content
+(классы со __slots__, интернированные строки, кортежи), а также скорость
+обхода всех практических заданий в обоих представлениях.
+"""
+
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from artix_content import build_content, is_module_entry  # noqa: E402
+
+
+def measure_retained(factory):
+    """Возвращает (объект, байт, удерживаемых объектом после сборки мусора)."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    obj = factory()
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return obj, after - before
+
+
+def load_raw(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def walk_dict_tree(raw):
+    total = 0
+    for module in raw.values():
+        if not is_module_entry(module):
+            continue
+        for command in module['commands'].values():
+            for task in command.get('practice', []):
+                total += task['difficulty'] + len(task['solution'])
+    return total
+
+
+def walk_model(content):
+    total = 0
+    for module in content.modules:
+        for command in module.commands:
+            for task in command.practice:
+                total += task.difficulty + len(task.solution)
+    return total
+
+
+def time_walk(func, arg, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func(arg)
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк памяти модели контента")
+    parser.add_argument("--data", default=os.path.join(ROOT, "training_data.json"),
+                        help="путь к training_data.json")
+    parser.add_argument("--repeat", type=int, default=200, help="число обходов для замера скорости")
+    args = parser.parse_args()
+
+    raw, raw_bytes = measure_retained(lambda: load_raw(args.data))
+    del raw
+    # Модель строится из свежего дерева, которое затем отбрасывается
+    content, model_bytes = measure_retained(lambda: build_content(load_raw(args.data)))
+
+    print(f"Дерево словарей json.load: {raw_bytes / 1024:8.1f} КБ")
+    print(f"Модель artix_content:       {model_bytes / 1024:8.1f} КБ "
+          f"({model_bytes / raw_bytes * 100:.0f}% от словарей)")
+
+    raw = load_raw(args.data)
+    dict_time = time_walk(walk_dict_tree, raw, args.repeat)
+    model_time = time_walk(walk_model, content, args.repeat)
+    print(f"Обход заданий, словари: {dict_time * 1e6:8.1f} мкс")
+    print(f"Обход заданий, модель:  {model_time * 1e6:8.1f} мкс")
+
+
+if __name__ == "__main__":
+    main()
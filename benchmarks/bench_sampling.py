@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк выбора вопросов для попытки теста.
+
+Строит синтетические банки вопросов разного размера и замеряет время
+выбора одной попытки с учетом прошлых ошибок. Время не должно расти
+вместе с размером банка.
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from artix_content import TestLevel, TestQuestion  # noqa: E402
+from artix_sampling import QuestionSampler  # noqa: E402
+from artix_stats import question_key  # noqa: E402
+
+BANK_SIZES = (100, 10000, 1000000)
+
+
+def make_level(size):
+    questions = tuple(
+        TestQuestion(f"Вопрос {i}", ("a", "b", "c", "d"), i % 4, "")
+        for i in range(size)
+    )
+    return TestLevel("1", "Синтетический", "", 1, questions)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк выбора вопросов теста")
+    parser.add_argument("--count", type=int, default=20, help="вопросов в попытке")
+    parser.add_argument("--missed", type=int, default=50, help="вопросов с прошлыми ошибками")
+    parser.add_argument("--repeat", type=int, default=2000, help="число попыток для замера")
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    for size in BANK_SIZES:
+        sampler = QuestionSampler(make_level(size))
+        missed = {
+            question_key(f"Вопрос {rng.randrange(size)}"): rng.randint(1, 5)
+            for _ in range(args.missed)
+        }
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            sampler.sample(args.count, missed, rng)
+        elapsed = (time.perf_counter() - start) / args.repeat
+        print(f"Банк {size:>8} вопросов: {elapsed * 1e6:8.1f} мкс на попытку из {args.count}")
+
+
+if __name__ == "__main__":
+    main()
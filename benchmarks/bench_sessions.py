@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк памяти процесса, обслуживающего много учеников.
+
+Создает каталог с множеством профилей и прогоняет через одно хранилище
+ProfileStore сессии случайных пользователей, часть из которых открыта
+одновременно. Память, удерживаемая профилями, сравнивается с прежней
+схемой, где весь user_progress.json загружался в один словарь.
+"""
+
+import argparse
+import gc
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from artix_session import ProfileStore, Session  # noqa: E402
+
+
+def make_profile(index, tasks):
+    return {
+        'completed_tasks': [f"Задание {index}-{j}: как посмотреть содержимое каталога?" for j in range(tasks)],
+        'test_results': {'1': {'score': 80.0, 'completed_at': '2026-01-01 10:00:00'}},
+        'completed_scenarios': [],
+        'achievements': ['first_steps'],
+        'session_stats': {'sessions': [{'date': '2026-01-01', 'start_time': '10:00:00'}] * 20},
+    }
+
+
+def retained(factory):
+    """Возвращает (результат, байт, удерживаемых после сборки мусора)."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = factory()
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, after - before
+
+
+def run_sessions(directory, capacity, concurrent, rounds, users):
+    """Сессии случайных пользователей, по concurrent открытых одновременно."""
+    store = ProfileStore(directory, capacity, legacy_file=None)
+    rng = random.Random(1)
+    open_sessions = []
+    for _ in range(rounds):
+        session = Session(store, f"user{rng.randrange(users)}")
+        session.progress.setdefault('completed_tasks', []).append('новое задание')
+        session.save()
+        open_sessions.append(session)
+        if len(open_sessions) > concurrent:
+            open_sessions.pop(rng.randrange(len(open_sessions))).close()
+    return store, open_sessions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Память хранилища профилей при множестве сессий")
+    parser.add_argument("--users", type=int, default=2000, help="число профилей на диске")
+    parser.add_argument("--tasks", type=int, default=60, help="выполненных заданий в профиле")
+    parser.add_argument("--capacity", type=int, default=128, help="емкость LRU-кеша")
+    parser.add_argument("--concurrent", type=int, default=200, help="одновременно открытых сессий")
+    parser.add_argument("--rounds", type=int, default=5000, help="сколько сессий открыть")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="artix-bench-") as tmp:
+        legacy_file = os.path.join(tmp, 'user_progress.json')
+        progress = {f"user{i}": make_profile(i, args.tasks) for i in range(args.users)}
+        with open(legacy_file, 'w', encoding='utf-8') as f:
+            json.dump(progress, f, ensure_ascii=False)
+        del progress
+        directory = os.path.join(tmp, 'profiles')
+        ProfileStore(directory, legacy_file=legacy_file)
+
+        def load_all():
+            with open(legacy_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+
+        _, whole_bytes = retained(load_all)
+        start = time.perf_counter()
+        (store, _), store_bytes = retained(
+            lambda: run_sessions(directory, args.capacity, args.concurrent, args.rounds, args.users))
+        elapsed = time.perf_counter() - start
+
+        print(f"Профилей: {args.users}, сессий: {args.rounds}, одновременно: {args.concurrent}, "
+              f"емкость кеша: {args.capacity}")
+        print(f"Весь user_progress.json в памяти: {whole_bytes / 1024 / 1024:6.1f} МБ")
+        print(f"ProfileStore:                     {store_bytes / 1024 / 1024:6.1f} МБ "
+              f"(в кеше {len(store.cached_profiles())}, загрузок {store.loads}, вытеснений {store.evictions})")
+        print(f"Время: {elapsed * 1000 / args.rounds:.2f} мс на сессию")
+
+
+if __name__ == "__main__":
+    main()
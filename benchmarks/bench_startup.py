@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк времени запуска тренажера.
+
+1. python -X importtime: импорт artix_training не должен тянуть почтовый
+   стек и не должен разбирать training_data.json.
+2. Время до первого приглашения "Введите ваше имя" при запуске скрипта.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Модули, которых не должно быть в дереве импорта при старте
+FORBIDDEN_MODULES = ("smtplib", "email.mime", "ssl")
+
+PROMPT = "Введите ваше имя".encode("utf-8")
+
+
+def bench_env(**extra):
+    """Окружение для замеров: байт-код кешируется, как у обычного пользователя."""
+    env = dict(os.environ, **extra)
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    return env
+
+
+def measure_import(module="artix_training"):
+    """Возвращает (суммарное время импорта в мкс, список импортированных модулей)."""
+    # Холодный прогон только для того, чтобы записать __pycache__
+    subprocess.run([sys.executable, "-c", f"import {module}"], cwd=ROOT, env=bench_env(),
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c",
+         f"import {module}; assert {module}.TRAINING_DATA is None, 'данные загружены при импорте'"],
+        cwd=ROOT, env=bench_env(), stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=False,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.decode("utf-8", "replace"))
+
+    total_us = 0
+    modules = []
+    for line in result.stderr.decode("utf-8", "replace").splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        name = name.strip()
+        modules.append(name)
+        if name == module:
+            total_us = int(cumulative)
+    return total_us, modules
+
+
+def measure_time_to_prompt(command, runs=5):
+    """Возвращает список времен (в секундах) до появления приглашения ввода имени."""
+    env = bench_env(PYTHONUNBUFFERED="1", TERM="dumb")
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        proc = subprocess.Popen(command, cwd=ROOT, env=env, stdin=subprocess.PIPE,
+                                stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        output = b""
+        while PROMPT not in output:
+            chunk = proc.stdout.read1(4096) if hasattr(proc.stdout, "read1") else proc.stdout.read(1)
+            if not chunk:
+                break
+            output += chunk
+        elapsed = time.perf_counter() - start
+        proc.kill()
+        proc.wait()
+        if PROMPT not in output:
+            raise RuntimeError("Приглашение ввода имени не появилось")
+        timings.append(elapsed)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк времени запуска тренажера")
+    parser.add_argument("--runs", type=int, default=5, help="количество запусков для замера")
+    parser.add_argument("--import-budget-ms", type=float, default=50.0,
+                        help="допустимое время импорта artix_training, мс")
+    parser.add_argument("--prompt-budget-ms", type=float, default=250.0,
+                        help="допустимое время до первого приглашения, мс")
+    args = parser.parse_args()
+
+    failed = False
+
+    total_us, modules = measure_import()
+    leaked = sorted({m for m in modules for f in FORBIDDEN_MODULES if m == f or m.startswith(f + ".")})
+    print(f"Импорт artix_training: {total_us / 1000:.1f} мс (бюджет {args.import_budget_ms:.0f} мс)")
+    if leaked:
+        print(f"  ✗ при импорте загружены лишние модули: {', '.join(leaked)}")
+        failed = True
+    if total_us / 1000 > args.import_budget_ms:
+        print("  ✗ превышен бюджет времени импорта")
+        failed = True
+
+    timings = measure_time_to_prompt([sys.executable, "artix_training.py"], args.runs)
+    median_ms = statistics.median(timings) * 1000
+    print(f"До приглашения ввода имени: медиана {median_ms:.1f} мс, "
+          f"мин {min(timings) * 1000:.1f} мс (бюджет {args.prompt_budget_ms:.0f} мс)")
+    if median_ms > args.prompt_budget_ms:
+        print("  ✗ превышен бюджет времени запуска")
+        failed = True
+
+    if failed:
+        sys.exit(1)
+    print("✅ Время запуска в пределах бюджета")
+
+
+if __name__ == "__main__":
+    main()
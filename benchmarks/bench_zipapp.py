@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк холодного запуска: zipapp против обычной раскладки файлов.
+
+Для каждого варианта замеряется время до приглашения ввода имени и до
+главного меню (к этому моменту контент загружен и проверен):
+
+1. скрипт + training_data.json (проверка и разбор JSON при запуске);
+2. скрипт + training_data.compiled (make compile-content);
+3. zipapp из build_zipapp.py.
+
+Все варианты запускаются из постороннего каталога, состояние пишется во
+временный ARTIX_DATA_DIR.
+"""
+
+import argparse
+import glob
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bench_startup import bench_env  # noqa: E402
+from build_zipapp import build  # noqa: E402
+
+NAME_PROMPT = "Введите ваше имя".encode("utf-8")
+MENU_PROMPT = "Выберите режим".encode("utf-8")
+
+
+def copy_layout(target, compiled):
+    os.makedirs(target)
+    for path in glob.glob(os.path.join(ROOT, "artix_*.py")):
+        shutil.copy2(path, target)
+    shutil.copy2(os.path.join(ROOT, "training_data.json"), target)
+    if compiled:
+        subprocess.run([sys.executable, "artix_compiler.py"], cwd=target, env=bench_env(),
+                       stdout=subprocess.DEVNULL, check=True)
+
+
+def measure_run(command, cwd, data_dir):
+    """Возвращает (до приглашения имени, до главного меню) в секундах."""
+    env = bench_env(PYTHONUNBUFFERED="1", TERM="dumb", ARTIX_DATA_DIR=data_dir,
+                    ARTIX_HOT_RELOAD="0", ARTIX_LIVE_FEED="0")
+    start = time.perf_counter()
+    proc = subprocess.Popen(command, cwd=cwd, env=env, stdin=subprocess.PIPE,
+                            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    proc.stdin.write("Бенчмарк\n".encode("utf-8"))
+    proc.stdin.flush()
+    output = b""
+    name_time = None
+    while MENU_PROMPT not in output:
+        chunk = proc.stdout.read1(4096)
+        if not chunk:
+            break
+        output += chunk
+        if name_time is None and NAME_PROMPT in output:
+            name_time = time.perf_counter() - start
+    menu_time = time.perf_counter() - start
+    proc.kill()
+    proc.wait()
+    if MENU_PROMPT not in output:
+        raise RuntimeError(f"Главное меню не появилось: {' '.join(command)}")
+    return name_time, menu_time
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Холодный запуск zipapp против обычной раскладки")
+    parser.add_argument("--runs", type=int, default=5, help="количество запусков каждого варианта")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="artix-bench-") as tmp:
+        json_dir = os.path.join(tmp, "json")
+        compiled_dir = os.path.join(tmp, "compiled")
+        copy_layout(json_dir, compiled=False)
+        copy_layout(compiled_dir, compiled=True)
+        archive = os.path.join(tmp, "artix-training.pyz")
+        build(archive, os.path.join(ROOT, "training_data.json"))
+
+        variants = [
+            ("скрипт + JSON", [sys.executable, os.path.join(json_dir, "artix_training.py")]),
+            ("скрипт + артефакт", [sys.executable, os.path.join(compiled_dir, "artix_training.py")]),
+            ("zipapp", [sys.executable, archive]),
+        ]
+        elsewhere = os.path.join(tmp, "cwd")
+        os.mkdir(elsewhere)
+        for label, command in variants:
+            # Первый запуск записывает __pycache__ обычной раскладки
+            measure_run(command, elsewhere, os.path.join(tmp, "state"))
+            results = [measure_run(command, elsewhere, os.path.join(tmp, "state")) for _ in range(args.runs)]
+            name_ms = statistics.median(r[0] for r in results) * 1000
+            menu_ms = statistics.median(r[1] for r in results) * 1000
+            print(f"{label:<18} до имени {name_ms:6.1f} мс, до меню {menu_ms:6.1f} мс (медианы)")
+
+
+if __name__ == "__main__":
+    main()
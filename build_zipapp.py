@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Сборка тренажера в один исполняемый zipapp-архив (например, для киосков).
+
+В архив попадают:
+- модули artix_*.py и их байт-код (.pyc с хешем без проверки, PEP 552):
+  zipimport берет готовый байт-код и не компилирует модули при запуске;
+- пакет artix_data с проверенным артефактом контента (artix_compiler.py),
+  который читается загрузчиком архива без распаковки на диск;
+- __main__.py, запускающий artix_training как основной модуль.
+
+Байт-код подходит только той версии Python, которой собран архив; на
+другой версии zipimport молча возьмет исходники из того же архива.
+
+Запуск:
+    python build_zipapp.py                      # dist/artix-training.pyz
+    python build_zipapp.py --output kiosk.pyz
+"""
+
+import argparse
+import glob
+import os
+import py_compile
+import shutil
+import sys
+import tempfile
+import zipapp
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, ROOT)
+
+from artix_compiler import (EMBEDDED_ARTIFACT, EMBEDDED_PACKAGE,  # noqa: E402
+                            artifact_bytes, compile_content, source_digest)
+
+DEFAULT_OUTPUT = os.path.join(ROOT, 'dist', 'artix-training.pyz')
+INTERPRETER = '/usr/bin/env python3'
+
+MAIN_SOURCE = '''import runpy
+
+runpy.run_module('artix_training', run_name='__main__', alter_sys=True)
+'''
+
+
+def runtime_modules():
+    return sorted(glob.glob(os.path.join(ROOT, 'artix_*.py')))
+
+
+def compile_bytecode(path, display_name):
+    """Кладет байт-код рядом с модулем (module.pyc), как его ищет zipimport.
+
+    display_name - путь модуля внутри архива для трассировок ошибок.
+    """
+    py_compile.compile(path, cfile=path + 'c', dfile=display_name, doraise=True,
+                       invalidation_mode=py_compile.PycInvalidationMode.UNCHECKED_HASH)
+
+
+def build(output, data_path):
+    with open(data_path, 'rb') as f:
+        data = f.read()
+    content, issues = compile_content(data)
+
+    archive_name = os.path.basename(output)
+    with tempfile.TemporaryDirectory(prefix='artix-zipapp-') as staging:
+        for source_path in runtime_modules():
+            name = os.path.basename(source_path)
+            target = os.path.join(staging, name)
+            shutil.copy2(source_path, target)
+            compile_bytecode(target, f"{archive_name}/{name}")
+
+        package_dir = os.path.join(staging, EMBEDDED_PACKAGE)
+        os.mkdir(package_dir)
+        init_path = os.path.join(package_dir, '__init__.py')
+        with open(init_path, 'w', encoding='utf-8') as f:
+            f.write('"""Учебный контент, встроенный в zipapp."""\n')
+        compile_bytecode(init_path, f"{archive_name}/{EMBEDDED_PACKAGE}/__init__.py")
+        with open(os.path.join(package_dir, EMBEDDED_ARTIFACT), 'wb') as f:
+            f.write(artifact_bytes(content, source_digest(data)))
+
+        with open(os.path.join(staging, '__main__.py'), 'w', encoding='utf-8') as f:
+            f.write(MAIN_SOURCE)
+
+        os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+        # Без сжатия: архив чуть больше, зато запуск не тратит время на распаковку
+        zipapp.create_archive(staging, output, interpreter=INTERPRETER)
+    return content, issues
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Сборка тренажера в zipapp")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="путь к архиву")
+    parser.add_argument("--data", default=os.path.join(ROOT, "training_data.json"),
+                        help="путь к training_data.json")
+    args = parser.parse_args()
+
+    content, issues = build(args.output, args.data)
+    for issue in issues:
+        print(issue)
+    size_kb = os.path.getsize(args.output) / 1024
+    print(f"✅ Архив {args.output}: {size_kb:.0f} КБ, {content.task_count} заданий, "
+          f"Python {sys.version_info[0]}.{sys.version_info[1]}")
+
+
+if __name__ == "__main__":
+    main()
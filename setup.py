@@ -82,6 +82,11 @@ setup(
     
     # Python пакеты
     packages=find_packages(),
+    py_modules=['artix_training', 'artix_content', 'artix_sandbox', 'artix_watch',
+                'artix_completion', 'artix_feed', 'artix_stats',
+                'artix_sampling', 'artix_compiler', 'artix_paths',
+                'artix_keys', 'artix_sync', 'artix_packs', 'artix_session',
+                'artix_pager'],
     python_requires=">=3.6",
     install_requires=read_requirements(),
     
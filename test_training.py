@@ -0,0 +1,695 @@
+"""Тесты тренажера: python -m pytest test_training.py"""
+
+import copy
+import json
+import os
+import tempfile
+import time
+
+# Состояние тестов не должно попадать в каталог данных пользователя
+os.environ.setdefault("ARTIX_DATA_DIR", tempfile.mkdtemp(prefix="artix-test-"))
+os.environ.setdefault("ARTIX_LIVE_FEED", "0")
+
+import pytest  # noqa: E402
+
+import artix_training  # noqa: E402
+from artix_content import build_content  # noqa: E402
+from artix_session import ProfileStore, Session  # noqa: E402
+
+
+RELOAD_MARK = '--- перезагрузка контента ---'
+
+
+@pytest.fixture
+def raw_content():
+    with open(artix_training.TRAINING_DATA_FILE, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+@pytest.fixture
+def session(tmp_path, monkeypatch):
+    monkeypatch.setattr(artix_training, 'clear_screen', lambda: None)
+    monkeypatch.setattr(artix_training, 'log_action', lambda *args, **kwargs: None)
+    monkeypatch.setattr(artix_training, 'send_report_email', lambda session: None)
+    monkeypatch.setattr(artix_training, 'SYNC_SERVER', None)
+    store = ProfileStore(str(tmp_path / 'profiles'), legacy_file=None)
+    session = Session(store, 'tester')
+    yield session
+    session.close()
+
+
+def drive_menu(session, monkeypatch, choices):
+    """Проходит меню по списку ответов; элемент-функция вызывается перед ответом."""
+    answers = iter(choices)
+
+    def fake_read_choice(prompt, valid):
+        answer = next(answers)
+        while callable(answer):
+            answer()
+            answer = next(answers)
+        assert answer in valid, (prompt, answer, valid)
+        return answer
+
+    monkeypatch.setattr(artix_training, 'read_choice', fake_read_choice)
+    artix_training.run_main_menu(session)
+
+
+def use_content(monkeypatch, raw):
+    monkeypatch.setattr(artix_training, 'TRAINING_DATA', build_content(raw))
+    monkeypatch.setattr(artix_training, '_TRAINING_DATA_LOADED', True)
+
+
+def reload_with(monkeypatch, raw):
+    """Горячая перезагрузка, как ее выполняет наблюдатель за файлами."""
+    content = build_content(raw)
+    monkeypatch.setattr(artix_training, 'read_training_data', lambda *args: content)
+
+    def reload():
+        print(RELOAD_MARK)
+        artix_training.reload_training_data()
+    return reload
+
+
+def test_module_menu_sees_reloaded_content(session, monkeypatch, capsys, raw_content):
+    use_content(monkeypatch, raw_content)
+    updated = copy.deepcopy(raw_content)
+    updated['1']['name'] = 'Переименованный модуль'
+    updated['9'] = copy.deepcopy(raw_content['1'])
+    updated['9']['name'] = 'Новый модуль'
+
+    # Главное меню -> модули -> (перезагрузка) назад -> снова модули -> выбор нового модуля
+    drive_menu(session, monkeypatch,
+               ['2', reload_with(monkeypatch, updated), '0', '2', '9', '0', '0', '0'])
+
+    before, after = capsys.readouterr().out.split(RELOAD_MARK)
+    assert 'Основы: Навигация и работа с файлами' in before
+    assert 'Новый модуль' not in before
+    assert 'Переименованный модуль' in after
+    assert 'Новый модуль' in after
+    assert 'Основы: Навигация и работа с файлами' not in after
+
+
+def test_command_menu_sees_reloaded_content(session, monkeypatch, capsys, raw_content):
+    use_content(monkeypatch, raw_content)
+    updated = copy.deepcopy(raw_content)
+    command = updated['1']['commands']['1']
+    command['name'] = 'ls - обновленное описание'
+
+    # Карточка команды перерисовывается после перезагрузки без выхода из меню модуля
+    drive_menu(session, monkeypatch,
+               ['2', '1', reload_with(monkeypatch, updated), '1', '0', '0', '0', '0'])
+
+    before, after = capsys.readouterr().out.split(RELOAD_MARK)
+    assert 'обновленное описание' not in before
+    assert 'обновленное описание' in after
+
+
+def test_removed_module_closes_its_menu(session, monkeypatch, raw_content):
+    use_content(monkeypatch, raw_content)
+    updated = copy.deepcopy(raw_content)
+    del updated['1']
+
+    # Модуль удален, пока открыто его меню: возврат к списку модулей
+    drive_menu(session, monkeypatch,
+               ['2', '1', reload_with(monkeypatch, updated), '1', '0', '0'])
+
+    assert artix_training.get_training_data().modules_by_id.get('1') is None
+
+
+def test_stats_rebuilt_from_log_match_profile(tmp_path):
+    from types import SimpleNamespace
+    from artix_stats import TestAttempt, level_stats, read_attempts, rebuild_stats
+
+    log = str(tmp_path / 'test_attempts.jsonl')
+    progress = {}
+    questions = [SimpleNamespace(question=f"Вопрос {number}") for number in range(3)]
+    for level, answers, score in (('1', [True, False, True], 66.7), ('1', [True, True], None),
+                                  ('2', [False], 0.0)):
+        attempt = TestAttempt('tester', level, level_stats(progress, level), path=log)
+        for question, is_correct in zip(questions, answers):
+            attempt.question_shown()
+            attempt.record_answer(question, 0, is_correct)
+        attempt.finish(score)
+    # Оборванная последняя строка не мешает разбору журнала
+    with open(log, 'a', encoding='utf-8') as f:
+        f.write('{"a":"x","u":"tester"')
+
+    assert rebuild_stats(read_attempts(log)) == {'tester': progress['test_stats']}
+    assert list(read_attempts(str(tmp_path / 'missing.jsonl'))) == []
+
+
+# --- ПЕСОЧНИЦА ---
+
+def _wait_for(condition, timeout=5.0):
+    import time
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_sandbox_reset_restores_locked_down_copy(tmp_path):
+    from artix_sandbox import Sandbox, snapshot_state, write_fixture
+
+    template = tmp_path / 'template'
+    template.mkdir()
+    write_fixture(str(template))
+    (tmp_path / 'pool').mkdir()
+    sandbox = Sandbox(str(template), str(tmp_path / 'pool'))
+    work = sandbox.path
+
+    # Что может сделать ответ, выполненный root-ом внутри user namespace
+    first = sorted(os.listdir(work))[0]
+    target = os.path.join(work, first)
+    if os.path.isdir(target):
+        import shutil
+        shutil.rmtree(target)
+    else:
+        os.remove(target)
+    os.makedirs(os.path.join(work, 'locked', 'inner'))
+    for path in (os.path.join(work, 'locked', 'inner'), os.path.join(work, 'locked'), work):
+        os.chmod(path, 0)
+
+    sandbox.reset()
+    assert snapshot_state(work) == snapshot_state(str(template))
+    sandbox.remove()
+    assert not os.path.exists(sandbox.parent)
+
+
+def test_sandbox_pool_replaces_broken_sandbox_and_times_out(monkeypatch):
+    from artix_sandbox import Sandbox, SandboxPool
+
+    pool = SandboxPool(size=2)
+    try:
+        broken = pool.acquire()
+        original_reset = Sandbox.reset
+
+        def failing_reset(sandbox):
+            if sandbox is broken:
+                raise OSError("каталог не удалось очистить")
+            original_reset(sandbox)
+        monkeypatch.setattr(Sandbox, 'reset', failing_reset)
+        pool.release(broken)
+
+        # Вместо невосстановимой песочницы в пул возвращается новая
+        assert _wait_for(lambda: pool._ready.qsize() == 2)
+        boxes = [pool.acquire(), pool.acquire()]
+        assert broken not in boxes
+        assert not os.path.exists(broken.parent)
+
+        # Пул пуст: acquire не ждет бесконечно
+        with pytest.raises(TimeoutError):
+            pool.acquire(timeout=0.05)
+    finally:
+        pool.close()
+
+
+def test_sandbox_command_cannot_break_the_pool():
+    from artix_sandbox import SandboxPool, isolation_available
+
+    if not isolation_available():
+        pytest.skip("нет unshare или user namespace")
+    pool = SandboxPool(size=2)
+    try:
+        for _ in range(3):
+            result = pool.run("chmod 000 . && echo закрыто")
+            assert result.stdout == "закрыто"
+        assert _wait_for(lambda: pool._ready.qsize() == 2)
+        assert pool.run("ls -a").state == pool.pristine_state
+    finally:
+        pool.close()
+
+
+# --- СИНХРОНИЗАЦИЯ ---
+
+@pytest.fixture
+def sync_server(tmp_path):
+    import threading
+    from artix_sync import SyncServer, SyncStore
+
+    store = SyncStore(str(tmp_path / 'server.jsonl'))
+    server = SyncServer(('127.0.0.1', 0), store, token='секрет')
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield store, f"127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def _replica(tmp_path, name):
+    from artix_sync import Replica
+    return Replica(str(tmp_path / f'{name}.json'), str(tmp_path / f'{name}.jsonl'))
+
+
+def _as_sets(value):
+    """Прогресс без учета порядка элементов множеств."""
+    if isinstance(value, dict):
+        return {key: _as_sets(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return sorted(json.dumps(_as_sets(item), sort_keys=True) for item in value)
+    return value
+
+
+def test_sync_merges_concurrent_progress(tmp_path, sync_server):
+    from artix_sync import sync
+
+    _, address = sync_server
+    a, b = _replica(tmp_path, 'a'), _replica(tmp_path, 'b')
+    base = {'ann': {'completed_tasks': ['t1'], 'test_results': {},
+                    'session_stats': {'total_attempts': 1, 'last_login': '2026-01-01 10:00:00'}}}
+    progress_a = copy.deepcopy(base)
+    sync(a, progress_a, address, token='секрет')
+    progress_b = {}
+    sync(b, progress_b, address, token='секрет')
+    assert progress_b == base
+
+    # Одновременные изменения на двух терминалах
+    progress_a['ann']['completed_tasks'].append('t2')
+    progress_a['ann']['session_stats']['total_attempts'] += 2
+    progress_a['ann']['test_results']['1'] = {'score': 40}
+    progress_b['ann']['completed_tasks'].append('t3')
+    progress_b['ann']['session_stats']['total_attempts'] += 5
+    progress_b['ann']['session_stats']['last_login'] = '2026-01-02 09:00:00'
+    a.record(progress_a)
+    time.sleep(0.01)  # метки LWW с точностью до миллисекунды
+    progress_b['ann']['test_results']['1'] = {'score': 90}
+    b.record(progress_b)
+    for replica, progress in ((a, progress_a), (b, progress_b), (a, progress_a)):
+        sync(replica, progress, address, token='секрет')
+
+    assert _as_sets(progress_a) == _as_sets(progress_b)
+    stats = progress_a['ann']['session_stats']
+    assert sorted(progress_a['ann']['completed_tasks']) == ['t1', 't2', 't3']
+    assert stats['total_attempts'] == 8
+    assert stats['last_login'] == '2026-01-02 09:00:00'
+    # Побеждает более поздняя запись
+    assert progress_a['ann']['test_results']['1'] == {'score': 90}
+    # Повторный обмен ничего не меняет
+    assert sync(a, progress_a, address, token='секрет') == 0
+
+
+def test_sync_pages_and_compacted_log_converge(tmp_path, sync_server, monkeypatch):
+    import random
+    import artix_sync
+    from artix_sync import sync
+
+    monkeypatch.setattr(artix_sync, 'SYNC_PAGE', 5)
+    store, address = sync_server
+    rng = random.Random(3)
+    terminals = [(_replica(tmp_path, name), {}) for name in 'ab']
+    for step in range(200):
+        replica, progress = rng.choice(terminals)
+        user = progress.setdefault(rng.choice(['ann', 'bob']), {})
+        stats = user.setdefault('session_stats', {})
+        stats['total_attempts'] = stats.get('total_attempts', 0) + rng.randint(1, 3)
+        task = f"t{rng.randint(0, 20)}"
+        if task not in user.setdefault('completed_tasks', []):
+            user['completed_tasks'].append(task)
+        user.setdefault('test_results', {})[str(rng.randint(1, 3))] = {'score': rng.randint(0, 100)}
+        replica.record(progress)
+        if step % 17 == 0:
+            sync(replica, progress, address, token='секрет')
+        if step % 40 == 0:
+            store.compact()
+    for _ in range(2):
+        for replica, progress in terminals:
+            sync(replica, progress, address, token='секрет')
+    (a, progress_a), (b, progress_b) = terminals
+    assert _as_sets(progress_a) == _as_sets(progress_b)
+
+    lines_before = sum(1 for _ in open(store.log_file, encoding='utf-8'))
+    store.compact()
+    assert sum(1 for _ in open(store.log_file, encoding='utf-8')) < lines_before
+    # Новый терминал забирает сжатый журнал страницами
+    c, progress_c = _replica(tmp_path, 'c'), {}
+    sync(c, progress_c, address, token='секрет')
+    assert _as_sets(progress_c) == _as_sets(progress_a)
+    assert c.clock == store.clock()
+
+
+def test_sync_rejects_missing_or_wrong_token(tmp_path, sync_server):
+    from artix_sync import SyncError, SyncServer, SyncStore, sync
+
+    store = SyncStore(str(tmp_path / 'other.jsonl'))
+    with pytest.raises(SyncError):
+        SyncServer(('0.0.0.0', 0), store, token='')
+    _, address = sync_server
+    with pytest.raises(SyncError, match='токен'):
+        sync(_replica(tmp_path, 'a'), {'ann': {'completed_tasks': ['t1']}}, address, token='чужой')
+
+
+# --- ВЫБОР ВОПРОСОВ ---
+
+def _question_bank(size):
+    from artix_content import TestLevel, TestQuestion
+    questions = [TestQuestion(f"Вопрос {number}", ['a', 'b', 'c', 'd'], number % 4, '')
+                 for number in range(size)]
+    return TestLevel('1', 'Уровень', '', 1, questions)
+
+
+def test_alias_table_follows_weights():
+    import random
+    from artix_sampling import AliasTable
+
+    weights = [1, 0, 3, 6]
+    table = AliasTable(weights)
+    rng = random.Random(1)
+    draws = 40000
+    counts = [0] * len(weights)
+    for _ in range(draws):
+        counts[table.sample(rng)] += 1
+    assert len(table) == 4
+    assert counts[1] == 0
+    for count, weight in zip(counts, weights):
+        assert abs(count / draws - weight / sum(weights)) < 0.01
+
+
+@pytest.mark.parametrize('count', [1, 8])
+def test_sampler_prefers_missed_questions(count):
+    import random
+    from artix_sampling import MISSED_BOOST, QuestionSampler
+    from artix_stats import question_key
+
+    level = _question_bank(10)
+    sampler = QuestionSampler(level)
+    missed = {question_key('Вопрос 3'): 2, 'нет-такого-вопроса': 5}
+    rng = random.Random(2)
+    rounds = 4000
+    hits = 0
+    for _ in range(rounds):
+        chosen = sampler.sample(count, missed, rng)
+        assert len(chosen) == count
+        assert len({question.question for question in chosen}) == count
+        hits += chosen[0].question == 'Вопрос 3'
+    # Первый вопрос попытки выпадает с вероятностью, пропорциональной весу
+    weight = 1 + MISSED_BOOST * 2
+    assert abs(hits / rounds - weight / (len(level.questions) - 1 + weight)) < 0.03
+
+
+def test_sampler_returns_whole_small_bank():
+    import random
+    from artix_sampling import QuestionSampler
+
+    level = _question_bank(5)
+    chosen = QuestionSampler(level).sample(20, rng=random.Random(3))
+    assert sorted(question.question for question in chosen) == [f"Вопрос {n}" for n in range(5)]
+
+
+def test_shuffle_options_remaps_correct_answer():
+    import random
+    from artix_sampling import shuffle_options
+
+    question = _question_bank(3).questions[2]
+    rng = random.Random(4)
+    for _ in range(20):
+        options, correct, order = shuffle_options(question, rng)
+        assert sorted(order) == list(range(len(question.options)))
+        assert options == [question.options[i] for i in order]
+        assert order[correct] == question.correct
+        assert options[correct] == question.options[question.correct]
+
+
+def test_empty_question_bank_does_not_start_attempt(session, monkeypatch, capsys, raw_content):
+    raw = copy.deepcopy(raw_content)
+    raw['tests']['1']['questions'] = []
+    use_content(monkeypatch, raw)
+    monkeypatch.setattr(artix_training, 'wait_for_enter', lambda: None)
+
+    artix_training.run_level_test(session, '1')
+
+    assert 'пока не добавлены' in capsys.readouterr().out
+    assert session.progress.get('test_stats', {}).get('1', {}).get('attempts', 0) == 0
+
+
+# --- ПРОВЕРКА КОНТЕНТА ---
+
+def _broken_content(raw):
+    raw = copy.deepcopy(raw)
+    first_task = raw['1']['commands']['1']['practice'][0]
+    del raw['1']['commands']['2']['practice'][0]['solution']
+    raw['2']['commands']['1']['practice'].append(copy.deepcopy(first_task))
+    questions = raw['tests']['1']['questions']
+    questions[1]['correct'] = len(questions[1]['options'])
+    questions.append(copy.deepcopy(questions[0]))
+    return raw
+
+
+@pytest.mark.parametrize('jobs', [1, 2])
+def test_validate_content_reports_errors(raw_content, jobs):
+    from artix_compiler import Issue, has_errors, validate_content
+
+    assert not has_errors(validate_content(raw_content, jobs=jobs))
+
+    issues = validate_content(_broken_content(raw_content), jobs=jobs)
+    errors = [(issue.location, issue.message) for issue in issues if issue.severity == Issue.ERROR]
+    last_question = len(raw_content['tests']['1']['questions']) + 1
+    assert errors == [
+        ('модуль 1 / команда 2 / задание 1', "нет поля 'solution'"),
+        (f"модуль 2 / команда 1 / задание {len(raw_content['2']['commands']['1']['practice']) + 1}",
+         "текст задания повторяет модуль 1 / команда 1 / задание 1"),
+        ('тест 1 / вопрос 2', "correct должно быть индексом от 0 до 3, а не 4"),
+        (f"тест 1 / вопрос {last_question}", "вопрос повторяет тест 1 / вопрос 1"),
+    ]
+
+
+def test_validate_content_same_issues_serial_and_parallel(raw_content):
+    from artix_compiler import validate_content
+
+    broken = _broken_content(raw_content)
+    serial = [str(issue) for issue in validate_content(broken, jobs=1)]
+    assert serial
+    assert [str(issue) for issue in validate_content(broken, jobs=2)] == serial
+
+
+def test_compiler_check_exits_on_errors(tmp_path, raw_content, monkeypatch, capsys):
+    import sys
+    import artix_compiler
+
+    data = tmp_path / 'training_data.json'
+    data.write_text(json.dumps(_broken_content(raw_content), ensure_ascii=False), encoding='utf-8')
+    monkeypatch.setattr(sys, 'argv', ['artix_compiler.py', '--data', str(data), '--check', '--jobs', '2'])
+    with pytest.raises(SystemExit) as exit_info:
+        artix_compiler.main()
+    assert '4 ошибок' in str(exit_info.value)
+    assert "ОШИБКА: модуль 1 / команда 2 / задание 1: нет поля 'solution'" in capsys.readouterr().out
+
+
+# --- ПАКЕТЫ ОБНОВЛЕНИЙ ---
+
+def _encoded(raw):
+    return json.dumps(raw, ensure_ascii=False).encode('utf-8')
+
+
+def _edited_content(raw):
+    raw = copy.deepcopy(raw)
+    raw['1']['name'] = 'Переименованный модуль'
+    del raw['1']['commands']['1']['practice'][0]
+    raw['2']['commands']['9'] = copy.deepcopy(raw['2']['commands']['1'])
+    raw['2']['commands']['9']['name'] = 'Новая команда'
+    for task in raw['2']['commands']['9']['practice']:
+        task['task'] += ' (в новой команде)'
+    raw['tests']['1']['questions'][0]['explanation'] = 'Новое объяснение'
+    return raw
+
+
+def test_pack_round_trip(raw_content):
+    from artix_content import content_fingerprint
+    from artix_packs import apply_pack, make_pack
+
+    new_raw = _edited_content(raw_content)
+    pack = make_pack(_encoded(raw_content), _encoded(new_raw))
+    base = build_content(raw_content)
+    result = apply_pack(base, pack)
+
+    assert result.version == pack['version'] == content_fingerprint(build_content(new_raw))
+    assert result.modules_by_id['1'].name == 'Переименованный модуль'
+    assert result.modules_by_id['2'].commands_by_id['9'].name == 'Новая команда'
+    # Неизмененный модуль переиспользуется как есть
+    assert result.modules_by_id['3'] is base.modules_by_id['3']
+
+
+def test_pack_rejects_wrong_base_and_tampered_ops(raw_content):
+    from artix_packs import PackError, apply_pack, make_pack
+
+    pack = make_pack(_encoded(raw_content), _encoded(_edited_content(raw_content)))
+    with pytest.raises(PackError, match='другой версии'):
+        apply_pack(build_content(_edited_content(raw_content)), pack)
+
+    tampered = copy.deepcopy(pack)
+    tampered['ops'][0]['value'] = {'name': 'Подмена'}
+    with pytest.raises(PackError, match='хеш операций'):
+        apply_pack(build_content(raw_content), tampered)
+
+
+def test_packs_apply_along_hash_chain(tmp_path, raw_content):
+    from artix_packs import apply_packs, make_pack, pack_filename
+
+    second_raw = _edited_content(raw_content)
+    third_raw = copy.deepcopy(second_raw)
+    third_raw['3']['name'] = 'Третья версия'
+    first = make_pack(_encoded(raw_content), _encoded(second_raw))
+    second = make_pack(_encoded(second_raw), _encoded(third_raw))
+    for pack in (first, second):
+        (tmp_path / pack_filename(pack)).write_text(json.dumps(pack, ensure_ascii=False), encoding='utf-8')
+
+    content, applied, problems = apply_packs(build_content(raw_content), str(tmp_path))
+    assert applied == [pack_filename(first), pack_filename(second)]
+    assert problems == []
+    assert content.modules_by_id['3'].name == 'Третья версия'
+
+    # Поврежденное звено останавливает цепочку на последней проверенной версии
+    second['ops_sha256'] = '0' * 64
+    (tmp_path / pack_filename(second)).write_text(json.dumps(second, ensure_ascii=False), encoding='utf-8')
+    content, applied, problems = apply_packs(build_content(raw_content), str(tmp_path))
+    assert applied == [pack_filename(first)]
+    assert content.version == first['version']
+    assert len(problems) == 1 and 'хеш операций' in problems[0]
+
+
+# --- ПРОФИЛИ ---
+
+def _stored_progress(directory, user):
+    from artix_session import profile_filename
+    with open(os.path.join(directory, profile_filename(user)), 'r', encoding='utf-8') as f:
+        return json.load(f)['progress']
+
+
+def test_profile_store_evicts_least_recent_with_write_back(tmp_path):
+    directory = str(tmp_path / 'profiles')
+    store = ProfileStore(directory, capacity=2, legacy_file=None)
+    store.put('ann', {'completed_tasks': ['t1']})
+    store.put('bob', {'completed_tasks': []})
+    assert store.get('ann') is not None       # ann теперь использован последним
+    store.put('cid', {'completed_tasks': []})
+
+    assert [user for user, _ in store.cached_profiles()] == ['ann', 'cid']
+    assert store.evictions == 1
+    assert _stored_progress(directory, 'bob') == {'completed_tasks': []}
+    assert not os.path.exists(os.path.join(directory, 'ann.json'))
+
+    # Измененный на месте профиль записывается при вытеснении
+    store.get('ann')['completed_tasks'].append('t2')
+    store.mark_dirty('ann')
+    store.get('bob')      # вытесняет cid
+    store.get('cid')      # вытесняет ann
+    assert store.loads == 2
+    assert _stored_progress(directory, 'ann') == {'completed_tasks': ['t1', 't2']}
+    assert store.get('ann') == {'completed_tasks': ['t1', 't2']}
+
+
+def test_profile_store_keeps_pinned_profiles(tmp_path):
+    directory = str(tmp_path / 'profiles')
+    store = ProfileStore(directory, capacity=1, legacy_file=None)
+    store.put('ann', {'completed_tasks': []})
+    store.save('ann')
+    profile = store.acquire('ann')
+    for user in ('bob', 'cid', 'dan'):
+        store.put(user, {})
+    cached = [user for user, _ in store.cached_profiles()]
+    assert cached == ['ann', 'dan']
+    assert dict(store.cached_profiles())['ann'] is profile
+
+    profile['completed_tasks'].append('t1')
+    store.mark_dirty('ann')
+    store.release('ann')
+    assert [user for user, _ in store.cached_profiles()] == ['dan']
+    assert _stored_progress(directory, 'ann') == {'completed_tasks': ['t1']}
+
+
+def test_sync_record_evicted_with_profile(tmp_path):
+    from artix_session import sync_filename
+
+    directory = str(tmp_path / 'profiles')
+    store = ProfileStore(directory, capacity=1, legacy_file=None)
+    store.put('ann', {})
+    store.sync_record('ann')['stamps'] = {'a': [1.0, 'r']}
+    store.mark_sync_dirty('ann')
+    store.put('bob', {})
+
+    assert os.path.exists(os.path.join(directory, sync_filename('ann')))
+    assert store.sync_record('ann') == {'stamps': {'a': [1.0, 'r']}}
+
+
+def test_sessions_keep_separate_command_history(monkeypatch, raw_content):
+    import builtins
+    import artix_completion
+    from artix_completion import CompletionIndex, read_command
+
+    readline = artix_completion.readline
+    shown = []
+
+    def fake_input(prompt):
+        if readline is not None:
+            shown.append([readline.get_history_item(i)
+                          for i in range(1, readline.get_current_history_length() + 1)])
+        return answers.pop(0)
+
+    answers = ['ls -la', 'pwd', 'cd /tmp', '  ']
+    monkeypatch.setattr(builtins, 'input', fake_input)
+    first, second = [], []
+    index = CompletionIndex(build_content(raw_content))
+    for history in (first, second, first, first):
+        read_command('$ ', index, history)
+
+    assert first == ['ls -la', 'cd /tmp']
+    assert second == ['pwd']
+    if readline is not None:
+        assert shown == [[], [], ['ls -la'], ['ls -la', 'cd /tmp']]
+
+
+# --- ВВОД КЛАВИШАМИ ---
+
+def test_read_choice_falls_back_to_lines_without_terminal(monkeypatch, capsys):
+    import io
+    import sys
+    from artix_keys import pause, read_choice
+
+    monkeypatch.setattr(sys, 'stdin', io.StringIO('12\nчто-то\n\n'))
+    assert read_choice('Выбор: ', ['1', '12', '0']) == '12'
+    # Неверный ввод возвращается как есть: о нем сообщает вызывающий код
+    assert read_choice('Выбор: ', ['1', '12', '0']) == 'что-то'
+    pause('Нажмите Enter...', 'Нажмите любую клавишу...')
+    assert sys.stdin.read() == ''
+    assert 'Нажмите Enter...' in capsys.readouterr().out
+
+
+def test_single_key_disabled_uses_lines(monkeypatch):
+    import builtins
+    import artix_keys
+
+    monkeypatch.setattr(artix_keys, 'SINGLE_KEY', False)
+    monkeypatch.setattr(artix_keys, 'terminal_available', lambda: True)
+    monkeypatch.setattr(builtins, 'input', lambda prompt: '3')
+    assert artix_keys.read_choice('Выбор: ', ['1', '2', '3']) == '3'
+
+
+class _ScriptedTerminal:
+    def __init__(self, keys):
+        self.keys = list(keys)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+    def read_key(self):
+        return self.keys.pop(0)
+
+
+@pytest.mark.parametrize('keys, expected', [
+    (['2'], '2'),
+    (['1', '2'], '12'),
+    (['1', 'enter'], '1'),
+    (['x', '1', 'backspace', '2'], '2'),
+    (['down', 'down', 'enter'], '12'),
+    (['up', 'enter'], '0'),
+    (['escape'], '0'),
+])
+def test_read_choice_single_keys(monkeypatch, keys, expected):
+    import artix_keys
+
+    terminal = _ScriptedTerminal(keys)
+    monkeypatch.setattr(artix_keys, 'keys_available', lambda: True)
+    monkeypatch.setattr(artix_keys, 'key_terminal', lambda: terminal)
+    assert artix_keys.read_choice('Выбор: ', ['1', '12', '2', '0']) == expected
+    assert terminal.keys == []